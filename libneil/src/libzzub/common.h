@@ -120,6 +120,7 @@ typedef zzub::outstream zzub_output_t;
 #include "master.h"
 #include "recorder.h"
 #include "graph.h"
+#include "scheduler.h"
 #include "song.h"
 #include "undo.h"
 #include "operations.h"
@@ -64,10 +64,13 @@ namespace zzub {
   }
 
   void host::lock() {
+    // the audio thread holds the lock while worker threads are running
+    if (plugin_scheduler::is_worker_thread()) return ;
     _player->swap_lock.lock();
   }
 
   void host::unlock() {
+    if (plugin_scheduler::is_worker_thread()) return ;
     _player->swap_lock.unlock();
   }
 
@@ -80,7 +83,7 @@ namespace zzub {
   }
 
   float **host::get_auxiliary_buffer() { 
-    static float* auxbuf[2] = { 0, 0 };
+    static __thread float* auxbuf[2] = { 0, 0 };
     auxbuf[0] = &aux_buffer[0].front();
     auxbuf[1] = &aux_buffer[1].front();
     return auxbuf;
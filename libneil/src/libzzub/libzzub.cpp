@@ -322,6 +322,21 @@ extern "C"
     return player->back.plugins[id]->proxy;
   }
 
+  int zzub_player_get_plugins(zzub_player_t *player, zzub_plugin_t** plugins, int size) {
+
+    operation_copy_flags flags;
+    flags.copy_graph = true;
+    flags.copy_plugins = true;
+    player->merge_backbuffer_flags(flags);
+
+    int count = std::min(player->back.get_plugin_count(), size);
+    for (int i = 0; i < count; i++) {
+      int id = player->back.graph[i].id;
+      plugins[i] = player->back.plugins[id]->proxy;
+    }
+    return count;
+  }
+
   int zzub_plugin_set_midi_connection_device(zzub_plugin_t *to_plugin, zzub_plugin_t* from_plugin, const char* name) {
 
     to_plugin->_player->plugin_set_midi_connection_device(to_plugin->id, from_plugin->id, name);
@@ -335,8 +350,10 @@ extern "C"
 
   const float** zzub_player_work_stereo(zzub_player_t *player, int* numSamples) {
     player->work_stereo(*numSamples);
-    static const float* workBuffer[] = { player->work_out_buffer[0], player->work_out_buffer[1] };
-    return workBuffer;
+    // the output buffers are reallocated with the audio device
+    player->work_out_ptrs[0] = player->work_out_buffer[0];
+    player->work_out_ptrs[1] = player->work_out_buffer[1];
+    return player->work_out_ptrs;
   }
 
   void zzub_player_clear(zzub_player_t *player) {
@@ -461,6 +478,18 @@ extern "C"
     }
   }
 
+  int zzub_player_get_waves(zzub_player_t* player, zzub_wave_t** waves, int size) {
+
+    operation_copy_flags flags;
+    flags.copy_wavetable = true;
+    player->merge_backbuffer_flags(flags);
+
+    int count = std::min((int)player->back.wavetable.waves.size(), size);
+    for (int i = 0; i < count; i++)
+      waves[i] = player->back.wavetable.waves[i]->proxy;
+    return count;
+  }
+
   zzub_event_data_t *zzub_player_get_next_event(zzub_player_t *player) {
     return player->pop_event();
   }
@@ -478,10 +507,22 @@ extern "C"
     //	player->update_plugins_load_snapshot();
   }
 
+  int zzub_player_get_event_fd(zzub_player_t* player) {
+    return player->get_event_fd();
+  }
+
   void zzub_player_set_event_queue_state(zzub_player_t* player, int enable) {
     player->set_event_queue_state(enable);
   }
 
+  void zzub_player_set_thread_count(zzub_player_t* player, int count) {
+    player->set_thread_count(count);
+  }
+
+  int zzub_player_get_thread_count(zzub_player_t* player) {
+    return player->get_thread_count();
+  }
+
   zzub_midimapping_t *zzub_player_add_midimapping(zzub_plugin_t *plugin, int group, int track, int param, int channel, int controller) {
 
 
@@ -522,6 +563,14 @@ extern "C"
     player->front.is_recording_parameters = enable!=0?true:false;
   }
 
+  int zzub_player_get_sleep_tail(zzub_player_t* player) {
+    return player->front.sleep_tail;
+  }
+
+  void zzub_player_set_sleep_tail(zzub_player_t* player, int ms) {
+    player->front.sleep_tail = ms > 0 ? ms : 0;
+  }
+
   int zzub_player_get_midi_transport(zzub_player_t* player) {
     return player->front.is_syncing_midi_transport;
   }
@@ -1110,6 +1159,33 @@ extern "C"
     plugin->_player->plugin_set_pattern_value(plugin->id, pattern, group, track, column, row, value);
   }
 
+  int zzub_plugin_get_pattern_values(zzub_plugin_t *plugin, int pattern, int group, int track, int tracks, int column, int columns, int row, int rows, int* values, int size) {
+
+    operation_copy_flags flags;
+    flags.copy_plugins = true;
+    plugin->_player->merge_backbuffer_flags(flags);
+
+    const zzub::pattern& p = *plugin->_player->back.plugins[plugin->id]->patterns[pattern];
+    int count = 0;
+    for (int t = 0; t < tracks; t++) {
+      const zzub::pattern::track& ptrack = p.groups[group][track + t];
+      for (int c = 0; c < columns; c++) {
+	const zzub::pattern::column& pcolumn = ptrack[column + c];
+	for (int r = 0; r < rows; r++) {
+	  if (count >= size) return count;
+	  values[count++] = pcolumn[row + r];
+	}
+      }
+    }
+    return count;
+  }
+
+  void zzub_plugin_set_pattern_values(zzub_plugin_t *plugin, int pattern, int group, int track, int tracks, int column, int columns, int row, int rows, const int* values, int size) {
+    assert(tracks * columns * rows <= size);
+
+    plugin->_player->plugin_set_pattern_values(plugin->id, pattern, group, track, tracks, column, columns, row, rows, values);
+  }
+
   void zzub_plugin_insert_pattern_rows(zzub_plugin_t *plugin, int pattern, const int* column_indices, int num_indices, int start, int rows) {
 
     plugin->_player->plugin_insert_pattern_rows(plugin->id, pattern, (int*)column_indices, num_indices, start, rows);
@@ -1445,6 +1521,23 @@ extern "C"
     return plugin->_player->front.plugins[plugin->id]->last_work_audio_result?1:0;
   }
 
+  int zzub_plugin_is_sleeping(zzub_plugin_t *plugin) {
+    if (plugin->id >= plugin->_player->front.plugins.size() || plugin->_player->front.plugins[plugin->id] == 0) return 0;
+    return plugin->_player->front.plugins[plugin->id]->is_sleeping?1:0;
+  }
+
+  int zzub_plugin_get_sleep_count(zzub_plugin_t *plugin) {
+    if (plugin->id >= plugin->_player->front.plugins.size() || plugin->_player->front.plugins[plugin->id] == 0) return 0;
+    return plugin->_player->front.plugins[plugin->id]->sleep_count;
+  }
+
+  int zzub_plugin_is_unreachable(zzub_plugin_t *plugin) {
+    if (plugin->id >= plugin->_player->front.plugins.size() || plugin->_player->front.plugins[plugin->id] == 0) return 0;
+    plugin_descriptor descriptor = plugin->_player->front.plugins[plugin->id]->descriptor;
+    if (descriptor >= plugin->_player->front.unreachable.size()) return 0;
+    return plugin->_player->front.unreachable[descriptor]?1:0;
+  }
+
   int zzub_plugin_get_last_midi_result(zzub_plugin_t *plugin) {
     if (plugin->id >= plugin->_player->front.plugins.size() || plugin->_player->front.plugins[plugin->id] == 0) return 0;
     return plugin->_player->front.plugins[plugin->id]->last_work_midi_result?1:0;
@@ -1662,6 +1755,20 @@ extern "C"
     return 0;
   }
 
+  int zzub_sequence_get_events(zzub_sequence_t* sequence, int* events, int size) {
+    operation_copy_flags flags;
+    flags.copy_sequencer_tracks = true;
+    sequence->_player->merge_backbuffer_flags(flags);
+
+    std::vector<sequence_event>& track_events = sequence->_player->back.sequencer_tracks[sequence->track].events;
+    int count = std::min((int)track_events.size(), size / 2);
+    for (int i = 0; i < count; i++) {
+      events[i * 2] = track_events[i].time;
+      events[i * 2 + 1] = track_events[i].pattern_event.value;
+    }
+    return count;
+  }
+
   zzub_plugin_t* zzub_sequence_get_plugin(zzub_sequence_t* sequence) {
 
     operation_copy_flags flags;
@@ -1911,7 +2018,7 @@ extern "C"
   //}
 
   /** \brief Create a silent, non-processing audio driver that has one device with the specified properties. */
-  zzub_audiodriver_t* zzub_audiodriver_create_silent(zzub_player_t* player, const char* name, int out_channels, int in_channels, int* supported_rates, int num_rates) {
+  zzub_audiodriver_t* zzub_audiodriver_create_silent(zzub_player_t* player, const char* name, int out_channels, int in_channels, const int* supported_rates, int num_rates) {
     audiodriver_silent* driver = new audiodriver_silent();
     driver->device.name = name;
     driver->device.out_channels = out_channels;
@@ -2266,6 +2373,14 @@ extern "C"
     return level->_player->back.wavetable.waves[level->wave]->levels[level->level].format;
   }
 
+  void* zzub_wavelevel_lock_samples(zzub_wavelevel_t* level) {
+    return level->_player->wave_lock_samples(level->wave, level->level);
+  }
+
+  void zzub_wavelevel_commit_samples(zzub_wavelevel_t* level, int start, int end) {
+    level->_player->wave_commit_samples(level->wave, level->level, start, end);
+  }
+
   static sf_count_t outstream_filelen (void *user_data) {
     zzub::outstream* strm = (zzub::outstream*)user_data ;
     int pos = strm->position();
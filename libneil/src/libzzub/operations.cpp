@@ -207,6 +207,9 @@ namespace zzub {
     plugin.cpu_load_buffersize = 0;
     plugin.cpu_load_time = 0.0f;
     plugin.writemode_errors = 0;
+    plugin.sleep_silence = 0;
+    plugin.is_sleeping = false;
+    plugin.sleep_count = 0;
 
     if (get_note_info(loader, plugin.note_group, plugin.note_column)) {
       if (!get_velocity_info(loader, plugin.note_group, plugin.velocity_column)) {
@@ -2144,4 +2147,50 @@ namespace zzub {
     if (send_events) song.plugin_invoke_event(0, event_data, true);
   }
 
+
+  // ---------------------------------------------------------------------------
+  //
+  // op_wavetable_replace_sampledata
+  //
+  // ---------------------------------------------------------------------------
+
+  op_wavetable_replace_sampledata::op_wavetable_replace_sampledata(int _wave, int _level, int _pos) {
+    wave = _wave;
+    level = _level;
+    pos = _pos;
+
+    copy_flags.copy_wavetable = true;
+    operation_copy_wavelevel_flags wavelevel_flags;
+    wavelevel_flags.wave = wave;
+    wavelevel_flags.level = level;
+    wavelevel_flags.copy_samples = true;
+    copy_flags.wavelevel_flags.push_back(wavelevel_flags);
+  }
+
+  bool op_wavetable_replace_sampledata::prepare(zzub::song& song) {
+    // overwrite raw interleaved sample data in place, the level keeps its size and format
+    wave_info_ex& w = *song.wavetable.waves[wave];
+    wave_level_ex& l = song.wavetable.waves[wave]->levels[level];
+
+    int channels = (w.flags & wave_flag_stereo) ? 2 : 1;
+    int bytes_per_frame = l.get_bytes_per_sample() * channels;
+    int numbytes = std::min((int)samples.size(), (l.sample_count - pos) * bytes_per_frame);
+    if (numbytes <= 0) return false;
+
+    memcpy(w.get_sample_ptr(level, pos), &samples.front(), numbytes);
+
+    event_data.type = event_type_wave_allocated;
+    event_data.allocate_wavelevel.wavelevel = song.wavetable.waves[wave]->levels[level].proxy;
+
+    return true;
+  }
+
+  bool op_wavetable_replace_sampledata::operate(zzub::song& song) {
+    return true;
+  }
+
+  void op_wavetable_replace_sampledata::finish(zzub::song& song, bool send_events) {
+    if (send_events) song.plugin_invoke_event(0, event_data, true);
+  }
+
 } // namespace zzub
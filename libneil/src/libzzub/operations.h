@@ -455,6 +455,19 @@ namespace zzub {
   };
 
 
+  struct op_wavetable_replace_sampledata : operation {
+    int wave;
+    int level;
+    int pos;
+    std::vector<char> samples;
+
+    op_wavetable_replace_sampledata(int _wave, int _level, int _pos);
+    virtual bool prepare(zzub::song& song);
+    virtual bool operate(zzub::song& song);
+    virtual void finish(zzub::song& song, bool send_events);
+  };
+
+
   struct op_wavetable_convert_sampledata : operation {
     int wave;
     int level;
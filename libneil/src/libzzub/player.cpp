@@ -21,6 +21,7 @@
 #include <algorithm>
 #include <cctype>
 #include <ctime>
+#include <fcntl.h>
 #include <sstream>
 #include "dummy.h"
 #include "archive.h"
@@ -400,6 +401,8 @@ namespace zzub {
 
   player::player() {
     swap_operations_commit = false;
+    event_pipe[0] = event_pipe[1] = -1;
+    work_out_ptrs[0] = work_out_ptrs[1] = 0;
 
     history_position = history.begin();
 
@@ -418,6 +421,10 @@ namespace zzub {
       delete plugin_libraries[i];
     }
     plugin_libraries.clear();
+
+    front.user_event_fd = -1;
+    if (event_pipe[0] != -1) close(event_pipe[0]);
+    if (event_pipe[1] != -1) close(event_pipe[1]);
   }
 
   bool player::initialize() {
@@ -818,6 +825,13 @@ namespace zzub {
 
   */
   void player::process_user_event_queue() {
+    if (event_pipe[0] != -1) {
+      // rearm before draining the pipe and the queue, so events queued
+      // from here on write a new wakeup byte.
+      __sync_fetch_and_and(&front.user_event_signaled, 0);
+      char buffer[64];
+      while (read(event_pipe[0], buffer, sizeof(buffer)) > 0);
+    }
     while (front.user_event_queue_read != front.user_event_queue_write) {
       event_message& message = front.user_event_queue[front.user_event_queue_read];
       if (message.event != 0) message.event->invoke(message.data);
@@ -827,10 +841,49 @@ namespace zzub {
     }
   }
 
+  /*! \brief Returns a file descriptor to wait for queued events on.
+
+    The descriptor becomes readable whenever events are queued for
+    process_user_event_queue(), which also resets it. Returns -1 if the
+    pipe could not be created.
+  */
+  int player::get_event_fd() {
+    if (event_pipe[0] != -1) return event_pipe[0];
+    if (pipe(event_pipe) == -1) {
+      event_pipe[0] = event_pipe[1] = -1;
+      return -1;
+    }
+    for (int i = 0; i < 2; i++) {
+      fcntl(event_pipe[i], F_SETFL, fcntl(event_pipe[i], F_GETFL) | O_NONBLOCK);
+      fcntl(event_pipe[i], F_SETFD, FD_CLOEXEC);
+    }
+    front.user_event_signaled = 0;
+    front.user_event_fd = event_pipe[1];
+    // wake up for events queued before the descriptor existed
+    if (front.user_event_queue_read != front.user_event_queue_write)
+      front.signal_user_event_queue();
+    return event_pipe[0];
+  }
+
   void player::set_event_queue_state(int enable) {
     front.enable_event_queue = enable;
   }
 
+  /*! \brief Sets the number of threads processing the plugin graph.
+
+    0 starts one thread per CPU, 1 processes all plugins in the audio
+    thread.
+  */
+  void player::set_thread_count(int count) {
+    swap_lock.lock();
+    front.scheduler.set_thread_count(count);
+    swap_lock.unlock();
+  }
+
+  int player::get_thread_count() {
+    return front.scheduler.thread_count;
+  }
+
   /***
 
       User methods for writing to the graph
@@ -1082,6 +1135,29 @@ namespace zzub {
     end_plugin_operation(id);
   }
 
+  void player::plugin_set_pattern_values(int id, int index, int group, int track, int tracks, int column, int columns, int row, int rows, const int* values) {
+    // the whole block goes in as one pattern replacement, so a bulk edit
+    // costs a single operation and a single pattern_changed event.
+    zzub::pattern newpattern;
+    op_pattern_replace* redo = new op_pattern_replace(id, index, newpattern);
+    merge_backbuffer_flags(redo->copy_flags);
+    begin_plugin_operation(id);
+    op_pattern_replace* undo = new op_pattern_replace(id, index, *back.plugins[id]->patterns[index]);
+    prepare_operation_undo(undo);
+    redo->pattern = *back.plugins[id]->patterns[index];
+    const int* value = values;
+    for (int t = 0; t < tracks; t++) {
+      for (int c = 0; c < columns; c++) {
+	zzub::pattern::column& pcolumn = redo->pattern.groups[group][track + t][column + c];
+	for (int r = 0; r < rows; r++) {
+	  pcolumn[row + r] = *value++;
+	}
+      }
+    }
+    prepare_operation_redo(redo);
+    end_plugin_operation(id);
+  }
+
   void player::plugin_insert_pattern_rows(int plugin_id, int pattern, int* column_indices, int num_indices, int start, int rows) {
     operation_copy_flags flags;
     flags.copy_plugins = true;
@@ -1733,6 +1809,58 @@ namespace zzub {
     prepare_operation_undo(undo);
   }
 
+  void* player::wave_lock_samples(int wave, int level) {
+    // give the backbuffer a private copy of the sample data, so the caller can
+    // edit it in place without the audio thread seeing partial changes.
+    // the data as it was at lock time is kept in the proxy for undo.
+    operation_copy_flags flags;
+    flags.copy_wavetable = true;
+    operation_copy_wavelevel_flags wavelevel_flags;
+    wavelevel_flags.wave = wave;
+    wavelevel_flags.level = level;
+    wavelevel_flags.copy_samples = true;
+    flags.wavelevel_flags.push_back(wavelevel_flags);
+    merge_backbuffer_flags(flags);
+
+    wave_info_ex& w = *back.wavetable.waves[wave];
+    wave_level_ex& l = w.levels[level];
+    int channels = w.get_stereo() ? 2 : 1;
+    char* samples = (char*)w.get_sample_ptr(level);
+    int numbytes = l.get_bytes_per_sample() * channels * l.sample_count;
+    l.proxy->locked_samples.assign(samples, samples + numbytes);
+    return samples;
+  }
+
+  void player::wave_commit_samples(int wave, int level, int start, int end) {
+    operation_copy_flags flags;
+    flags.copy_wavetable = true;
+    merge_backbuffer_flags(flags);
+
+    wave_info_ex& w = *back.wavetable.waves[wave];
+    wave_level_ex& l = w.levels[level];
+    std::vector<char>& locked = l.proxy->locked_samples;
+    int channels = w.get_stereo() ? 2 : 1;
+    int bytes_per_frame = l.get_bytes_per_sample() * channels;
+    assert(start >= 0 && start <= end && end <= l.sample_count);
+    assert((int)locked.size() == l.sample_count * bytes_per_frame);
+
+    if (end > start) {
+      char* samples = (char*)w.get_sample_ptr(level, start);
+      int numbytes = (end - start) * bytes_per_frame;
+
+      op_wavetable_replace_sampledata* redo = new op_wavetable_replace_sampledata(wave, level, start);
+      redo->samples.assign(samples, samples + numbytes);
+      op_wavetable_replace_sampledata* undo = new op_wavetable_replace_sampledata(wave, level, start);
+      undo->samples.assign(locked.begin() + start * bytes_per_frame, locked.begin() + start * bytes_per_frame + numbytes);
+
+      prepare_operation_redo(redo);
+      prepare_operation_undo(undo);
+    }
+
+    // release the snapshot, the level must be locked again before further edits
+    std::vector<char>().swap(locked);
+  }
+
   void player::wave_set_envelopes(int wave, const vector<zzub::envelope_entry>& envelopes) {
 
     operation_copy_flags flags;
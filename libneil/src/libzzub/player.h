@@ -34,6 +34,8 @@ namespace zzub {
     vector<const zzub::info*> plugin_infos;
     host_info hostinfo;
     thread_id_t user_thread_id;
+    int event_pipe[2];
+    const float* work_out_ptrs[2]; // returned by zzub_player_work_stereo
     player();
     virtual ~player(void);
 
@@ -60,7 +62,10 @@ namespace zzub {
     // user methods (should be, but arent supported by begin_/commit_operation)
     void clear();
     void process_user_event_queue();
+    int get_event_fd();
     void set_event_queue_state(int enable);
+    void set_thread_count(int count);
+    int get_thread_count();
     void set_state(player_state state);
     void set_state_direct(player_state state);
     void plugin_set_parameter(int plugin_id, int group, int track, int column, int value, bool record, bool immediate, bool undoable);
@@ -90,6 +95,7 @@ namespace zzub {
     void plugin_set_pattern_name(int plugin_id, int index, std::string name);
     void plugin_set_pattern_length(int plugin_id, int index, int rows);
     void plugin_set_pattern_value(int plugin_id, int index, int group, int track, int column, int row, int value);
+    void plugin_set_pattern_values(int plugin_id, int index, int group, int track, int tracks, int column, int columns, int row, int rows, const int* values);
     void plugin_insert_pattern_rows(int plugin_id, int pattern, int* column_indices, int num_indices, int start, int rows);
     void plugin_remove_pattern_rows(int plugin_id, int pattern, int* column_indices, int num_indices, int start, int rows);
     bool plugin_add_input(int to_id, int from_id, connection_type type);
@@ -118,6 +124,8 @@ namespace zzub {
     void wave_set_samples(int wave, int level, int sample_count, int channels, int format, void* bytes);
     void wave_insert_samples(int wave, int level, int target_offset, int sample_count, int channels, wave_buffer_type format, void* bytes);
     void wave_remove_samples(int wave, int level, int target_offset, int sample_count);
+    void* wave_lock_samples(int wave, int level);
+    void wave_commit_samples(int wave, int level, int start, int end);
     void wave_set_root_note(int wave, int level, int note);
     void wave_set_samples_per_second(int wave, int level, int sps);
     void wave_set_loop_begin(int wave, int level, int loop_begin);
@@ -0,0 +1,196 @@
+/*
+  Copyright (C) 2003-2007 Anders Ervik <calvin@countzero.no>
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library; if not, write to the Free Software
+  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+*/
+
+#include "common.h"
+
+using namespace std;
+
+namespace zzub {
+
+  static __thread bool scheduler_worker_thread = false;
+
+  plugin_scheduler::plugin_scheduler() {
+    owner = 0;
+    thread_count = 1;
+    quit = false;
+    ready_pos = 0;
+    remaining = 0;
+    sample_count = 0;
+    pthread_mutex_init(&mutex, NULL);
+    pthread_cond_init(&work_signal, NULL);
+  }
+
+  plugin_scheduler::~plugin_scheduler() {
+    stop_threads();
+    pthread_cond_destroy(&work_signal);
+    pthread_mutex_destroy(&mutex);
+  }
+
+  /*! \brief Sets the number of threads processing the graph.
+
+    A count of 0 uses one thread per CPU, 1 processes the graph serially
+    in the audio thread. Must not be called while the graph is processed.
+  */
+  void plugin_scheduler::set_thread_count(int count) {
+    if (count <= 0) count = (int)sysconf(_SC_NPROCESSORS_ONLN);
+    if (count < 1) count = 1;
+
+    stop_threads();
+    for (int i = 1; i < count; i++) {
+      pthread_t thread;
+      if (pthread_create(&thread, NULL, &plugin_scheduler::thread_proc, this) != 0) {
+	cerr << "libzzub: could not start more than " << i << " audio threads" << endl;
+	break;
+      }
+      threads.push_back(thread);
+    }
+    thread_count = (int)threads.size() + 1;
+  }
+
+  void plugin_scheduler::stop_threads() {
+    pthread_mutex_lock(&mutex);
+    quit = true;
+    pthread_cond_broadcast(&work_signal);
+    pthread_mutex_unlock(&mutex);
+
+    for (size_t i = 0; i < threads.size(); i++) {
+      pthread_join(threads[i], NULL);
+    }
+    threads.clear();
+    thread_count = 1;
+    quit = false;
+  }
+
+  /*! \brief Returns true when called from one of the worker threads.
+
+    Host callbacks use this to skip locking the swap lock, which the
+    audio thread already holds while the workers are busy.
+  */
+  bool plugin_scheduler::is_worker_thread() {
+    return scheduler_worker_thread;
+  }
+
+  void plugin_scheduler::add_dependency(int first, int second) {
+    dependents[first].push_back(second);
+    dependencies[second]++;
+  }
+
+  void plugin_scheduler::build_dependencies() {
+    song& s = *owner;
+    size_t count = s.work_order.size();
+    size_t vertex_count = num_vertices(s.graph);
+
+    index_of.assign(vertex_count, -1);
+    for (size_t i = 0; i < count; i++) {
+      index_of[s.work_order[i]] = (int)i;
+    }
+
+    if (dependents.size() < count) dependents.resize(count);
+    for (size_t i = 0; i < count; i++) {
+      dependents[i].clear();
+    }
+    dependencies.assign(count, 0);
+    midi_last.assign(vertex_count, -1);
+
+    for (size_t i = 0; i < count; i++) {
+      zzub::out_edge_iterator out, out_end;
+      boost::tie(out, out_end) = out_edges(s.work_order[i], s.graph);
+      for (; out != out_end; ++out) {
+	plugin_descriptor input = target(*out, s.graph);
+	int j = index_of[input];
+	if (j == -1 || j == (int)i) continue;
+
+	// the earlier plugin in the work order goes first. for feedback
+	// connections the receiving plugin comes first, like in the serial loop.
+	add_dependency(std::min((int)i, j), std::max((int)i, j));
+
+	// midi connections write to the midi buffer of the input plugin,
+	// so plugins receiving midi from the same plugin run one at a time
+	if (s.graph[*out].conn->type == connection_type_midi) {
+	  int last = midi_last[input];
+	  if (last != -1) add_dependency(last, (int)i);
+	  midi_last[input] = (int)i;
+	}
+      }
+    }
+
+    ready.clear();
+    ready_pos = 0;
+    for (size_t i = 0; i < count; i++) {
+      if (dependencies[i] == 0) ready.push_back((int)i);
+    }
+  }
+
+  /*! \brief Processes the work order of the owning mixer.
+
+    The audio thread takes part in processing and returns when all
+    plugins have been processed.
+  */
+  void plugin_scheduler::run(int sample_count) {
+    pthread_mutex_lock(&mutex);
+    this->sample_count = sample_count;
+    build_dependencies();
+    remaining = (int)owner->work_order.size();
+    pthread_cond_broadcast(&work_signal);
+
+    while (remaining > 0) {
+      if (!work_next(owner->mix_buffer))
+	pthread_cond_wait(&work_signal, &mutex);
+    }
+    pthread_mutex_unlock(&mutex);
+  }
+
+  // called with the mutex locked, returns false if nothing was ready
+  bool plugin_scheduler::work_next(std::vector<std::vector<float> >& scratch) {
+    if (ready_pos == ready.size()) return false;
+    int index = ready[ready_pos++];
+    pthread_mutex_unlock(&mutex);
+    owner->work_plugin(owner->work_order[index], sample_count, scratch);
+    pthread_mutex_lock(&mutex);
+    finish(index);
+    return true;
+  }
+
+  void plugin_scheduler::finish(int index) {
+    std::vector<int>& waiting = dependents[index];
+    for (size_t i = 0; i < waiting.size(); i++) {
+      if (--dependencies[waiting[i]] == 0) ready.push_back(waiting[i]);
+    }
+    remaining--;
+    pthread_cond_broadcast(&work_signal);
+  }
+
+  void* plugin_scheduler::thread_proc(void* arg) {
+    plugin_scheduler* self = (plugin_scheduler*)arg;
+    scheduler_worker_thread = true;
+
+    // plugins are processed via a scratch buffer, each thread has its own
+    std::vector<std::vector<float> > scratch(2);
+    scratch[0].resize(zzub::buffer_size * 4);
+    scratch[1].resize(zzub::buffer_size * 4);
+
+    pthread_mutex_lock(&self->mutex);
+    while (!self->quit) {
+      if (!self->work_next(scratch))
+	pthread_cond_wait(&self->work_signal, &self->mutex);
+    }
+    pthread_mutex_unlock(&self->mutex);
+    return 0;
+  }
+
+}
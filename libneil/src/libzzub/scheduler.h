@@ -0,0 +1,71 @@
+/*
+  Copyright (C) 2003-2007 Anders Ervik <calvin@countzero.no>
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library; if not, write to the Free Software
+  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+*/
+
+#pragma once
+
+namespace zzub {
+
+  struct mixer;
+
+  /*! \brief Processes independent branches of the plugin graph in parallel.
+
+    For every chunk, each plugin in the work order waits only for the
+    plugins it is connected to and which precede it in the work order.
+    Plugins without a path between them are handed to a pool of worker
+    threads, and the audio thread joins in until the whole graph has
+    been processed. Connected plugins are thus always processed in the
+    same order as by the serial loop, including feedback connections.
+  */
+  struct plugin_scheduler {
+    mixer* owner;
+    int thread_count;							// including the audio thread
+    std::vector<pthread_t> threads;
+    pthread_mutex_t mutex;
+    pthread_cond_t work_signal;					// new work, or all work done
+    bool quit;
+
+    // per chunk state, guarded by mutex
+    std::vector<std::vector<int> > dependents;	// work order indices waiting for a plugin
+    std::vector<int> dependencies;				// number of unfinished plugins to wait for
+    std::vector<int> ready;						// work order indices ready to run
+    size_t ready_pos;
+    int remaining;
+    int sample_count;
+
+    // temporaries for building dependencies
+    std::vector<int> index_of;
+    std::vector<int> midi_last;
+
+    plugin_scheduler();
+    ~plugin_scheduler();
+
+    void set_thread_count(int count);
+    void stop_threads();
+    void run(int sample_count);
+
+    static bool is_worker_thread();
+
+  private:
+    void build_dependencies();
+    void add_dependency(int first, int second);
+    bool work_next(std::vector<std::vector<float> >& scratch);
+    void finish(int index);
+    static void* thread_proc(void* arg);
+  };
+
+}
@@ -118,6 +118,9 @@ namespace zzub {
     enable_event_queue = true;
     user_event_queue.resize(4096);
     user_event_queue_read = user_event_queue_write = 0;
+    user_event_lock = 0;
+    user_event_fd = -1;
+    user_event_signaled = 0;
   }
 
   zzub::metaplugin& song::get_plugin(zzub::plugin_descriptor index) {
@@ -460,6 +463,49 @@ namespace zzub {
       cerr << *i << ", ";
       }
       cerr << endl;*/
+
+    find_unreachable_plugins();
+  }
+
+  /*! \brief Finds plugins whose output never reaches a sink.
+
+    Sinks are the master, plugins without audio output, such as audio
+    outputs and controllers, and plugins with a custom gui, which are
+    typically analyzers. Everything connected into a sink, through any
+    type of connection, is reachable. The mixer skips processing
+    unreachable plugins. Runs in linear time whenever the work order
+    changes, that is on every connect and disconnect.
+  */
+  void song::find_unreachable_plugins() {
+    size_t count = num_vertices(graph);
+    unreachable.assign(count, true);
+
+    deque<plugin_descriptor> live;
+    for (plugin_descriptor v = 0; v < count; v++) {
+      metaplugin* m = plugins[graph[v].id];
+      if (m == 0) continue;
+      int flags = m->info->flags;
+      if ((flags & zzub_plugin_flag_is_root) != 0 ||
+	  (flags & zzub_plugin_flag_has_audio_output) == 0 ||
+	  (flags & plugin_flag_has_custom_gui) != 0) {
+	unreachable[v] = false;
+	live.push_back(v);
+      }
+    }
+
+    // out edges lead to the plugins feeding into a plugin
+    while (!live.empty()) {
+      plugin_descriptor v = live.front();
+      live.pop_front();
+      zzub::out_edge_iterator out, out_end;
+      for (boost::tie(out, out_end) = out_edges(v, graph); out != out_end; ++out) {
+	plugin_descriptor input = target(*out, graph);
+	if (unreachable[input]) {
+	  unreachable[input] = false;
+	  live.push_back(input);
+	}
+      }
+    }
   }
 
   // ---------------------------------------------------------------------------
@@ -538,8 +584,9 @@ namespace zzub {
       param_ofs += size;
     }
   }
-  void song::invoke_plugin_parameter_changes(int plugin_id, int g) {
+  bool song::invoke_plugin_parameter_changes(int plugin_id, int g) {
     const zzub::pattern::group& group = plugins[plugin_id]->state_write.groups[g];
+    bool changed = false;
     for (int j = 0; j < (int)group.size(); j++) {
       for (int i = 0; i < (int)group[j].size(); i++) {
 	const zzub::parameter* param = plugin_get_parameter_info(plugin_id, g, j, i);
@@ -554,15 +601,18 @@ namespace zzub {
 	  event_data.change_parameter.param = i;
 	  event_data.change_parameter.value = v;
 	  plugin_invoke_event(plugin_id, event_data, false);
+	  changed = true;
 	}
       }
     }
+    return changed;
   }
 
-  void song::invoke_plugin_parameter_changes(int plugin_id) {
-    invoke_plugin_parameter_changes(plugin_id, 0);
-    invoke_plugin_parameter_changes(plugin_id, 1);
-    invoke_plugin_parameter_changes(plugin_id, 2);
+  bool song::invoke_plugin_parameter_changes(int plugin_id) {
+    bool changed = invoke_plugin_parameter_changes(plugin_id, 0);
+    changed = invoke_plugin_parameter_changes(plugin_id, 1) || changed;
+    changed = invoke_plugin_parameter_changes(plugin_id, 2) || changed;
+    return changed;
   }
 
   void song::transfer_plugin_parameter_row(int plugin_id, int g, const zzub::pattern& from_pattern, zzub::pattern& target_pattern, int from_row, int target_row, bool copy_all) {
@@ -680,21 +730,40 @@ namespace zzub {
     if (plugins[plugin_id] == 0) return false;
     std::vector<event_handler*> handlers = plugins[plugin_id]->event_handlers;
     bool handled = false;
+    bool queued = false;
     for (size_t i = 0; i < handlers.size(); i++) {
       if (!immediate) {
 	event_message em = { plugin_id, handlers[i], data };
+	while (__sync_lock_test_and_set(&user_event_lock, 1)) ;
 	user_event_queue[user_event_queue_write] = em;
 	if (user_event_queue_write == user_event_queue.size() - 1)
 	  user_event_queue_write = 0; else
 	  user_event_queue_write++;
 	assert(user_event_queue_write != user_event_queue_read);
+	__sync_lock_release(&user_event_lock);
+	queued = true;
       } else {
 	handled = handlers[i]->invoke(data)||handled;
       }
     }
+    if (queued) signal_user_event_queue();
     return handled;
   }
 
+  /*! \brief Wakes up the host waiting on the event file descriptor.
+
+    Only one byte is written until the host has drained the pipe in
+    player::process_user_event_queue(), so a busy audio thread does not
+    issue a system call for every event.
+  */
+  void song::signal_user_event_queue() {
+    if (user_event_fd == -1) return;
+    if (!__sync_bool_compare_and_swap(&user_event_signaled, 0, 1)) return;
+    char c = 0;
+    ssize_t written = write(user_event_fd, &c, 1);
+    (void)written; // a full pipe already wakes up the host
+  }
+
   void song::process_plugin_events(int plugin_id) {
 
     metaplugin& m = *plugins[plugin_id];
@@ -721,8 +790,9 @@ namespace zzub {
       track_ptr += track_size;
     }
 
-    // send parameter change notifications
-    invoke_plugin_parameter_changes(plugin_id);
+    // send parameter change notifications, changes wake up a sleeping plugin
+    if (invoke_plugin_parameter_changes(plugin_id))
+      m.sleep_silence = 0;
 
     // process plugin
     m.plugin->process_events();
@@ -891,10 +961,12 @@ namespace zzub {
     song_position = 0;
     last_tick_state = player_state_stopped;
     last_tick_position = 0;
+    sleep_tail = 0;
 
     mix_buffer.resize(2);
     mix_buffer[0].resize(zzub::buffer_size * 4);
     mix_buffer[1].resize(zzub::buffer_size * 4);
+    scheduler.owner = this;
     for (int i = 0; i < audiodriver::MAX_CHANNELS; i++) {
       inputBuffer[i] = 0;
     }
@@ -1113,11 +1185,18 @@ namespace zzub {
     assert(work_chunk_size >= 0 && work_chunk_size <= sample_count);
 
     // process plugins
-    for (size_t i = 0; i < work_order.size(); i++) {
+    if (scheduler.thread_count > 1) {
 
-      // process audio
-      work_plugin(work_order[i], work_chunk_size);
+      // independent branches are processed in parallel
+      scheduler.run(work_chunk_size);
+
+    } else {
+      for (size_t i = 0; i < work_order.size(); i++) {
 
+	// process audio
+	work_plugin(work_order[i], work_chunk_size);
+
+      }
     }
 
     // process midi
@@ -1202,6 +1281,10 @@ namespace zzub {
   }
 
   void mixer::work_plugin(plugin_descriptor plugin, int sample_count) {
+    work_plugin(plugin, sample_count, mix_buffer);
+  }
+
+  void mixer::work_plugin(plugin_descriptor plugin, int sample_count, vector<vector<float> >& scratch) {
 
     double start_time = timer.frame();
 
@@ -1211,6 +1294,19 @@ namespace zzub {
     memset(&m.work_buffer[0].front(), 0, sample_count * sizeof(float));
     memset(&m.work_buffer[1].front(), 0, sample_count * sizeof(float));
 
+    // nothing hears the output of an unreachable plugin, and all of its
+    // inputs are unreachable as well. only its events are still processed.
+    if (plugin < unreachable.size() && unreachable[plugin]) {
+      reset_plugin_parameter_group(m.state_automation.groups[1], m.info->global_parameters);
+      reset_plugin_parameter_group(m.state_automation.groups[2], m.info->track_parameters);
+      m.last_work_audio_result = false;
+      m.last_work_max_left = m.last_work_max_right = 0;
+      m.last_work_time = 0;
+      m.last_work_buffersize = sample_count;
+      m.last_work_frame = work_position;
+      return;
+    }
+
     bool result = false;
     zzub::out_edge_iterator out, out_end;
     boost::tie(out, out_end) = out_edges(plugin, graph);
@@ -1219,7 +1315,11 @@ namespace zzub {
       assert(target(*out, graph) < num_vertices(graph));
 
       edge_props& c = graph[*out];
-      result |= c.conn->work(*this, *out, work_chunk_size);
+      bool input_result = c.conn->work(*this, *out, work_chunk_size);
+      // midi does not show up in the work buffer, but wakes up the plugin
+      if (input_result && c.conn->type == connection_type_midi)
+	m.sleep_silence = 0;
+      result |= input_result;
     }
 
     // process audio:
@@ -1239,17 +1339,34 @@ namespace zzub {
 	flags = zzub::process_mode_write;
     }
 
-    memcpy(&mix_buffer[0].front(), &m.work_buffer[0].front(), sample_count * sizeof(float));
-    memcpy(&mix_buffer[1].front(), &m.work_buffer[1].front(), sample_count * sizeof(float));
+    memcpy(&scratch[0].front(), &m.work_buffer[0].front(), sample_count * sizeof(float));
+    memcpy(&scratch[1].front(), &m.work_buffer[1].front(), sample_count * sizeof(float));
 
-    float *plin[] = { &mix_buffer[0].front(), &mix_buffer[1].front() };
+    float *plin[] = { &scratch[0].front(), &scratch[1].front() };
     float *plout[] = { &m.work_buffer[0].front(), &m.work_buffer[1].front() };
 
+    // effects sleep after their input and output have been silent for
+    // sleep_tail ms, and wake up on signal, midi or parameter changes.
+    bool can_sleep = sleep_tail > 0 && plugin_id != 0 &&
+      (m.info->flags & zzub_plugin_flag_has_audio_input) != 0 &&
+      (m.info->flags & zzub_plugin_flag_has_audio_output) != 0 &&
+      (m.info->flags & zzub::plugin_flag_does_input_mixing) == 0;
+    bool input_silent = (flags & zzub::process_mode_read) == 0;
+    if (!input_silent) m.sleep_silence = 0;
+    bool sleeping = can_sleep && input_silent &&
+      m.sleep_silence >= (int)((double)sleep_tail * master_info.samples_per_second / 1000.0);
+    if (sleeping != m.is_sleeping) {
+      if (sleeping) m.sleep_count++;
+      m.is_sleeping = sleeping;
+    }
+
     if (m.is_muted || m.sequencer_state == sequencer_event_type_mute) {
       m.last_work_audio_result = false;
     } else
       if (m.is_bypassed || m.sequencer_state == sequencer_event_type_thru) {
 	m.last_work_audio_result = result;
+      } else if (sleeping) {
+	m.last_work_audio_result = false;
       } else {
 	SETABRPUN(); // turn on flush-to-zero for SSE machines
 	m.last_work_audio_result = m.plugin->process_stereo(plin, plout, sample_count, flags);
@@ -1268,17 +1385,24 @@ namespace zzub {
 
     float samplerate = float(master_info.samples_per_second);
     float falloff = std::pow(10.0f, (-48.0f / (samplerate * 20.0f))); // vu meter falloff (-48dB/s)
+    bool output_silent = true;
     if (m.last_work_audio_result) {
       if (scanPeakStereo(&m.work_buffer[0].front(), &m.work_buffer[1].front(), sample_count, 
 			 m.last_work_max_left, m.last_work_max_right, falloff)) {
 	// the plugin claims it has generated non-silence, but our scan says otherwise
 	m.writemode_errors++;
-      }
+      } else
+	output_silent = false;
     } else {
       m.last_work_max_left *= std::pow(falloff, sample_count);
       m.last_work_max_right *= std::pow(falloff, sample_count);
     }
 
+    if (can_sleep && input_silent && output_silent) {
+      if (!sleeping) m.sleep_silence += sample_count;
+    } else
+      m.sleep_silence = 0;
+
     // write recorded parameters to patterns
     if (is_recording_parameters) {
       int pattern_index, pattern_row;
@@ -110,6 +110,9 @@ namespace zzub {
     int cpu_load_buffersize;
     double cpu_load;
     int writemode_errors;
+    int sleep_silence;								// samples of silent input and output
+    bool is_sleeping;
+    int sleep_count;								// times the plugin was put to sleep
 
     int midi_input_channel;
     vector<midi_message> midi_messages;
@@ -190,9 +193,13 @@ namespace zzub {
     player_state state;
     vector<metaplugin*> plugins;
     vector<plugin_descriptor> work_order;
+    vector<bool> unreachable;						// per vertex, output reaches no master or sink
     vector<event_message> user_event_queue;
     unsigned int user_event_queue_read, user_event_queue_write;
+    volatile int user_event_lock;				// spinlock for writers on parallel audio threads
     int enable_event_queue;
+    int user_event_fd;				// write end of the wakeup pipe, or -1
+    volatile int user_event_signaled;		// a wakeup byte is pending in the pipe
     vector<midimapping> midi_mappings;
     vector<sequencer_track> sequencer_tracks;
     wave_table wavetable;
@@ -212,6 +219,7 @@ namespace zzub {
     plugin_descriptor get_plugin_by_id(int id);
     void process_plugin_events(int plugin_id);
     void make_work_order();
+    void find_unreachable_plugins();
     int get_plugin_parameter_track_row_bytesize(int plugin_id, int g, int t);
     void transfer_plugin_parameter_track_row(int plugin_id, int g, int t, const pattern& from_pattern, void* param_ptr, int row, bool copy_all);
     void transfer_plugin_parameter_row(int plugin_id, int g, const pattern& from_pattern, pattern& target_pattern, int from_row, int target_row, bool copy_all);
@@ -248,9 +256,10 @@ namespace zzub {
     int plugin_get_parameter_direct(int plugin_id, int group, int track, int column);
     void plugin_set_parameter_direct(int plugin_id, int group, int track, int column, int value, bool record);
     zzub::info* create_dummy_info(int flags, string pluginUri, int attributes, int globalValues, int trackValues, parameter* params);
-    void invoke_plugin_parameter_changes(int plugin_id);
-    void invoke_plugin_parameter_changes(int plugin_id, int g);
+    bool invoke_plugin_parameter_changes(int plugin_id);
+    bool invoke_plugin_parameter_changes(int plugin_id, int g);
     bool plugin_invoke_event(int plugin_id, zzub_event_data data, bool immediate = false);
+    void signal_user_event_queue();
 
     // plugin methods
     string plugin_describe_parameter(plugin_descriptor plugindesc, int group, int track, int column);
@@ -288,6 +297,8 @@ namespace zzub {
     master_plugin_info master_plugininfo;
     plugin_descriptor solo_plugin;
     vector<vector<float> > mix_buffer;
+    plugin_scheduler scheduler;
+    int sleep_tail;									// ms of silence before effects sleep, 0 = never
     float* inputBuffer[audiodriver::MAX_CHANNELS];
     float* outputBuffer[audiodriver::MAX_CHANNELS];
 
@@ -301,6 +312,7 @@ namespace zzub {
     // processing methods
     int generate_audio(int sample_count);
     void work_plugin(plugin_descriptor plugindesc, int sample_count);
+    void work_plugin(plugin_descriptor plugindesc, int sample_count, vector<vector<float> >& scratch);
     void process_sequencer_events(plugin_descriptor plugindesc);
     int determine_chunk_size(int sample_count, double& tick_fracs, int& next_tick_position);
     void process_sequencer_events();
@@ -407,8 +407,10 @@ namespace zzub {
     if (!backbuffer_flags.copy_wavetable && flags.copy_wavetable)
       back.wavetable = front.wavetable;
 
-    if (!backbuffer_flags.copy_work_order && flags.copy_work_order)
+    if (!backbuffer_flags.copy_work_order && flags.copy_work_order) {
       back.work_order = front.work_order;
+      back.unreachable = front.unreachable;
+    }
 
     // if player_flags_copy_plugins_deep is set we generate flags to copy all the plugins
     if (!backbuffer_flags.copy_plugins_deep && flags.copy_plugins_deep) {
@@ -537,8 +539,10 @@ namespace zzub {
       front.wavetable.waves.swap(song.wavetable.waves);
     }
 
-    if (flags.copy_work_order)
+    if (flags.copy_work_order) {
       front.work_order.swap(song.work_order);
+      front.unreachable.swap(song.unreachable);
+    }
   }
 
   void undo_manager::clear_swap_song(zzub::song& song, const operation_copy_flags& flags) {
@@ -35,6 +35,7 @@ namespace zzub {
     player* _player;
     int wave;
     int level;
+    std::vector<char> locked_samples; // sample data as it was at lock time
 
     wavelevel_proxy(player* _playr, int _wave, int _level)
       :_player(_playr), wave(_wave), level(_level) { }
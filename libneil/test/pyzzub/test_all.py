@@ -157,6 +157,69 @@ class Test(TestCase):
 			('zzub_player_state_changed', dict(player_state=zzub_player_state_stopped)),
 		])
 		
+	def test_event_fd(self):
+		"""
+		the event descriptor must become readable when events are queued,
+		and be reset by handle_events.
+		"""
+		import select
+		fd = self.player.get_event_fd()
+		self.assertTrue(fd != -1)
+		self.assertTrue(fd == self.player.get_event_fd())
+		self._handle_events()
+		self.assertFalse(select.select([fd], [], [], 0)[0])
+		data = EventData()
+		data.type = zzub_event_type_double_click
+		master = self.player.get_plugin_by_id(0)
+		master.invoke_event(data, 0)
+		master.invoke_event(data, 0)
+		self.assertTrue(select.select([fd], [], [], 0)[0])
+		self._handle_events()
+		self.assertFalse(select.select([fd], [], [], 0)[0])
+		
+	def test_thread_count(self):
+		"""
+		the graph is processed serially by default, 0 picks one thread per cpu.
+		"""
+		self.assertTrue(self.player.get_thread_count() == 1)
+		self.player.set_thread_count(2)
+		self.assertTrue(self.player.get_thread_count() == 2)
+		self.player.set_thread_count(0)
+		self.assertTrue(self.player.get_thread_count() >= 1)
+		self.player.set_thread_count(1)
+		self.assertTrue(self.player.get_thread_count() == 1)
+		
+	def test_sleep_tail(self):
+		"""
+		effects never sleep by default, and master never sleeps.
+		"""
+		self.assertTrue(self.player.get_sleep_tail() == 0)
+		self.player.set_sleep_tail(500)
+		self.assertTrue(self.player.get_sleep_tail() == 500)
+		self.player.set_sleep_tail(-1)
+		self.assertTrue(self.player.get_sleep_tail() == 0)
+		master = self.player.get_plugin_by_id(0)
+		self.assertFalse(master.is_sleeping())
+		self.assertTrue(master.get_sleep_count() == 0)
+		
+	def test_unreachable(self):
+		"""
+		the master always reaches itself, an effect only once connected to it.
+		connecting and undoing update the work order.
+		"""
+		master = self.player.get_plugin_by_id(0)
+		self.assertFalse(master.is_unreachable())
+		pluginloader = self.player.get_pluginloader_by_name('@libneil/arguru/effect/distortion')
+		self.assertTrue(pluginloader)
+		plugin = self.player.create_plugin(None, 0, "effect", pluginloader)
+		self.player.history_commit("create plugin")
+		self.assertTrue(plugin.is_unreachable())
+		master.add_input(plugin, zzub_connection_type_audio)
+		self.player.history_commit("connect")
+		self.assertFalse(plugin.is_unreachable())
+		self.player.undo()
+		self.assertTrue(plugin.is_unreachable())
+		
 	def test_undo(self):
 		"""
 		create plugin, connect to master, disconnect, then undo/redo/undo until the beginning.
@@ -294,6 +357,47 @@ class Test(TestCase):
 		self.player.undo()
 		self._handle_events()
 		
+	def test_pattern_block(self):
+		"""
+		write a block of pattern values in one call, read it back in one call
+		and compare against single value access. then undo the block write.
+		"""
+		import array
+		pluginloader = self.player.get_pluginloader_by_name('@krzysztof_foltman/generator/infector;1')
+		self.assertTrue(pluginloader)
+		plugin = self.player.create_plugin(None, 0, "test", pluginloader)
+		plugin.set_track_count(2)
+		pattern = plugin.create_pattern(16)
+		plugin.add_pattern(pattern)
+		self.player.history_commit("create plugin")
+		columns = plugin.get_parameter_count(2, 0)
+		self.assertTrue(columns >= 2)
+		values = array.array('i', [0]) * (2 * 2 * 4)
+		self.assertTrue(plugin.get_pattern_values(0, 2, 0, 2, 0, 2, 4, 4, values, len(values)) == len(values))
+		for t in range(2):
+			for c in range(2):
+				for r in range(4):
+					self.assertTrue(values[(t * 2 + c) * 4 + r] == plugin.get_pattern_value(0, 2, t, c, 4 + r))
+		param = plugin.get_parameter(2, 0, 1)
+		values[(1 * 2 + 1) * 4 + 2] = param.get_value_min()
+		plugin.set_pattern_values(0, 2, 0, 2, 0, 2, 4, 4, values, len(values))
+		self.player.history_commit("block write")
+		self.assertTrue(plugin.get_pattern_value(0, 2, 1, 1, 6) == param.get_value_min())
+		self.player.undo()
+		self.assertTrue(plugin.get_pattern_value(0, 2, 1, 1, 6) == param.get_value_none())
+
+	def test_wrapper_interning(self):
+		"""
+		the same handle must always map to the same wrapper object.
+		"""
+		master = self.player.get_plugin_by_id(0)
+		self.assertTrue(master is self.player.get_plugin(0))
+		self.assertTrue(master is self.player.get_plugin_by_id(0))
+		pattern = master.create_pattern(16)
+		handle = pattern._hash
+		pattern.destroy()
+		self.assertTrue(handle not in zzub.Pattern._instances)
+
 	def test_enumerate_plugin(self):
 		self.assertTrue(self.player.history_get_uncomitted_operations() == 0)
 		self.assertTrue(self.player.get_plugin_count() == 1)
@@ -543,6 +543,48 @@ class NeilConfig(configparser.ConfigParser):
         self.write_int_value('BufferSize',buffersize)
         self.flush()
 
+    def get_audiodriver_threads(self):
+        """
+        Returns the number of threads processing the plugin graph.
+
+        @return: Thread count, 0 for one thread per CPU.
+        @rtype: int
+        """
+        self.set_section('AudioDevice')
+        return self.read_int_value('Threads', 1)
+
+    def set_audiodriver_threads(self, threads):
+        """
+        Stores the number of threads processing the plugin graph.
+
+        @param threads: Thread count, 0 for one thread per CPU.
+        @type threads: int
+        """
+        self.set_section('AudioDevice')
+        self.write_int_value('Threads', threads)
+        self.flush()
+
+    def get_audiodriver_sleep_tail(self):
+        """
+        Returns how long effects must be silent before they are put to sleep.
+
+        @return: Tail length in milliseconds, 0 if effects never sleep.
+        @rtype: int
+        """
+        self.set_section('AudioDevice')
+        return self.read_int_value('SleepTail', 1000)
+
+    def set_audiodriver_sleep_tail(self, ms):
+        """
+        Stores how long effects must be silent before they are put to sleep.
+
+        @param ms: Tail length in milliseconds, 0 if effects never sleep.
+        @type ms: int
+        """
+        self.set_section('AudioDevice')
+        self.write_int_value('SleepTail', ms)
+        self.flush()
+
     def get_mididriver_outputs(self):
         """
         Returns the current list of MIDI output driver names.
@@ -27,6 +27,7 @@ selected, items can choose to append themselves or not.
 
 from gi.repository import Gtk
 import neil.common as common
+import neil.layout as layout
 from neil.com import com
 import zzub
 import os.path
@@ -296,6 +297,9 @@ class PluginContextMenu(Gtk.Menu):
         self.create_add_machine_submenu(menu)
         menu.add_separator()
         menu.add_item("Unmute All", self.on_popup_unmute_all)
+        menu.add_separator()
+        menu.add_item("Arrange Machines", self.on_popup_arrange, False)
+        menu.add_item("Arrange Machines Loosely", self.on_popup_arrange, True)
 
     def populate_connectionmenu(self, menu):
         mp, index = menu.context
@@ -478,9 +482,18 @@ class PluginContextMenu(Gtk.Menu):
         for mp in reversed(list(player.get_plugin_list())):
             info = common.get_plugin_infos().get(mp)
             info.muted = False
-            mp.set_mute(info.muted)
+            mp.set_mute(info.muted or bool(info.frozen))
             info.reset_plugingfx()
 
+    def on_popup_arrange(self, widget, refine):
+        """
+        Event handler for the arrange machines menu options
+        """
+        player = com.get('neil.core.player')
+        plugins = [mp for mp in player.get_plugin_list() if common.get_plugin_infos().get(mp).songplugin]
+        box = com.get('neil.core.router.view').get_plugin_box()
+        layout.arrange(player, plugins, refine, box)
+
     def on_popup_command(self, widget, plugin, subindex, index):
         """
         Event handler for plugin commands
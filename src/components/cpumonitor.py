@@ -59,7 +59,7 @@ class CPUMonitorDialog(Gtk.Dialog):
 		self.connect('delete-event', self.hide_on_delete)
 		self.set_size_request(200,300)
 		self.set_title("CPU Monitor")
-		self.pluginlist = Gtk.ListStore(str, str)
+		self.pluginlist = Gtk.ListStore(str, str, str)
 		scrollwin = Gtk.ScrolledWindow()
 		scrollwin.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
 		self.pluginlistview = Gtk.TreeView(self.pluginlist)
@@ -67,17 +67,23 @@ class CPUMonitorDialog(Gtk.Dialog):
 		self.tvplugin = Gtk.TreeViewColumn("Plugin")
 		self.tvplugin.set_resizable(True)
 		self.tvload = Gtk.TreeViewColumn("CPU Load")
+		self.tvsleep = Gtk.TreeViewColumn("Sleeps")
 		self.cellplugin = Gtk.CellRendererText()
 		self.cellload = Gtk.CellRendererText()
+		self.cellsleep = Gtk.CellRendererText()
 		self.tvplugin.pack_start(self.cellplugin, expand=True)
 		self.tvload.pack_start(self.cellload, expand=True)
+		self.tvsleep.pack_start(self.cellsleep, expand=True)
 		self.tvplugin.add_attribute(self.cellplugin, 'text', 0)
 		self.tvload.add_attribute(self.cellload, 'text', 1)
+		self.tvsleep.add_attribute(self.cellsleep, 'text', 2)
 		self.pluginlistview.append_column(self.tvplugin)
 		self.pluginlistview.append_column(self.tvload)
+		self.pluginlistview.append_column(self.tvsleep)
 		self.pluginlistview.set_search_column(0)
 		self.tvplugin.set_sort_column_id(0)
 		self.tvload.set_sort_column_id(1)
+		self.tvsleep.set_sort_column_id(2)
 		self.labeltotal = Gtk.Label("100%")
 		self.gaugetotal = Gtk.ProgressBar()
 		sizer = Gtk.VBox(False, MARGIN)
@@ -101,7 +107,7 @@ class CPUMonitorDialog(Gtk.Dialog):
 			cpu_loads = {}
 			cpu = driver.get_cpu_load()
 			for mp in player.get_plugin_list():
-				cpu_loads[mp.get_name()] = mp.get_last_cpu_load()
+				cpu_loads[mp.get_name()] = mp.get_last_cpu_load(), mp.is_sleeping(), mp.get_sleep_count()
 			self.gaugetotal.set_fraction(cpu)
 			self.labeltotal.set_label("%i%%" % int((cpu*100) + 0.5))
 			
@@ -113,8 +119,7 @@ class CPUMonitorDialog(Gtk.Dialog):
 				ref = Gtk.TreeRowReference(store, store.get_path(item))
 				name = self.pluginlist.get_value(item, 0)
 				if name in cpu_loads:
-					relperc = cpu_loads[name] * 100.0
-					un.newvalues[ref] = "%.1f%%" % relperc
+					un.newvalues[ref] = self.format_load(*cpu_loads[name])
 					del cpu_loads[name]
 				else:
 					un.to_delete.append(ref)
@@ -125,18 +130,35 @@ class CPUMonitorDialog(Gtk.Dialog):
 				if ref.valid():
 					path = ref.get_path()
 					self.pluginlist.remove(self.pluginlist.get_iter(path))
-			for ref,value in un.newvalues.iteritems():
+			for ref,(load,sleeps) in un.newvalues.items():
 				if ref.valid():
 					path = ref.get_path()
-					self.pluginlist.set_value(self.pluginlist.get_iter(path), 1, value)
+					self.pluginlist.set_value(self.pluginlist.get_iter(path), 1, load)
+					self.pluginlist.set_value(self.pluginlist.get_iter(path), 2, sleeps)
 				
-			for k,v in cpu_loads.iteritems():
+			for k,v in cpu_loads.items():
 				k = prepstr(k)
-				relperc = v * 100.0
-				self.pluginlist.append([k, "%.1f%%" % relperc])
+				self.pluginlist.append([k] + list(self.format_load(*v)))
 			self.pluginlistview.columns_autosize()
 		return True
 
+	def format_load(self, load, sleeping, sleep_count):
+		"""
+		Returns the CPU load and sleep columns of a plugin.
+
+		@param load: CPU load of the plugin from 0 to 1.
+		@type load: float
+		@param sleeping: True if the plugin is currently asleep.
+		@type sleeping: bool
+		@param sleep_count: How many times the plugin went to sleep.
+		@type sleep_count: int
+		@return: Tuple of load and sleep column text.
+		@rtype: (str, str)
+		"""
+		if sleeping:
+			return "asleep", "%i" % sleep_count
+		return "%.1f%%" % (load * 100.0), "%i" % sleep_count
+
 __all__ = [
 'CPUMonitorDialog',
 ]
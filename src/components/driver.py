@@ -192,6 +192,8 @@ class AudioDriver:
         if initres != 0:
             raise self.AudioInitException
         self.driver.enable(1)
+        player.set_thread_count(config.get_config().get_audiodriver_threads())
+        player.set_sleep_tail(config.get_config().get_audiodriver_sleep_tail())
         self.samplerate = samplerate
         self.buffersize = buffersize
         self.enabled = True
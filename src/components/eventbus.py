@@ -70,6 +70,8 @@ EVENTS = [
     # (path, ...) called when player.document_path changes.
     'document_path_changed',
     'document_loaded',  # (...) called when load_* is called.
+    # (position, ...) called when the play position of the song changes.
+    'play_position_changed',
 
     # libzzub events, translation is done in player.py
     # note that these events shall never be called from the application
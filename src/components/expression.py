@@ -5,6 +5,7 @@ import pickle
 import neil.com as com
 from neil.utils import roundint, bn2mn, mn2bn, new_stock_image_button
 from neil.utils import gettext, error
+from neil.utils import get_pattern_block, set_pattern_block
 from random import *
 from math import *
 from neil.gtkcodebuffer import CodeBuffer, SyntaxLoader, add_syntax_path
@@ -145,12 +146,25 @@ class Expression():
             else:
                 return
             try:
+                # the script works on whole tracks fetched in bulk; tracks
+                # it wrote to are sent back to the pattern in one go.
+                rows = plugin.get_pattern_length(pattern)
+                tracks = {}
+                dirty = set()
+                def get_track(group, track):
+                    key = (group, track)
+                    if key not in tracks:
+                        columns = plugin.get_parameter_count(group, track)
+                        tracks[key] = (columns, get_pattern_block(
+                                plugin, pattern, group, track, 1, 0, columns, 0, rows))
+                    return tracks[key]
                 def get_value(group, track, index, row):
-                    return plugin.get_pattern_value(pattern, group, 
-                                                    track, index, row)
+                    columns, values = get_track(group, track)
+                    return values[index * rows + row]
                 def set_value(group, track, index, row, value):
-                    plugin.set_pattern_value(pattern, group, track, 
-                                             index, row, value)
+                    columns, values = get_track(group, track)
+                    values[index * rows + row] = value
+                    dirty.add((group, track))
                 def get_param(group, track, index):
                     return plugin.get_parameter(group, track, index)
                 global_ = globals()
@@ -162,9 +176,13 @@ class Expression():
                     'get_value' : get_value,
                     'set_value' : set_value,
                     'get_param' : get_param,
-                    'n' : plugin.get_pattern_length(pattern),
+                    'n' : rows,
                     }
-                exec(expr in new_global)
+                exec(expr, new_global)
+                for group, track in dirty:
+                    columns, values = tracks[(group, track)]
+                    set_pattern_block(plugin, pattern, group, track, 1,
+                                      0, columns, 0, rows, values)
             except Exception as e:
                 error(self.dialog, "There was a problem with your expression!", details=str(e))
 
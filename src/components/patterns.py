@@ -31,10 +31,12 @@ if __name__ == '__main__':
 import neil.com as com
 from gi.repository import Gtk
 from gi.repository import Gdk
-from gi.repository import GObject
 from gi.repository import Pango
 from gi.repository import PangoCairo
 import cairo
+import array
+import collections
+import math
 
 from neil.utils import prepstr
 from neil.utils import get_clipboard_text, set_clipboard_text
@@ -42,6 +44,8 @@ from neil.utils import error, get_new_pattern_name
 from neil.utils import Menu, AcceleratorMap
 from neil.utils import new_stock_image_button, show_machine_manual
 from neil.utils import filenameify
+from neil.utils import get_pattern_block, set_pattern_block, set_pattern_cells
+from neil.utils import get_parameter_formatter, PlayheadOverlay
 
 import zzub
 import neil.common as common
@@ -616,6 +620,137 @@ def get_subindexcount_from_param(p):
 def get_subindexoffsets_from_param(p):
     return t2siofs[p.get_type()]
 
+
+class PatternTextCache:
+    """
+    Formatted text of the rows of a pattern, one line per row and track.
+
+    Rows are only formatted once they are drawn. Lines are filled in
+    blocks of BLOCK_ROWS, together with PREFETCH_BLOCKS blocks before and
+    after the rows asked for, so scrolling rarely has to wait for
+    formatting. Once more than MAX_BLOCKS blocks are held, the least
+    recently used ones are dropped again.
+    """
+    BLOCK_ROWS = 32
+    PREFETCH_BLOCKS = 1
+    MAX_BLOCKS = 512
+
+    def __init__(self, plugin, pattern, row_count, group_track_count, parameter_count):
+        self.plugin = plugin
+        self.pattern = pattern
+        self.row_count = row_count
+        self.group_track_count = group_track_count
+        self.parameter_count = parameter_count
+        self.formatters = [[get_parameter_formatter(plugin, g, 0, i) for i in range(parameter_count[g])]
+                           for g in range(3)]
+        self.lines = [[[None] * row_count for t in range(group_track_count[g])]
+                      for g in range(3)]
+        # (group, track, block) keys, least recently used first
+        self.blocks = collections.OrderedDict()
+
+    def has_group(self, group):
+        """
+        Returns True if the group has parameters and tracks to show.
+        """
+        return bool(self.parameter_count[group] and self.lines[group])
+
+    def format_rows(self, group, track, row, rows):
+        """
+        Formats a range of rows of a track with a single read from the
+        pattern.
+        """
+        count = self.parameter_count[group]
+        values = get_pattern_block(self.plugin, self.pattern, group, track, 1, 0, count, row, rows)
+        cols = [formatter.format_values(values[i * rows:(i + 1) * rows])
+                for i, formatter in enumerate(self.formatters[group])]
+        lines = self.lines[group][track]
+        for r in range(rows):
+            lines[row + r] = ' '.join([col[r] for col in cols])
+
+    def fill_block(self, group, track, block):
+        lines = self.lines[group][track]
+        begin = block * self.BLOCK_ROWS
+        end = min(begin + self.BLOCK_ROWS, self.row_count)
+        missing = [r for r in range(begin, end) if lines[r] is None]
+        if missing:
+            self.format_rows(group, track, missing[0], missing[-1] - missing[0] + 1)
+        key = (group, track, block)
+        if key in self.blocks:
+            self.blocks.move_to_end(key)
+        else:
+            self.blocks[key] = True
+            while len(self.blocks) > self.MAX_BLOCKS:
+                (g, t, b), _ = self.blocks.popitem(last=False)
+                self.drop_block(g, t, b)
+
+    def drop_block(self, group, track, block):
+        lines = self.lines[group][track]
+        begin = block * self.BLOCK_ROWS
+        end = min(begin + self.BLOCK_ROWS, self.row_count)
+        lines[begin:end] = [None] * (end - begin)
+
+    def get_rows(self, group, track, row, rows):
+        """
+        Returns the formatted lines of a range of rows of a track.
+
+        @return: One string per row.
+        @rtype: [str, ...]
+        """
+        if rows <= 0:
+            return []
+        first = max(row // self.BLOCK_ROWS - self.PREFETCH_BLOCKS, 0)
+        last = min((row + rows - 1) // self.BLOCK_ROWS + self.PREFETCH_BLOCKS,
+                   (self.row_count - 1) // self.BLOCK_ROWS)
+        for block in range(first, last + 1):
+            self.fill_block(group, track, block)
+        return self.lines[group][track][row:row + rows]
+
+    def update_cell(self, group, track, row):
+        """
+        Reformats the line of a track at a row, if it has been formatted.
+        """
+        try:
+            if self.lines[group][track][row] is not None:
+                self.format_rows(group, track, row, 1)
+        except IndexError:
+            pass
+
+    def update_row(self, row):
+        """
+        Reformats the lines of all tracks at a row.
+        """
+        for g in range(3):
+            if self.has_group(g):
+                for t in range(self.group_track_count[g]):
+                    self.update_cell(g, t, row)
+
+    def shift_rows(self, row, rows, columns):
+        """
+        Follows rows being inserted (rows > 0) or removed (rows < 0) at a
+        row. Tracks whose columns all moved keep their lines; the lines
+        of other tracks are reformatted from the row on.
+
+        @param columns: Flat list of (group, track, column) triples of the
+        columns which moved, as found in pattern_insert_rows events.
+        @type columns: [int, ...]
+        """
+        moved = {}
+        for i in range(0, len(columns) - 2, 3):
+            moved.setdefault((columns[i], columns[i + 1]), set()).add(columns[i + 2])
+        for (group, track), cols in moved.items():
+            try:
+                lines = self.lines[group][track]
+            except IndexError:
+                continue
+            if len(cols) < self.parameter_count[group]:
+                lines[row:] = [None] * len(lines[row:])
+            elif rows > 0:
+                lines[row:row] = [None] * rows
+                del lines[self.row_count:]
+            else:
+                del lines[row:row - rows]
+                lines.extend([None] * (self.row_count - len(lines)))
+
 # selection modes: column, track, tracks, all
 SEL_COLUMN = 0
 SEL_TRACK = 1
@@ -629,6 +764,8 @@ class PatternView(Gtk.DrawingArea):
     Pattern viewer class.
     """
     CLIPBOARD_MAGIC = "PATTERNDATA"
+    TILE_ROWS = PatternTextCache.BLOCK_ROWS
+    MAX_TILES = 256
 
     class Selection:
         """
@@ -678,6 +815,9 @@ class PatternView(Gtk.DrawingArea):
         self.factors = None
         self.play_notes = True
         self.current_plugin = ""
+        # rendered rows by (group, track, block), least recently used first
+        self.tiles = collections.OrderedDict()
+        self.tilekey = None
         Gtk.DrawingArea.__init__(self)
         # "Bitstream Vera Sans Mono"
         self.update_font()
@@ -735,7 +875,7 @@ class PatternView(Gtk.DrawingArea):
         self.connect('button-release-event', self.on_button_up)
         self.connect('motion-notify-event', self.on_motion)
         self.connect('scroll-event', self.on_mousewheel)
-        GObject.timeout_add(100, self.update_position)
+        self.playhead = PlayheadOverlay(self)
         self.hscroll.connect('change-value', self.on_hscroll_window)
         self.vscroll.connect('change-value', self.on_vscroll_window)
         eventbus = com.get('neil.core.eventbus')
@@ -747,6 +887,7 @@ class PatternView(Gtk.DrawingArea):
         eventbus.zzub_pattern_remove_rows += self.on_pattern_remove_rows
         eventbus.zzub_parameter_changed += self.on_zzub_parameter_changed
         eventbus.document_loaded += self.update_all
+        eventbus.play_position_changed += self.on_play_position_changed
         self.pattern_changed()
 
     def on_zzub_parameter_changed(self, plugin, group, track, param, value):
@@ -757,17 +898,33 @@ class PatternView(Gtk.DrawingArea):
         pass
 
     def on_pattern_insert_rows(self, plugin, index, row, rows, column_indices, indices):
-        self.on_pattern_changed(plugin, index)
+        self.shift_rows(plugin, index, row, rows, column_indices, indices)
 
     def on_pattern_remove_rows(self, plugin, index, row, rows, column_indices, indices):
-        self.on_pattern_changed(plugin, index)
+        self.shift_rows(plugin, index, row, -rows, column_indices, indices)
+
+    def shift_rows(self, plugin, index, row, rows, column_indices, indices):
+        if plugin != self.plugin:
+            return
+        if index != self.pattern:
+            return
+        if not self.textcache or not column_indices:
+            self.pattern_changed()
+            return
+        columns = [column_indices[i] for i in range(indices)]
+        self.textcache.shift_rows(row, rows, columns)
+        for group, track in set(zip(columns[0::3], columns[1::3])):
+            self.invalidate_tiles(group, track)
+        self.redraw()
 
     def on_edit_pattern(self, plugin, index, group, track, column, row, value):
         if plugin != self.plugin:
             return
         if index != self.pattern:
             return
-        self.update_line(row)
+        if self.textcache:
+            self.textcache.update_cell(group, track, row)
+        self.invalidate_tiles(group, track, row)
         self.redraw()
 
     def on_pattern_changed(self, plugin, index):
@@ -887,27 +1044,21 @@ class PatternView(Gtk.DrawingArea):
         menu.popup(self, event)
 
     def on_pattern_effect(self, item, effect):
-        values = {}
-        for row, group, track, index in self.selection_range():
-            value = self.plugin.get_pattern_value(self.pattern, group,
-                                                  track, index, row)
-            try:
-                values[(group, track, index)] = (values[(group, track, index)] +
-                                                 [(row, value)])
-            except KeyError:
-                values[(group, track, index)] = [(row, value)]
-        for key in values.iterkeys():
-            group = key[0]
-            track = key[1]
-            index = key[2]
-            param = self.plugin.get_parameter(group, track, index)
-            output = effect.transform([value[1] for value in values[key]],
-                                      param)
-            for (row, value), i in zip(values[key], range(len(output))):
-                self.plugin.set_pattern_value(self.pattern, group, track, index,
-                                              row, output[i])
-            player = com.get('neil.core.player')
-            player.history_commit('pattern effect')
+        for block in self.selection_blocks():
+            group, track, tracks, index, indices, row, rows = block
+            values = get_pattern_block(self.plugin, self.pattern, *block)
+            for t in range(tracks):
+                for i in range(indices):
+                    param = self.plugin.get_parameter(group, track + t, index + i)
+                    offset = (t * indices + i) * rows
+                    output = effect.transform(list(values[offset:offset + rows]),
+                                              param)
+                    for r in range(min(rows, len(output))):
+                        values[offset + r] = output[r]
+            set_pattern_block(self.plugin, self.pattern, group, track, tracks,
+                              index, indices, row, rows, values)
+        player = com.get('neil.core.player')
+        player.history_commit('pattern effect')
 
     def on_expression(self, item):
         expression = com.get('neil.core.expression')
@@ -915,21 +1066,13 @@ class PatternView(Gtk.DrawingArea):
         player = com.get('neil.core.player')
         player.history_commit('expression applied')
 
-    def update_position(self):
+    def on_play_position_changed(self, playpos):
         """
-        Updates the position.
+        Moves the play cursor, repainting only the rows it passes.
         """
-        # TODO: find some other means to find out visibility
-#               if self.rootwindow.get_current_panel() != self.panel:
-#                       return True
-        player = com.get('neil.core.player')
-        playpos = player.get_position()
-        if self.playpos != playpos:
-            self.playpos = playpos
-            # This used to just draw the play position, but we can't do that anymore because we don't
-            # have access to the cairo context. We might need to tweak this to improve performance, though.
-            self.redraw()
-        return True
+        self.playpos = playpos
+        if self.get_parent_window():
+            self.playhead.move(self.get_playpos_rect())
 
     def get_new_pattern_name(self, m=None):
         """
@@ -949,7 +1092,7 @@ class PatternView(Gtk.DrawingArea):
         # parameter count
         self.parameter_count = [0, 0, 0]
         self.parameter_width = [[], [], []]
-        self.lines = None
+        self.textcache = None
         self.levels = {}
         self.factor_sources = {}
         self.row_count = 0
@@ -1160,6 +1303,7 @@ class PatternView(Gtk.DrawingArea):
 
     def redraw(self, *args):
         if self.get_parent_window():
+            self.playhead.invalidate()
             w, h = self.get_client_size()
             rect = Gdk.Rectangle()
             rect.x = 0
@@ -1373,6 +1517,71 @@ class PatternView(Gtk.DrawingArea):
                         for index in range(0, self.parameter_count[group]):
                             yield (row, group, track, index)
 
+    def selection_blocks(self):
+        """
+        Describes the current selection as rectangular blocks, one per
+        group, clipped to the pattern length. Each block can be passed
+        to get_pattern_block() and set_pattern_block().
+
+        @return: List of (group, track, tracks, index, indices, row, rows)
+        @rtype: [(int, int, int, int, int, int, int), ...]
+        """
+        if not self.selection:
+            return [(self.group, self.track, 1, self.index, 1, self.row, 1)]
+        begin = max(self.selection.begin, 0)
+        end = min(self.selection.end, self.row_count)
+        if end <= begin:
+            return []
+        mode = self.selection.mode
+        if mode == SEL_COLUMN:
+            blocks = [(self.group, self.track, 1, self.index, 1)]
+        elif mode == SEL_TRACK:
+            blocks = [(self.group, self.track, 1,
+                       0, self.parameter_count[self.group])]
+        elif mode == SEL_GROUP:
+            blocks = [(self.group, 0, self.group_track_count[self.group],
+                       0, self.parameter_count[self.group])]
+        else:
+            blocks = [(group, 0, self.group_track_count[group],
+                       0, self.parameter_count[group]) for group in range(3)]
+        return [block + (begin, end - begin) for block in blocks
+                if block[2] and block[4]]
+
+    def selection_values(self):
+        """
+        Iterator that moves through the current selection in the same
+        order as selection_range(), fetching the values in bulk.
+
+        @return: Tuple of the next position and its value (row, group, track, index, value)
+        @rtype: (int, int, int, int, int)
+        """
+        blocks = [(block, get_pattern_block(self.plugin, self.pattern, *block))
+                  for block in self.selection_blocks()]
+        if not blocks:
+            return
+        row, rows = blocks[0][0][5:]
+        for r in range(rows):
+            for (group, track, tracks, index, indices, _, _), values in blocks:
+                for t in range(tracks):
+                    for i in range(indices):
+                        yield (row + r, group, track + t, index + i,
+                               values[(t * indices + i) * rows + r])
+
+    def clear_selection_values(self):
+        """
+        Resets all values in the current selection to their none value.
+        """
+        for block in self.selection_blocks():
+            group, track, tracks, index, indices, row, rows = block
+            values = get_pattern_block(self.plugin, self.pattern, *block)
+            for t in range(tracks):
+                for i in range(indices):
+                    none = self.plugin.get_parameter(group, track + t, index + i).get_value_none()
+                    offset = (t * indices + i) * rows
+                    values[offset:offset + rows] = array.array('i', [none]) * rows
+            set_pattern_block(self.plugin, self.pattern, group, track, tracks,
+                              index, indices, row, rows, values)
+
     def pattern_range(self):
         """
         Iterator that moves through the entire pattern.
@@ -1391,17 +1600,15 @@ class PatternView(Gtk.DrawingArea):
         """
         Reverse the current selection (retrograde).
         """
-        values = []
-        for row, group, track, index in self.selection_range():
-            value = self.plugin.get_pattern_value(self.pattern, group,
-                                                  track, index, row)
-            values.append([row, group, track, index, value])
-        rows = [entry[0] for entry in values]
-        rows.reverse()
-        values = [[row] + entry[1:] for (row, entry) in zip(rows, values)]
-        for row, group, track, index, value in values:
-            self.plugin.set_pattern_value(self.pattern, group, track,
-                                          index, row, value)
+        for block in self.selection_blocks():
+            group, track, tracks, index, indices, row, rows = block
+            values = get_pattern_block(self.plugin, self.pattern, *block)
+            for offset in range(0, len(values), rows):
+                column = values[offset:offset + rows]
+                column.reverse()
+                values[offset:offset + rows] = column
+            set_pattern_block(self.plugin, self.pattern, group, track, tracks,
+                              index, indices, row, rows, values)
         player = com.get('neil.core.player')
         player.history_commit("reverse")
 
@@ -1504,15 +1711,7 @@ class PatternView(Gtk.DrawingArea):
         self.copy()
         player = com.get('neil.core.player')
         #player.set_callback_state(False)
-        for r, g, t, i in self.selection_range():
-            if r > self.plugin.get_pattern_length(self.pattern) - 1:
-                break
-            if r < 0:
-                continue
-            p = self.plugin.get_parameter(g, t, i)
-            self.plugin.set_pattern_value(self.pattern, g, t, i, r,
-                                          p.get_value_none())
-        player = com.get('neil.core.player')
+        self.clear_selection_values()
         player.history_commit("remove event")
         # if player.set_callback_state(True):
         #     eventbus = com.get('neil.core.eventbus')
@@ -1526,12 +1725,8 @@ class PatternView(Gtk.DrawingArea):
             return
         data = self.CLIPBOARD_MAGIC
         data += "%01x" % self.selection.mode
-        for r, g, t, i in self.selection_range():
-            if r > self.plugin.get_pattern_length(self.pattern) - 1:
-                break
-            if r < 0:
-                continue
-            data += "%04x%01x%02x%02x%04x" % (r - self.selection.begin, g, t, i, self.plugin.get_pattern_value(self.pattern, g, t, i, r))
+        for r, g, t, i, v in self.selection_values():
+            data += "%04x%01x%02x%02x%04x" % (r - self.selection.begin, g, t, i, v)
         set_clipboard_text(data)
 
     def delete(self):
@@ -1540,14 +1735,7 @@ class PatternView(Gtk.DrawingArea):
         """
         player = com.get('neil.core.player')
         #player.set_callback_state(False)
-        for r, g, t, i in self.selection_range():
-            if r > self.plugin.get_pattern_length(self.pattern) - 1:
-                break
-            if r < 0:
-                continue
-            p = self.plugin.get_parameter(g, t, i)
-            self.plugin.set_pattern_value(self.pattern, g, t, i, r, p.get_value_none())
-        player = com.get('neil.core.player')
+        self.clear_selection_values()
         player.history_commit("delete events")
         # if player.set_callback_state(True):
         #     eventbus = com.get('neil.core.eventbus')
@@ -1584,9 +1772,10 @@ class PatternView(Gtk.DrawingArea):
         player = com.get('neil.core.player')
         #player.set_callback_state(False)
         data = get_clipboard_text()
+        cells = {}
         try:
             gen = self.unpack_clipboard_data(data.strip())
-            mode = gen.next()
+            mode = next(gen)
             assert (mode >= 0) and (mode <= SEL_ALL)
             for r, g, t, i, v in gen:
                 r = self.row + r
@@ -1616,7 +1805,8 @@ class PatternView(Gtk.DrawingArea):
                     elif ty == 2:  # byte
                         v = v & 0xFF  # mask out first 8 bytes
                         v = min(max(v, p.get_value_min()), p.get_value_max())  # make sure it is properly clamped
-                self.plugin.set_pattern_value(self.pattern, g, t, i, r, v)  # finally set it
+                cells[(r, g, t, i)] = v
+            set_pattern_cells(self.plugin, self.pattern, cells)  # finally set it
             #Non Buzz-like behaviour (naughty naughty!) ;)  :
             #self.set_row(r+1)
             self.update_statusbar()
@@ -2046,22 +2236,15 @@ class PatternView(Gtk.DrawingArea):
                 for i in range(self.plugin.get_parameter_count(self.group,
                                                                 self.track)):
                     indices += [self.group, self.track, i]
-                self.lines[self.group][self.track].insert(self.row + index, "")
-                self.update_line(self.row + index)
-            del self.lines[self.group][self.track][-1]
             self.plugin.insert_pattern_rows(self.pattern, indices,
                                             len(indices) / 3, self.row, 1)
             player.history_commit("insert row")
         elif k == 'Delete':
-            del self.lines[self.group][self.track][self.row:self.row +\
-                                                   1]
             indices = []
             for index in range(1):
-                self.lines[self.group][self.track].append('')
                 for i in range(self.plugin.get_parameter_count(self.group,
                                                                 self.track)):
                     indices += [self.group, self.track, i]
-                self.update_line(self.row_count - 1 + index - 1)
             self.plugin.remove_pattern_rows(self.pattern, indices,
                                             len(indices) / 3, self.row, 1)
             player.history_commit("remove row")
@@ -2462,15 +2645,15 @@ class PatternView(Gtk.DrawingArea):
             cr.set_source_rgba(1.0, 0.0, 0.0, 0.3)
             cr.fill()
 
-    def draw_playpos_xor(self, ctx):
-        if self.pattern == -1:
-            return
-        if not self.get_parent_window():
-            return
-        ctx.set_operator(cairo.Operator.XOR)
-        ctx.set_source_rgb(1, 1, 1)
+    def get_playpos_rect(self):
+        """
+        Returns the rectangle of the play cursor, or None if the current
+        pattern is not playing.
 
-        # draw play cursor
+        @rtype: (int, int, int, int)
+        """
+        if self.pattern == -1:
+            return None
         player = com.get('neil.core.player')
         current_position = self.playpos
         seq = player.get_current_sequencer()
@@ -2495,11 +2678,20 @@ class PatternView(Gtk.DrawingArea):
                     and current_position < pos + row_count:
                         y = self.top_margin + (current_position - pos - self.start_row) * self.row_height
                         w, h = self.get_client_size()
-                        ctx.rectangle(0, y, w, 2)
-                        ctx.fill()
-                        ctx.set_operator(cairo.Operator.OVER)
-                        return
-        ctx.set_operator(cairo.Operator.OVER)
+                        return (0, int(y), w, 2)
+        return None
+
+    def draw_playpos_xor(self, ctx):
+        if not self.get_parent_window():
+            return
+        rect = self.get_playpos_rect()
+        if rect:
+            ctx.set_operator(cairo.Operator.XOR)
+            ctx.set_source_rgb(1, 1, 1)
+            ctx.rectangle(*rect)
+            ctx.fill()
+            ctx.set_operator(cairo.Operator.OVER)
+        return rect
 
 
     def get_plugin(self):
@@ -2538,52 +2730,20 @@ class PatternView(Gtk.DrawingArea):
         @param row: Line that will be updated.
         @type row: int
         """
-        for g in range(3):
-            if self.lines[g]:
-                tc = self.group_track_count[g]
-                for t in range(tc):
-                    s = ' '.join([get_str_from_param(self.plugin.get_parameter(g, t, i),
-                                                     self.plugin.get_pattern_value(self.pattern, g, t, i, row))
-                                                    for i in range(self.parameter_count[g])])
-                    # values = [self.plugin.get_pattern_value(self.pattern, g, t, i, row) != self.plugin.get_parameter(g, t, i).get_value_none()
-                    #                                         for i in range(self.parameter_count[g])]
-                    try:
-                        self.lines[g][t][row] = s
-                    except IndexError:
-                        pass
-
-    # This does the same job as update_line, but if we need to
-    # update a lot of data at once, it's faster to use update_col.
-    def update_col(self, group, track):
-        count = self.parameter_count[group]
-        cols = [None] * count
-        col_vals = [None] * count
-        for i in range(count):
-            param = self.plugin.get_parameter(group, 0, i)
-            cols[i] = [get_str_from_param(param, self.plugin.get_pattern_value(self.pattern, group, track, i, row))
-                    for row in range(self.row_count)]
-            col_vals[i] = [self.plugin.get_pattern_value(self.pattern, group, track, i, row) != param.get_value_none()
-                    for row in range(self.row_count)]
-        for row in range(self.row_count):
-            try:
-                self.lines[group][track][row] = ' '.join([cols[i][row] for i in range(count)])
-            except IndexError:
-                pass
+        if self.textcache:
+            self.textcache.update_row(row)
+        block = row // self.TILE_ROWS
+        for key in [key for key in self.tiles if key[2] == block]:
+            del self.tiles[key]
 
     def prepare_textbuffer(self):
         """
-        Initializes a buffer to handle the current pattern data.
+        Initializes a buffer to handle the current pattern data. Rows are
+        formatted as they are drawn.
         """
-        self.lines = [None] * 3
-        for group in range(3):
-            if self.parameter_count[group] > 0:
-                tc = self.group_track_count[group]
-                self.lines[group] = [None] * tc
-                for track in range(tc):
-                    self.lines[group][track] = [None] * self.row_count
-                    self.update_col(group, track)
-            else:
-                self.lines[group] = []
+        self.textcache = PatternTextCache(self.plugin, self.pattern, self.row_count,
+                                          self.group_track_count, self.parameter_count)
+        self.invalidate_tiles()
 
     def get_line_pattern(self):
         player = com.get('neil.core.player')
@@ -2607,7 +2767,7 @@ class PatternView(Gtk.DrawingArea):
         ctx.rectangle(0, 0, w, self.row_height)
         ctx.rectangle(0, 0, PATLEFTMARGIN, h)
         ctx.fill()
-        if self.lines == None:
+        if self.textcache == None:
             return
         ctx.set_source_rgba(*pen)
         #drawable.draw_rectangle(gc, False, 0, 0, w - 1, h - 1)
@@ -2656,108 +2816,109 @@ class PatternView(Gtk.DrawingArea):
             PangoCairo.update_layout(ctx, layout)
             PangoCairo.show_layout(ctx, layout)
 
-    def draw_bar_marks(self, ctx):
-        "Draw the horizontal bars every each fourth and eighth bar."
-        w, h = self.get_client_size()
+    def invalidate_tiles(self, group=None, track=None, row=None):
+        """
+        Drops rendered tiles: all of them, those of a track, or the one
+        holding a row of a track.
+        """
+        if group is None:
+            self.tiles.clear()
+            return
+        for key in list(self.tiles.keys()):
+            g, t, block = key
+            if g == group and t == track and (row is None or block == row // self.TILE_ROWS):
+                del self.tiles[key]
 
-        def draw_bar(row, group, track, color):
-            """Draw a horizontal bar for a specified row in a
-            specified group/track."""
-            x, y = self.pattern_to_pos(row, group, track, 0)
-            width = (self.track_width[group] - 1) * self.column_width
-            height = self.row_height
-            ctx.set_source_rgba(*color)
-            ctx.rectangle(x, y, width, height)
-            ctx.fill()
-#        darkest = cm.alloc_color('#b0b0b0')
-#        lighter = cm.alloc_color('#d0d0d0')
-#        lightest = cm.alloc_color('#f0f0f0')
-        cfg = config.get_config()
-        darkest = cfg.get_float_color('PE BG Very Dark')
-        lighter = cfg.get_float_color('PE BG Light')
-        lightest = cfg.get_float_color('PE BG Very Light')
-
-        def get_color(row):
-            "What color to paint the bar with?"
-            if row % 16 == 0:
-                return darkest
-            elif row % 8 == 0:
-                return lighter
-            elif row % 4 == 0:
-                return lightest
-            else:
-                return None
-        num_rows = int(min(self.row_count - self.start_row,
-                       (h - self.row_height) / self.row_height + 1))
-        if self.lines and self.lines[CONN]:
-            for track in range(self.group_track_count[CONN]):
-                for row in range(self.start_row, num_rows + self.start_row):
-                    color = get_color(row)
-                    if color != None:
-                        draw_bar(row, CONN, track, color)
-        if self.lines and self.lines[GLOBAL]:
-            for row in range(self.start_row, num_rows + self.start_row):
-                color = get_color(row)
-                if color != None:
-                    draw_bar(row, GLOBAL, 0, color)
-        if self.lines and self.lines[TRACK]:
-            for track in range(self.group_track_count[TRACK]):
-                for row in range(self.start_row, num_rows + self.start_row):
-                    color = get_color(row)
-                    if color != None:
-                        draw_bar(row, TRACK, track, color)
-
-    def draw_parameter_values(self, ctx, layout):
-        """ Draw the parameter values for all tracks, columns and rows."""
-        w, h = self.get_client_size()
+    def render_tile(self, group, track, block, layout):
+        """
+        Renders the bar marks and parameter values of a block of rows of
+        a track into a surface.
+        """
         cfg = config.get_config()
-        pen = cfg.get_float_color('PE Text')
-
-        def draw_parameters_range(row, num_rows, group, track=0):
-            """Draw the parameter values for a range of rows"""
-            x, y = self.pattern_to_pos(row, group, track, 0)
-            s = '\n'.join([self.lines[group][track][i]
-                           for i in range(row, row + num_rows)])
-            # w = self.column_width * len(self.lines[group][track][row])
-            layout.set_text(s)
-            px, py = layout.get_pixel_size()
-            ctx.set_source_rgba(*pen)
-            ctx.move_to(x, y)
+        # rows every 16, 8 and 4 rows are highlighted
+        marks = [
+            (16, cfg.get_float_color('PE BG Very Dark')),
+            (8, cfg.get_float_color('PE BG Light')),
+            (4, cfg.get_float_color('PE BG Very Light')),
+        ]
+        begin = block * self.TILE_ROWS
+        rows = min(self.TILE_ROWS, self.row_count - begin)
+        width = int(math.ceil(self.track_width[group] * self.column_width)) + 1
+        height = int(math.ceil(rows * self.row_height)) + 1
+        tile = cairo.ImageSurface(cairo.Format.ARGB32, width, height)
+        ctx = cairo.Context(tile)
+        for r in range(rows):
+            for every, color in marks:
+                if (begin + r) % every == 0:
+                    ctx.set_source_rgba(*color)
+                    ctx.rectangle(0, r * self.row_height,
+                                  (self.track_width[group] - 1) * self.column_width, self.row_height)
+                    ctx.fill()
+                    break
+        # connection tracks only show the values of audio connections
+        if (group != CONN or
+            self.get_plugin().get_input_connection_type(track) == zzub.zzub_connection_type_audio):
+            layout.set_text('\n'.join(self.textcache.get_rows(group, track, begin, rows)))
+            ctx.set_source_rgba(*cfg.get_float_color('PE Text'))
+            ctx.move_to(0, 0)
             PangoCairo.update_layout(ctx, layout)
             PangoCairo.show_layout(ctx, layout)
-            return x + px
-        # Draw the parameter values
-        #i = self.start_row
-        #y = self.row_height
+        return tile
+
+    def get_tile(self, group, track, block, layout):
+        key = (group, track, block)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.render_tile(group, track, block, layout)
+            self.tiles[key] = tile
+            while len(self.tiles) > self.MAX_TILES:
+                self.tiles.popitem(last=False)
+        else:
+            self.tiles.move_to_end(key)
+        return tile
+
+    def draw_tiles(self, ctx, layout):
+        """
+        Draws bar marks and parameter values of the visible rows. Each
+        track is rendered in tiles of TILE_ROWS rows, which are kept
+        until the rows they show are edited, so scrolling and following
+        the play position only copies surfaces.
+        """
+        if self.textcache == None:
+            return
+        w, h = self.get_client_size()
+        cfg = config.get_config()
+        # tiles are rendered again after font or color changes
+        tilekey = (self.fontdesc.to_string(), self.row_height, self.column_width,
+                   tuple([tuple(cfg.get_float_color(name)) for name in
+                          ('PE Text', 'PE BG Very Dark', 'PE BG Light', 'PE BG Very Light')]))
+        if tilekey != self.tilekey:
+            self.invalidate_tiles()
+            self.tilekey = tilekey
         row = self.start_row
-        rows = self.row_count
-        # Number of rows is calculated to be either the first row displayed
-        # subtracted from all rows, or the height of the screen divided
-        # by row height, whichever is smaller.
-        num_rows = int(min(rows - row, (h - self.row_height) / self.row_height + 1))
-        # out_of_bounds will be set to true if we have gone over the right
-        # edge of the screen, which signifies that we don't have to process
-        # the columns that are further to the right.
-        out_of_bounds = False
-        if self.lines != None:
-            # Draw connection parameters (volume, pan, etc)
-            for t in range(self.group_track_count[CONN]):
-                connectiontype = self.get_plugin().get_input_connection_type(t)
-                if connectiontype == zzub.zzub_connection_type_audio:
-                    extent = draw_parameters_range(row, num_rows, CONN, t)
-                    out_of_bounds = extent > w
-            # Draw global parameters.
-            if not out_of_bounds:
-                if self.lines[GLOBAL]:
-                    extent = draw_parameters_range(row, num_rows, GLOBAL, 0)
-                    out_of_bounds = extent > w
-            # Draw track parameters.
-            if not out_of_bounds:
-                if self.lines[TRACK]:
-                    for t in range(self.group_track_count[TRACK]):
-                        extent = draw_parameters_range(row, num_rows, TRACK, t)
-                        if extent > w:
-                            break
+        num_rows = int(min(self.row_count - row, (h - self.row_height) / self.row_height + 1))
+        if num_rows <= 0:
+            return
+        first = row // self.TILE_ROWS
+        last = (row + num_rows - 1) // self.TILE_ROWS
+        ctx.save()
+        ctx.rectangle(0, self.top_margin, w, h - self.top_margin)
+        ctx.clip()
+        for group in range(3):
+            if not self.textcache.has_group(group):
+                continue
+            track_width = self.track_width[group] * self.column_width
+            for track in range(self.group_track_count[group]):
+                x, y = self.pattern_to_pos(first * self.TILE_ROWS, group, track, 0)
+                if x > w:
+                    break
+                if x + track_width < PATLEFTMARGIN:
+                    continue
+                for block in range(first, last + 1):
+                    tile = self.get_tile(group, track, block, layout)
+                    ctx.set_source_surface(tile, int(x), int(y + (block - first) * self.TILE_ROWS * self.row_height))
+                    ctx.paint()
+        ctx.restore()
 
     def draw_selection(self, ctx):
         """ Draw selection box."""
@@ -2828,16 +2989,20 @@ class PatternView(Gtk.DrawingArea):
         Overriding a L{Canvas} method that paints onto an offscreen buffer.
         Draws the pattern view graphics.
         """
+        self.playhead.draw(ctx, self.draw_content, self.draw_playpos_xor)
+
+    def draw_content(self, ctx):
+        """
+        Draws everything but the play cursor.
+        """
         layout = Pango.Layout(self.get_pango_context())
         layout.set_font_description(self.fontdesc)
         layout.set_width(-1)
         self.draw_background(ctx)
-        self.draw_bar_marks(ctx)
-        self.draw_parameter_values(ctx, layout)
+        self.draw_tiles(ctx, layout)
         self.draw_selection(ctx)
         self.draw_cursor_xor(ctx)
         self.draw_pattern_background(ctx, layout)
-        self.draw_playpos_xor(ctx)
 
 __all__ = [
     'PatternDialog',
@@ -20,9 +20,10 @@
 
 from neil.utils import is_generator, is_effect, is_streamer, PropertyEventHandler, generate_ui_methods, refresh_gui
 from zzub import Player
-from gi.repository import GObject
+from gi.repository import GObject, GLib
 import neil.com as com
 import neil.common as common
+import neil.eventdecoder as eventdecoder
 import os
 import sys
 import time
@@ -89,6 +90,19 @@ class NeilPlayer(Player, PropertyEventHandler):
             zzub.zzub_event_type_parameter_changed,
     ]
 
+    # events after which the wrappers passed along refer to freed handles
+    _forget_event_types_ = [
+            zzub.zzub_event_type_delete_plugin,
+    ]
+
+    # queued events of these types are coalesced per tick, keeping only the
+    # latest one for the given argument indices.
+    _coalesce_event_types_ = {
+            zzub.zzub_event_type_parameter_changed: (0, 1, 2, 3), # plugin, group, track, param
+            zzub.zzub_event_type_pattern_changed: (0, 1), # plugin, index
+            zzub.zzub_event_type_vu: (),
+    }
+
     _event_types_ = dict(
             zzub_event_type_double_click = dict(args=None),
             zzub_event_type_new_plugin = dict(args='new_plugin'),
@@ -138,28 +152,11 @@ class NeilPlayer(Player, PropertyEventHandler):
         self._hevtime = 0
         self.__lazy_commits = False
         self.__event_stats = False
-        # enumerate zzub_event_types and prepare unwrappers for the different types
-        self.event_id_to_name = {}
-        for enumname, cfg in self._event_types_.items():
-            val = getattr(zzub, enumname)
-            #assert val not in self.event_id_to_name, "value %s (%s) already registered." % (val, eventname)
-            # where is eventname defined?
-            assert val not in self.event_id_to_name, "value %s already registered." % (val)
-            eventname = 'zzub_' + enumname[len('zzub_event_type_'):]
-            membername = cfg.get('args', None)
-            args = []
-            if membername:
-                #union = None
-                datatype = None
-                ed = zzub.EventData()
-                for argname in dir(ed):
-                    if argname == membername:
-                        datatype = getattr(ed, argname).__class__
-                assert datatype, "couldn't find member %s in zzub_event_data_t" % membername
-                for argname, argtype in datatype._fields_:
-                    args.append(argname)
-            self.event_id_to_name[val] = (eventname, membername, args)
-            #print "'%s', # ( %s )" % (eventname, ','.join(args + ["..."]))
+        # events collected while draining the queue, None when not draining
+        self.__event_batch = None
+        self._coalesced = 0
+        # decoders for the different event types, built once
+        self.event_decoders = eventdecoder.build_decoders(self._event_types_)
         config = com.get('neil.core.config')
         pluginpath = os.environ.get('NEIL_PLUGIN_PATH', None)
         if pluginpath:
@@ -203,9 +200,18 @@ class NeilPlayer(Player, PropertyEventHandler):
         eventbus.zzub_pre_delete_pattern += self.on_pre_delete_pattern
         self._callback = zzub.zzub_callback_t(self.handle_event)
         self.set_callback(self._callback, None)
-        GObject.timeout_add(int(1000 / 50), self.on_handle_events)
+        # wake up only when the engine has queued events, and fall back
+        # to polling if the player has no event descriptor.
+        fd = self.get_event_fd()
+        if fd != -1:
+            GLib.io_add_watch(fd, GLib.PRIORITY_DEFAULT, GLib.IO_IN, self.on_event_fd)
+        else:
+            GObject.timeout_add(int(1000 / 50), self.on_handle_events)
         # event queue disabling count for overlapping disable calls
         self.__disable_level = 0
+        # one poller for all views showing the play position
+        self.__playpos = self.get_position()
+        GObject.timeout_add(100, self.on_position_timer)
 
     def set_callback_state(self, enable):
         #self.set_event_queue_state(enable)
@@ -403,29 +409,71 @@ class NeilPlayer(Player, PropertyEventHandler):
         zzub.Player.clear(self)
         self.document_path = ''
 
+    def on_event_fd(self, fd, condition):
+        """
+        Handler triggered when the player event descriptor becomes readable.
+        """
+        return self.on_handle_events()
+
+    def check_commit_leak(self):
+        """
+        Reports and commits operations which have been left uncommitted.
+        """
+        if self.__lazy_commits:
+            return
+        ucopcount = self.history_get_uncomitted_operations()
+        if ucopcount:
+            # you should commit your actions
+            import neil.errordlg
+            msg = "%i operation(s) left uncommitted." % ucopcount
+            neil.errordlg.error(None, "<b>Internal Program Error</b>", msg)
+            self.history_commit("commit leak")
+
+    def on_position_timer(self):
+        """
+        Sends play_position_changed when the play position has moved
+        since the last call, and checks for uncommitted operations,
+        which queue no events.
+        """
+        if self.__loading:
+            return True
+        self.check_commit_leak()
+        position = self.get_position()
+        if position != self.__playpos:
+            self.__playpos = position
+            eventbus = com.get('neil.core.eventbus')
+            eventbus.play_position_changed(position)
+        return True
+
     def on_handle_events(self):
         """
-        Handler triggered by the default timer. Asks the player to fill
-        the event queue and fetches events from the queue to pass them to handle_event.
+        Handler triggered by the event descriptor or the fallback timer. Asks
+        the player to fill the event queue and fetches events from the queue
+        to pass them to handle_event.
         """
-        if not self.__loading and not self.__lazy_commits:
-            ucopcount = self.history_get_uncomitted_operations()
-            if ucopcount:
-                # you should commit your actions
-                import neil.errordlg
-                msg = "%i operation(s) left uncommitted." % ucopcount
-                neil.errordlg.error(None, "<b>Internal Program Error</b>", msg)
-                self.history_commit("commit leak")
-        player = com.get('neil.core.player')
+        if self.__event_batch is not None:
+            # called from within a drain, e.g. through refresh_gui()
+            return True
         t1 = time.time()
-        player.handle_events()
+        # queued events are collected by handle_event and dispatched
+        # as one coalesced batch once the queue is empty.
+        self.__event_batch = []
+        try:
+            self.handle_events()
+        finally:
+            batch, self.__event_batch = self.__event_batch, None
+        events = eventdecoder.coalesce_events(batch, self._coalesce_event_types_)
+        self._coalesced += len(batch) - len(events)
+        for eventtype, eventname, args in events:
+            self.dispatch_event(eventtype, eventname, args)
         t2 = time.time() - t1
         self._hevtime += t2
         self._hevcalls += 1
         t = time.time()
         if self.__event_stats and ((t - self._cbtime) > 1):
-            print(self._hevcalls, self._cbcalls, "%.2fms" % (self._hevtime * 1000))
+            print(self._hevcalls, self._cbcalls, self._coalesced, "%.2fms" % (self._hevtime * 1000))
             self._cbcalls = 0
+            self._coalesced = 0
             self._hevcalls = 0
             self._hevtime = 0
             self._cbtime = t
@@ -539,26 +587,33 @@ class NeilPlayer(Player, PropertyEventHandler):
         @param data: event data.
         @type data: zzub_event_data_t
         """
+        eventtype, eventname, args = eventdecoder.decode_event(self.event_decoders, data)
+        if self.__event_batch is not None:
+            # queued event, dispatched by on_handle_events
+            self.__event_batch.append((eventtype, eventname, args))
+            return False
+        return self.dispatch_event(eventtype, eventname, args)
+
+    def dispatch_event(self, eventtype, eventname, args):
+        """
+        Sends a decoded zzub event to the eventbus.
+
+        @param eventtype: zzub event type.
+        @type eventtype: int
+        @param eventname: Name of the eventbus event.
+        @type eventname: str
+        @param args: Event arguments.
+        @type args: list
+        """
         eventbus = com.get('neil.core.eventbus')
-        data = data.contents
-        # prepare arguments for the specific callback
-        eventname, membername, argnames = self.event_id_to_name[data.type]
-        args = []
-        if membername:
-            specdata = getattr(data, membername)
-            for argname in argnames:
-                value = getattr(specdata, argname)
-                if hasattr(value, 'contents'):
-                    class_ = value.contents.__class__
-                    if hasattr(class_, '_wrapper_'):
-                        value = class_._wrapper_._new_from_handle(value)
-                elif 'contents' in dir(value):
-                    value = None
-                args.append(value)
-        if not data.type in self._exclude_event_debug_:
+        if not eventtype in self._exclude_event_debug_:
             pass
-            #print "[%s](%s)" % (eventname,','.join([('%s=%r' % (a,b)) for a,b in zip(argnames,args)]))
+            #print "[%s](%s)" % (eventname,','.join([repr(a) for a in args]))
         result = getattr(eventbus, eventname)(*args) or False
+        if eventtype in self._forget_event_types_:
+            for value in args:
+                if hasattr(value, '_forget'):
+                    value._forget()
         self._cbcalls += 1
         if self.__loading:
             refresh_gui()
@@ -614,7 +669,7 @@ class NeilPlayer(Player, PropertyEventHandler):
             self.solo_plugin = None
             for plugin in self.get_plugin_list():
                 info = common.get_plugin_infos().get(plugin)
-                plugin.set_mute(info.muted)
+                plugin.set_mute(info.muted or bool(info.frozen))
                 info.reset_plugingfx()
         elif is_generator(plugin):
             # mute all plugins except solo plugin
@@ -625,7 +680,7 @@ class NeilPlayer(Player, PropertyEventHandler):
                     plugin.set_mute(True)
                     info.reset_plugingfx()
                 elif plugin == self.solo_plugin:
-                    plugin.set_mute(info.muted)
+                    plugin.set_mute(info.muted or bool(info.frozen))
                     info.reset_plugingfx()
 
     def toggle_mute(self, plugin):
@@ -633,7 +688,8 @@ class NeilPlayer(Player, PropertyEventHandler):
         pi.muted = not pi.muted
         # make sure a machine muted by solo is not unmuted manually
         if not self.solo_plugin or plugin == self.solo_plugin or is_effect(plugin):
-            plugin.set_mute(pi.muted)
+            # frozen plugins stay muted until they are unfrozen
+            plugin.set_mute(pi.muted or bool(pi.frozen))
         pi.reset_plugingfx()
 
     def toggle_bypass(self, plugin):
@@ -37,6 +37,7 @@ import zzub
 
 samplerates = [96000, 48000, 44100, 22050]
 buffersizes = [32768, 16384, 8192, 4096, 2048, 1024, 512, 256, 128, 64, 32, 16]
+sleeptails = [0, 250, 500, 1000, 2000, 5000]
 
 
 class CancelException(Exception):
@@ -176,6 +177,8 @@ class DriverPanel(Gtk.VBox):
         self.cboutput = Gtk.ComboBoxText.new()
         self.cbsamplerate = Gtk.ComboBoxText.new()
         self.cblatency = Gtk.ComboBoxText.new()
+        self.cbthreads = Gtk.ComboBoxText.new()
+        self.cbsleeptail = Gtk.ComboBoxText.new()
         size_group = Gtk.SizeGroup.new(Gtk.SizeGroupMode.HORIZONTAL)
 
         def add_row(c1, c2):
@@ -194,6 +197,10 @@ class DriverPanel(Gtk.VBox):
                                 self.cbsamplerate), expand=False, fill=True, padding=0)
         vbox.pack_start(add_row(Gtk.Label("Latency"),
                                 self.cblatency), expand=False, fill=True, padding=0)
+        vbox.pack_start(add_row(Gtk.Label("Threads"),
+                                self.cbthreads), expand=False, fill=True, padding=0)
+        vbox.pack_start(add_row(Gtk.Label("Sleep Effects"),
+                                self.cbsleeptail), expand=False, fill=True, padding=0)
         vbox.set_border_width(MARGIN)
         sizer1.add(vbox)
         inputname, outputname, samplerate, buffersize = config.get_config().get_audiodriver_config()
@@ -212,6 +219,20 @@ class DriverPanel(Gtk.VBox):
             self.cblatency.append_text(
                 "%.1fms" % buffersize_to_latency(bs, 44100))
         self.cblatency.set_active(buffersizes.index(buffersize))
+        # index 0 is one thread per CPU
+        self.cbthreads.append_text("Auto")
+        for count in range(1, (os.cpu_count() or 1) + 1):
+            self.cbthreads.append_text("%i" % count)
+        threads = config.get_config().get_audiodriver_threads()
+        self.cbthreads.set_active(min(max(threads, 0), os.cpu_count() or 1))
+        for ms in sleeptails:
+            if ms:
+                self.cbsleeptail.append_text("after %.2gs of silence" % (ms / 1000.0))
+            else:
+                self.cbsleeptail.append_text("Never")
+        sleeptail = config.get_config().get_audiodriver_sleep_tail()
+        if sleeptail in sleeptails:
+            self.cbsleeptail.set_active(sleeptails.index(sleeptail))
         self.add(sizer1)
 
     def apply(self):
@@ -247,6 +268,14 @@ class DriverPanel(Gtk.VBox):
                 traceback.print_exc()
                 error(self, "<b><big>There was an error initializing the audio driver.</big></b>\n\nThis can happen when the specified sampling rate or latency is not supported by a particular audio device. Change settings and try again.")
                 raise com.exception('neil.exception.cancel')
+        threads = max(self.cbthreads.get_active(), 0)
+        if threads != config.get_config().get_audiodriver_threads():
+            config.get_config().set_audiodriver_threads(threads)
+            com.get('neil.core.player').set_thread_count(threads)
+        st = self.cbsleeptail.get_active()
+        if st != -1 and sleeptails[st] != config.get_config().get_audiodriver_sleep_tail():
+            config.get_config().set_audiodriver_sleep_tail(sleeptails[st])
+            com.get('neil.core.player').set_sleep_tail(sleeptails[st])
 
 
 class ControllerPanel(Gtk.VBox):
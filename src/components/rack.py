@@ -28,7 +28,7 @@ import cairo
 from gi.repository import PangoCairo
 from neil.utils import prepstr, filepath, db2linear, linear2db, is_debug, filenameify, \
     get_item_count, question, error, new_listview, add_scrollbars, get_clipboard_text, set_clipboard_text, \
-    gettext, new_stock_image_button, diff, show_machine_manual
+    gettext, new_stock_image_button, diff, show_machine_manual, get_parameter_formatter
 import zzub
 import sys
 import os
@@ -845,8 +845,8 @@ class ParameterView(Gtk.VBox):
         g, t, i = gti
         nl, s, vl = self.pid2ctrls[(g, t, i)]
         v = self.plugin.get_parameter_value(g, t, i)
-        p = self.plugin.get_parameter(g, t, i)
-        minv, maxv = p.get_value_min(), p.get_value_max()
+        f = get_parameter_formatter(self.plugin, g, t, i)
+        minv, maxv = f.value_min, f.value_max
         if event.direction == Gdk.SCROLL_UP:
             v += 1
         elif event.direction == Gdk.SCROLL_DOWN:
@@ -887,10 +887,8 @@ class ParameterView(Gtk.VBox):
         """
         g, t, i = gti
         nl, s, vl = self.pid2ctrls[(g, t, i)]
-        p = self.plugin.get_parameter(g, t, i)
-        minv = p.get_value_min()
-        maxv = p.get_value_max()
-        value = int(max(min(value, maxv), minv) + 0.5)
+        f = get_parameter_formatter(self.plugin, g, t, i)
+        value = int(max(min(value, f.value_max), f.value_min) + 0.5)
         s.set_value(value)  # quantize slider position
         self.plugin.set_parameter_value_direct(g, t, i, value, 1)
         self.update_valuelabel(g, t, i)
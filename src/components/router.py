@@ -65,6 +65,10 @@ LEDOFSX, LEDOFSY = 4, 4                           # offset of LED
 CPUWIDTH, CPUHEIGHT = 6, PLUGINHEIGHT - 8         # size of LED
 CPUOFSX, CPUOFSY = PLUGINWIDTH - CPUWIDTH - 4, 4  # offset of LED
 
+# amp led states besides the height of the led fill
+LED_SLEEPING = -1
+LED_CLIPPING = -2
+
 ARROWRADIUS = 8
 
 QUANTIZEX = PLUGINWIDTH + ARROWRADIUS * 2
@@ -78,6 +82,160 @@ AREA_ANY = 0
 AREA_PANNING = 1
 AREA_LED = 2
 
+CONNECTION_RADIUS = 14  # pick distance around connection arrows
+
+
+class RouterIndex:
+    """
+    Uniform grid of the plugin boxes and connection arrows of the router
+    in pixels, so that hit tests only look at what is near the pointer.
+
+    Plugins and their connections are updated one at a time from zzub
+    events. The grid is rebuilt on the next lookup after the view is
+    resized or the song is replaced.
+    """
+    CELL = 64
+
+    def __init__(self, view):
+        self.view = view
+        self.valid = False
+
+    def invalidate(self, *args):
+        self.valid = False
+
+    def get_cells(self, x0, y0, x1, y1):
+        """
+        Returns the keys of all cells overlapping a rectangle.
+        """
+        c = self.CELL
+        return [(i, j) for i in range(int(x0 // c), int(x1 // c) + 1)
+                for j in range(int(y0 // c), int(y1 // c) + 1)]
+
+    def rebuild(self):
+        rect = self.view.get_allocation()
+        self.cx, self.cy = rect.width * 0.5, rect.height * 0.5
+        self.plugins = {}  # plugin: (order, x, y)
+        self.connections = {}  # target plugin: [(index, x, y), ...]
+        self.plugin_cells = {}
+        self.connection_cells = {}
+        self.order = 0
+        self.valid = True
+        player = com.get('neil.core.player')
+        plugins = list(player.get_plugin_list())
+        for mp in plugins:
+            self.add_plugin(mp)
+        for mp in plugins:
+            self.add_connections(mp)
+
+    def get_pixelpos(self, mp):
+        x, y = mp.get_position()
+        return int(self.cx * (1 + x)), int(self.cy * (1 + y))
+
+    def add_plugin(self, mp, order=None):
+        if order is None:
+            order = self.order
+            self.order += 1
+        x, y = self.get_pixelpos(mp)
+        self.plugins[mp] = order, x, y
+        PW, PH = PLUGINWIDTH / 2, PLUGINHEIGHT / 2
+        for cell in self.get_cells(x - PW, y - PH, x + PW, y + PH):
+            self.plugin_cells.setdefault(cell, set()).add(mp)
+
+    def remove_plugin(self, mp):
+        order, x, y = self.plugins.pop(mp)
+        PW, PH = PLUGINWIDTH / 2, PLUGINHEIGHT / 2
+        for cell in self.get_cells(x - PW, y - PH, x + PW, y + PH):
+            self.plugin_cells[cell].discard(mp)
+        return order
+
+    def add_connections(self, mp):
+        """
+        Indexes the arrows of the input connections of a plugin, replacing
+        those indexed before.
+        """
+        self.remove_connections(mp)
+        if mp not in self.plugins:
+            return
+        order, rx, ry = self.plugins[mp]
+        arrows = []
+        for index in range(mp.get_input_connection_count()):
+            crx, cry = self.get_pixelpos(mp.get_input_connection_plugin(index))
+            cpx, cpy = (crx + rx) * 0.5, (cry + ry) * 0.5
+            arrows.append((index, cpx, cpy))
+            r = CONNECTION_RADIUS
+            for cell in self.get_cells(cpx - r, cpy - r, cpx + r, cpy + r):
+                self.connection_cells.setdefault(cell, set()).add(mp)
+        self.connections[mp] = arrows
+
+    def remove_connections(self, mp):
+        r = CONNECTION_RADIUS
+        for index, cpx, cpy in self.connections.pop(mp, []):
+            for cell in self.get_cells(cpx - r, cpy - r, cpx + r, cpy + r):
+                self.connection_cells[cell].discard(mp)
+
+    def on_new_plugin(self, mp):
+        if self.valid:
+            self.add_plugin(mp)
+            self.add_connections(mp)
+
+    def on_plugin_changed(self, mp):
+        """
+        Moves a plugin along with the arrows of its connections.
+        """
+        if not self.valid or mp not in self.plugins:
+            return
+        self.add_plugin(mp, self.remove_plugin(mp))
+        self.add_connections(mp)
+        for index in range(mp.get_output_connection_count()):
+            self.add_connections(mp.get_output_connection_plugin(index))
+
+    def on_connection_changed(self, from_plugin, to_plugin, *args):
+        if self.valid:
+            self.add_connections(to_plugin)
+
+    def get_plugin_at(self, x, y):
+        """
+        Returns the topmost plugin whose box contains a pixel, with its
+        position in pixels.
+
+        @return: Plugin and its position, or None.
+        @rtype: (zzub.Plugin, (int, int)) or None
+        """
+        if not self.valid:
+            self.rebuild()
+        PW, PH = PLUGINWIDTH / 2, PLUGINHEIGHT / 2
+        found = None
+        for mp in self.plugin_cells.get(self.get_cells(x, y, x, y)[0], ()):
+            order, px, py = self.plugins[mp]
+            if found and order < found[0]:
+                continue
+            if not common.get_plugin_infos().get(mp).songplugin:
+                continue
+            if (x >= (px - PW)) and (x <= (px + PW)) and (y >= (py - PH)) and (y <= (py + PH)):
+                found = order, mp, (px, py)
+        return found and found[1:]
+
+    def get_connection_at(self, x, y):
+        """
+        Returns the first connection, in the order of the plugin list,
+        whose arrow lies within CONNECTION_RADIUS of a pixel.
+
+        @return: Target plugin and connection index, or None.
+        @rtype: (zzub.Plugin, int) or None
+        """
+        if not self.valid:
+            self.rebuild()
+        found = None
+        for mp in self.connection_cells.get(self.get_cells(x, y, x, y)[0], ()):
+            order = self.plugins[mp][0]
+            for index, cpx, cpy in self.connections[mp]:
+                dx, dy = cpx - x, cpy - y
+                if (dx * dx + dy * dy) ** 0.5 <= CONNECTION_RADIUS:
+                    if not found or (order, index) < found[0]:
+                        found = (order, index), mp, index
+                    break
+        return found and found[1:]
+
 
 class AttributesDialog(Gtk.Dialog):
     """
@@ -489,7 +647,6 @@ class VolumeSlider(Gtk.Window):
         @param event: Mouse event.
         @type event: wx.MouseEvent
         """
-        self.parent_window.redraw()
         self.hide()
         self.drawingarea.grab_remove()
 
@@ -541,13 +698,26 @@ class RouteView(Gtk.DrawingArea):
         """
         Gtk.DrawingArea.__init__(self)
         self.panel = parent
+        # cached layers: connections, and the plugin boxes in PluginInfo.plugingfx
         self.routebitmap = None
+        self.routebitmap_dragged = set()
+        self.dragged_connections = []
+        self.plugin_positions = {}
         # self.peaks = {}
         eventbus = com.get('neil.core.eventbus')
         eventbus.zzub_connect += self.on_zzub_redraw_event
         eventbus.zzub_disconnect += self.on_zzub_redraw_event
         eventbus.zzub_plugin_changed += self.on_zzub_plugin_changed
-        eventbus.document_loaded += self.redraw
+        eventbus.zzub_parameter_changed += self.on_zzub_parameter_changed
+        eventbus.zzub_delete_plugin += self.redraw_connections
+        eventbus.document_loaded += self.redraw_connections
+        self.index = RouterIndex(self)
+        eventbus.zzub_new_plugin += self.index.on_new_plugin
+        eventbus.zzub_delete_plugin += self.index.invalidate
+        eventbus.zzub_plugin_changed += self.index.on_plugin_changed
+        eventbus.zzub_connect += self.index.on_connection_changed
+        eventbus.zzub_disconnect += self.index.on_connection_changed
+        eventbus.document_loaded += self.index.invalidate
         eventbus.active_plugins_changed += self.on_active_plugins_changed
         self.autoconnect_target = None
         self.chordnotes = []
@@ -633,6 +803,7 @@ class RouteView(Gtk.DrawingArea):
 
     def on_size_allocate(self, widget, requisition):
         self.routebitmap = None
+        self.index.invalidate()
 
     def update_colors(self):
         """
@@ -670,13 +841,25 @@ class RouteView(Gtk.DrawingArea):
                 brushes.append(cfg.get_float_color(name))
             self.flags2brushes[flags] = brushes
         common.get_plugin_infos().reset_plugingfx()
+        self.routebitmap = None
 
     def on_zzub_plugin_changed(self, plugin):
         common.get_plugin_infos().get(plugin).reset_plugingfx()
-        self.redraw()
+        # connections only follow moves
+        if plugin.get_position() != self.plugin_positions.get(plugin):
+            self.redraw_connections()
+        else:
+            self.redraw()
+
+    def on_zzub_parameter_changed(self, plugin, group, track, param, value):
+        # the arrow color follows the amp of the connection
+        if group == zzub.zzub_parameter_group_connection:
+            self.redraw_connections()
 
     def on_zzub_redraw_event(self, *args):
-        self.redraw()
+        # connections decide which plugins reach the master
+        common.get_plugin_infos().reset_plugingfx()
+        self.redraw_connections()
 
     def on_focus(self, event):
         self.redraw()
@@ -723,6 +906,15 @@ class RouteView(Gtk.DrawingArea):
         cx, cy = w * 0.5, h * 0.5
         return cx * (1 + x), cy * (1 + y)
 
+    def get_plugin_box(self):
+        """
+        Returns the size of a plugin in router coordinates.
+
+        @rtype: (float, float)
+        """
+        rect = self.get_allocation()
+        return 2.0 * PLUGINWIDTH / max(rect.width, 1), 2.0 * PLUGINHEIGHT / max(rect.height, 1)
+
     def pixel_to_float(self, xy):
         """
         Converts an on-screen pixel coordinate to a router coordinate.
@@ -752,22 +944,7 @@ class RouteView(Gtk.DrawingArea):
         @rtype: zzub.Connection or None
         """
         mx, my = m
-        player = com.get('neil.core.player')
-        rect = self.get_allocation()
-        w, h = rect.width, rect.height
-        cx, cy = w * 0.5, h * 0.5
-
-        def get_pixelpos(x, y):
-            return cx * (1 + x), cy * (1 + y)
-        for mp in player.get_plugin_list():
-            rx, ry = get_pixelpos(*mp.get_position())
-            for index in range(mp.get_input_connection_count()):
-                crx, cry = get_pixelpos(*mp.get_input_connection_plugin(index).get_position())
-                cpx, cpy = (crx + rx) * 0.5, (cry + ry) * 0.5
-                dx, dy = cpx - mx, cpy - my
-                length = (dx * dx + dy * dy) ** 0.5
-                if length <= 14:  # why exactly 14?
-                    return mp, index
+        return self.index.get_connection_at(mx, my)
 
     def get_plugin_at(self, xy):
         """
@@ -780,26 +957,16 @@ class RouteView(Gtk.DrawingArea):
         @return: A connection item, exact pixel position and area (AREA_ANY, AREA_PANNING, AREA_LED) or None.
         @rtype: (zzub.Plugin,(int,int),int) or None
         """
-        rect = self.get_allocation()
-        w, h = rect.width, rect.height
-        cx, cy = w * 0.5, h * 0.5
         mx, my = xy
+        res = self.index.get_plugin_at(mx, my)
+        if not res:
+            return None
+        mp, (x, y) = res
         PW, PH = PLUGINWIDTH / 2, PLUGINHEIGHT / 2
         area = AREA_ANY
-        player = com.get('neil.core.player')
-        for mp in reversed(list(player.get_plugin_list())):
-            pi = common.get_plugin_infos().get(mp)
-            if not pi.songplugin:
-                continue
-            x, y = mp.get_position()
-            # the mp position is between -1 and 1, add 1 to get it between 0 and 2, then multiply by half of
-            # the width/height to convert to widget coordinates
-            x, y = int(cx * (1 + x)), int(cy * (1 + y))
-            # check if the coordinates passed in fall within the bounds of the plugin's box
-            if (mx >= (x - PW)) and (mx <= (x + PW)) and (my >= (y - PH)) and (my <= (y + PH)):
-                if sum(tuple(Gdk.Rectangle(x - PW + LEDOFSX, y - PH + LEDOFSY, LEDWIDTH, LEDHEIGHT).intersect((mx, my, 1, 1)))):
-                    area = AREA_LED
-                return mp, (x, y), area
+        if sum(tuple(Gdk.Rectangle(x - PW + LEDOFSX, y - PH + LEDOFSY, LEDWIDTH, LEDHEIGHT).intersect((mx, my, 1, 1)))):
+            area = AREA_LED
+        return mp, (x, y), area
 
     def on_left_dclick(self, widget, event):
         """
@@ -978,29 +1145,71 @@ class RouteView(Gtk.DrawingArea):
         #       return True
         if self.get_parent_window():
             player = com.get('neil.core.player')
-            rect = self.get_allocation()
-            w, h = rect.width, rect.height
-            cx, cy = w * 0.5, h * 0.5
-
-            def get_pixelpos(x, y):
-                return cx * (1 + x), cy * (1 + y)
+            if player.is_loading():
+                return True
+            driver = com.get('neil.core.driver.audio')
+            cpu_scale = driver.get_cpu_load()
+            max_cpu_scale = 1.0 / player.get_plugin_count()
             PW, PH = PLUGINWIDTH / 2, PLUGINHEIGHT / 2
-            for mp, (rx, ry) in ((mp, get_pixelpos(*mp.get_position())) for mp in player.get_plugin_list()):
+            for mp in player.get_plugin_list():
+                pi = common.get_plugin_infos().get(mp)
+                if not pi.songplugin:
+                    continue
+                # only plugins whose leds look different need a repaint
+                if pi.plugingfx and self.get_led_state(mp, cpu_scale, max_cpu_scale) == (pi.amp, pi.cpu):
+                    continue
+                if self.dragging and mp in player.active_plugins:
+                    rx, ry = self.float_to_pixel(pi.dragpos)
+                else:
+                    rx, ry = self.float_to_pixel(mp.get_position())
                 rx, ry = rx - PW, ry - PH
                 self.get_parent_window().invalidate_rect(Gdk.Rectangle(int(rx), int(ry), PLUGINWIDTH, PLUGINHEIGHT), False)
         return True
 
+    def get_led_state(self, mp, cpu_scale, max_cpu_scale):
+        """
+        Returns the state of the amp and cpu leds of a plugin, quantized
+        to what the leds can show.
+
+        @return: Amp led state (LED_SLEEPING, LED_CLIPPING or the height
+        of the fill) and cpu led state (height of the fill, and whether
+        it is in the warning range).
+        @rtype: (int, (int, bool))
+        """
+        if mp.is_sleeping():
+            amp = LED_SLEEPING
+        else:
+            maxl, maxr = mp.get_last_peak()
+            amp = min(max(maxl, maxr), 1.0)
+            if amp >= 1:
+                amp = LED_CLIPPING
+            else:
+                amp = 1.0 - (linear2db(amp, -76.0) / -76.0)
+                amp = int((LEDHEIGHT - 4) * amp + 0.5)
+        relperc = (min(1.0, mp.get_last_cpu_load() / max_cpu_scale) * cpu_scale)
+        height = int((CPUHEIGHT - 4) * relperc + 0.5)
+        return amp, (height, height > 0 and relperc >= 0.9)
+
     def expose(self, widget, context):
         self.context = context
         self.draw(self.context)
         return False
 
     def redraw(self):
+        """
+        Repaints the view from its cached layers.
+        """
         if self.get_parent_window():
-            self.routebitmap = None
             rect = self.get_allocation()
             self.get_parent_window().invalidate_rect(rect, False)
 
+    def redraw_connections(self, *args):
+        """
+        Renders the connection layer again and repaints the view.
+        """
+        self.routebitmap = None
+        self.redraw()
+
     def draw_leds(self, ctx):
         """
         Draws only the leds into the offscreen buffer.
@@ -1022,6 +1231,7 @@ class RouteView(Gtk.DrawingArea):
         driver = com.get('neil.core.driver.audio')
         cpu_scale = driver.get_cpu_load()
         max_cpu_scale = 1.0 / player.get_plugin_count()
+        clip_x1, clip_y1, clip_x2, clip_y2 = ctx.clip_extents()
         for mp, (rx, ry) in ((mp, get_pixelpos(*mp.get_position())) for mp in player.get_plugin_list()):
             pi = common.get_plugin_infos().get(mp)
             if not pi.songplugin:
@@ -1030,8 +1240,9 @@ class RouteView(Gtk.DrawingArea):
                 pinfo = self.get_plugin_info(mp)
                 rx, ry = get_pixelpos(*pinfo.dragpos)
             rx, ry = rx - PW, ry - PH
-            pi = common.get_plugin_infos().get(mp)
-            if not pi:
+            # skip plugins outside of the repainted area, shadow included
+            if (rx > clip_x2 or ry > clip_y2 or
+                rx + PLUGINWIDTH + 3 < clip_x1 or ry + PLUGINHEIGHT + 3 < clip_y1):
                 continue
             brushes = self.flags2brushes.get(mp.get_flags() & PLUGIN_FLAGS_MASK,
                                              self.flags2brushes[GENERATOR_PLUGIN_FLAGS])
@@ -1051,9 +1262,16 @@ class RouteView(Gtk.DrawingArea):
                 pctx.fill()
 
                 # outer border
-                pctx.set_source_rgb(*brushes[self.COLOR_BORDER_OUT])
+                pi.unreachable = mp.is_unreachable()
+                if pi.unreachable:
+                    # not connected to the master, so the engine skips it
+                    pctx.set_source_rgb(*brushes[self.COLOR_LED_WARNING])
+                    pctx.set_dash([3.0, 2.0])
+                else:
+                    pctx.set_source_rgb(*brushes[self.COLOR_BORDER_OUT])
                 pctx.rectangle(0, 0, PLUGINWIDTH - 1, PLUGINHEIGHT - 1)
                 pctx.stroke()
+                pctx.set_dash([])
 
                 #  inner border
                 r, g, b = color
@@ -1089,54 +1307,39 @@ class RouteView(Gtk.DrawingArea):
             else:
                 pctx = cairo.Context(pi.plugingfx)
             if config.get_config().get_led_draw() == True:
-                # led border
-                r, g, b = brushes[self.COLOR_MUTED if pi.muted else self.COLOR_DEFAULT]
-                border = blend(Gdk.Color(red=r, green=g, blue=b), Gdk.Color(red=0, green=0, blue=0), 0.5)
-                pctx.set_source_rgb(border.red_float, border.green_float, border.blue_float)
-                pctx.rectangle(LEDOFSX, LEDOFSY, LEDWIDTH - 1, LEDHEIGHT - 1)
-                pctx.stroke()
-
-                maxl, maxr = mp.get_last_peak()
-                amp = min(max(maxl, maxr), 1.0)
+                amp, cpu = self.get_led_state(mp, cpu_scale, max_cpu_scale)
                 if amp != pi.amp:
-                    if amp >= 1:
-                        # from collections import deque
-                        # if not mp.get_name() in self.peaks:
-                            # self.peaks[mp.get_name()] = deque(maxlen=25)
-                        # dq = self.peaks[mp.get_name()]
-                        # dq.append(LEDHEIGHT - 4)
-
+                    pi.amp = amp
+                    # led border
+                    r, g, b = brushes[self.COLOR_MUTED if pi.muted else self.COLOR_DEFAULT]
+                    border = blend(Gdk.Color(red=r, green=g, blue=b), Gdk.Color(red=0, green=0, blue=0), 0.5)
+                    pctx.set_source_rgb(border.red_float, border.green_float, border.blue_float)
+                    pctx.rectangle(LEDOFSX, LEDOFSY, LEDWIDTH - 1, LEDHEIGHT - 1)
+                    pctx.stroke()
+                    if amp == LED_SLEEPING:
+                        # a sleeping effect is not processed, show a dimmed led
+                        pctx.set_source_rgb(*brushes[self.COLOR_LED_OFF])
+                        pctx.rectangle(LEDOFSX, LEDOFSY, LEDWIDTH, LEDHEIGHT)
+                        pctx.fill()
+                        pctx.set_source_rgb(*brushes[self.COLOR_LED_BORDER])
+                        pctx.rectangle(LEDOFSX + 2, LEDOFSY + 2, LEDWIDTH - 4, LEDHEIGHT - 4)
+                        pctx.fill()
+                    elif amp == LED_CLIPPING:
                         pctx.set_source_rgb(*brushes[self.COLOR_LED_WARNING])
                         pctx.rectangle(LEDOFSX + 1, LEDOFSY + 1, LEDWIDTH - 2, LEDHEIGHT - 2)
                         pctx.fill()
-
                     else:
                         pctx.set_source_rgb(*brushes[self.COLOR_LED_OFF])
                         pctx.rectangle(LEDOFSX, LEDOFSY, LEDWIDTH, LEDHEIGHT)
                         pctx.fill()
-                        amp = 1.0 - (linear2db(amp, -76.0) / -76.0)
-                        height = int((LEDHEIGHT - 4) * amp + 0.5)
+                        height = amp
                         if (height > 0):
                             # led fill
                             pctx.set_source_rgb(*brushes[self.COLOR_LED_ON])
                             pctx.rectangle(LEDOFSX + 1, (LEDOFSY + LEDHEIGHT - height - 1), LEDWIDTH - 2, height)
                             pctx.fill()
-                            # # peak falloff
-                            # from collections import deque
-                            # if not mp.get_name() in self.peaks:
-                            #     self.peaks[mp.get_name()] = deque(maxlen=25)
-                            # dq = self.peaks[mp.get_name()]
-                            # dq.append(height)
-
-                            # peak_color = cm.alloc_color(blend(cm.alloc_color(brushes[self.COLOR_LED_ON]), gtk.gdk.Color("#fff"), 0.15))
-                            # h = LEDOFSY + LEDHEIGHT - 1 - max(height, sum(dq)/len(dq))
-                            # gc.set_foreground(peak_color)
-                            # pi.plugingfx.draw_line(gc, LEDOFSX + 1, h, LEDOFSX + LEDWIDTH - 2, h)
-
-                    pi.amp = amp
-                relperc = (min(1.0, mp.get_last_cpu_load() / max_cpu_scale) * cpu_scale)
-                if relperc != pi.cpu:
-                    pi.cpu = relperc
+                if cpu != pi.cpu:
+                    pi.cpu = cpu
 
                     # cpu fill
                     pctx.set_source_rgb(*brushes[self.COLOR_CPU_OFF])
@@ -1151,9 +1354,9 @@ class RouteView(Gtk.DrawingArea):
                     pctx.rectangle(CPUOFSX, CPUOFSY, CPUWIDTH - 1, CPUHEIGHT - 1)
                     pctx.stroke()
 
-                    height = int((CPUHEIGHT - 4) * relperc + 0.5)
+                    height, warning = cpu
                     if (height > 0):
-                        if relperc >= 0.9:
+                        if warning:
                             pctx.set_source_rgb(*brushes[self.COLOR_CPU_WARNING])
                         else:
                             pctx.set_source_rgb(*brushes[self.COLOR_CPU_ON])
@@ -1297,46 +1500,60 @@ class RouteView(Gtk.DrawingArea):
 
             bmpctx.restore()
 
-        if not self.routebitmap:
+        def get_plugin_pixelpos(mp):
+            if self.dragging and mp in player.active_plugins:
+                return get_pixelpos(*self.get_plugin_info(mp).dragpos)
+            return get_pixelpos(*mp.get_position())
+
+        def draw_connection(bmpctx, mp, index):
+            targetmp = mp.get_input_connection_plugin(index)
+            pi = common.get_plugin_infos().get(targetmp)
+            if not pi.songplugin:
+                return
+            rx, ry = get_plugin_pixelpos(mp)
+            crx, cry = get_plugin_pixelpos(targetmp)
+            if (mp.get_input_connection_type(index) !=
+                zzub.zzub_connection_type_event):
+                amp = mp.get_parameter_value(0, index, 0)
+                amp /= 16384.0
+                amp = amp ** 0.5
+                #color = [amp, amp, amp]
+                #arrowcolors[zzub.zzub_connection_type_audio][0] = color
+                r, g, b = cfg.get_float_color("MV Arrow")
+                c = blend(Gdk.Color(red=r, green=g, blue=b), Gdk.Color(red=0, green=0, blue=0), amp)
+                arrowcolors[zzub.zzub_connection_type_audio][0] = [c.red_float, c.green_float, c.blue_float]
+
+            draw_line_arrow(bmpctx, arrowcolors[mp.get_input_connection_type(index)], int(crx), int(cry), int(rx), int(ry))
+
+        # the connection layer leaves out the connections of dragged
+        # plugins, which are drawn on top of it for every frame instead
+        dragged = self.dragging and set(player.active_plugins) or set()
+        if not self.routebitmap or dragged != self.routebitmap_dragged:
             self.routebitmap = cairo.ImageSurface(cairo.Format.ARGB32, w, h)
+            self.routebitmap_dragged = dragged
+            self.dragged_connections = []
+            self.plugin_positions = {}
             bmpctx = cairo.Context(self.routebitmap)
-            bmpctx.set_source_rgb(*cfg.get_float_color('MV Background'))
-            bmpctx.rectangle(0, 0, w, h)
-            bmpctx.fill()
-
             bmpctx.translate(0.5, 0.5)
             bmpctx.set_line_width(1)
-            mplist = [(mp, get_pixelpos(*mp.get_position()))
-                      for mp in player.get_plugin_list()]
-
-            for mp, (rx, ry) in mplist:
-                if self.dragging and mp in player.active_plugins:
-                    pinfo = self.get_plugin_info(mp)
-                    rx, ry = get_pixelpos(*pinfo.dragpos)
+            for mp in player.get_plugin_list():
+                self.plugin_positions[mp] = mp.get_position()
                 for index in range(mp.get_input_connection_count()):
-                    targetmp = mp.get_input_connection_plugin(index)
-                    pi = common.get_plugin_infos().get(targetmp)
-                    if not pi.songplugin:
-                        continue
-                    tmppos = targetmp.get_position()
-                    if self.dragging and targetmp in player.active_plugins:
-                        pinfo = self.get_plugin_info(targetmp)
-                        tmppos = pinfo.dragpos
-                    crx, cry = get_pixelpos(*tmppos)
-                    if (mp.get_input_connection_type(index) !=
-                        zzub.zzub_connection_type_event):
-                        amp = mp.get_parameter_value(0, index, 0)
-                        amp /= 16384.0
-                        amp = amp ** 0.5
-                        #color = [amp, amp, amp]
-                        #arrowcolors[zzub.zzub_connection_type_audio][0] = color
-                        r, g, b = cfg.get_float_color("MV Arrow")
-                        c = blend(Gdk.Color(red=r, green=g, blue=b), Gdk.Color(red=0, green=0, blue=0), amp)
-                        arrowcolors[zzub.zzub_connection_type_audio][0] = [c.red_float, c.green_float, c.blue_float]
-
-                    draw_line_arrow(bmpctx, arrowcolors[mp.get_input_connection_type(index)], int(crx), int(cry), int(rx), int(ry))
+                    if mp in dragged or mp.get_input_connection_plugin(index) in dragged:
+                        self.dragged_connections.append((mp, index))
+                    else:
+                        draw_connection(bmpctx, mp, index)
+        ctx.set_source_rgb(*bgbrush)
+        ctx.paint()
         ctx.set_source_surface(self.routebitmap, 0, 0)
         ctx.paint()
+        if self.dragged_connections:
+            ctx.save()
+            ctx.translate(0.5, 0.5)
+            ctx.set_line_width(1)
+            for mp, index in self.dragged_connections:
+                draw_connection(ctx, mp, index)
+            ctx.restore()
         if self.connecting:
             ctx.set_line_width(1)
             crx, cry = get_pixelpos(*player.active_plugins[0].get_position())
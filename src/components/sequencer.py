@@ -35,6 +35,12 @@ from gi.repository import PangoCairo
 from gi.repository import GObject
 import cairo
 import sys
+import bisect
+import collections
+import hashlib
+import queue
+import threading
+import numpy as np
 # from neil.utils import PLUGIN_FLAGS_MASK, ROOT_PLUGIN_FLAGS
 # from neil.utils import GENERATOR_PLUGIN_FLAGS, EFFECT_PLUGIN_FLAGS
 # from neil.utils import CONTROLLER_PLUGIN_FLAGS
@@ -42,10 +48,12 @@ from neil.utils import prepstr, get_item_count
 from neil.utils import get_clipboard_text, set_clipboard_text, add_scrollbars
 from neil.utils import is_effect, is_generator, is_controller
 from neil.utils import is_root, get_new_pattern_name
-from neil.utils import Menu, wave_names_generator
+from neil.utils import Menu, wave_names_generator, error
+from neil.utils import get_parameter_formatter, PlayheadOverlay, get_pattern_block
 import random
 import config
 import neil.common as common
+import neil.freeze as freeze
 MARGIN = common.MARGIN
 MARGIN2 = common.MARGIN2
 MARGIN3 = common.MARGIN3
@@ -66,6 +74,172 @@ class PatternNotFoundException(Exception):
     pass
 
 
+def render_thumbnail(columns, rows, width, height, bars):
+    """
+    Renders the values of a pattern as dots, or as bars for controller
+    patterns, into a transparent surface. Only uses numpy and cairo, so
+    it may run outside of the gui thread.
+
+    @param columns: List of (value_min, value_max, value_none, values)
+    tuples, values being an array of at least rows values.
+    @type columns: list
+    @return: The rendered thumbnail.
+    @rtype: cairo.ImageSurface
+    """
+    stride = cairo.ImageSurface.format_stride_for_width(cairo.Format.ARGB32, width)
+    pixels = np.zeros((height, stride // 4), dtype=np.uint32)
+    color = np.uint32(0xff404040)  # 25% gray
+    row_x = (1 + width * np.arange(rows + 1) / float(rows)).astype(int)
+    for value_min, value_max, value_none, values in columns:
+        v = np.asarray(values[:rows], dtype=np.int64)
+        used = np.nonzero(v != value_none)[0]
+        scaled = (v[used] - value_min) / float(max(value_max - value_min, 1))
+        ys = (1 + (height - 2) * (1.0 - scaled)).astype(int)
+        if bars:
+            # two pixels high, from row to row
+            for row, y in zip(used, ys):
+                pixels[max(y - 1, 0):max(y + 1, 0), row_x[row]:min(row_x[row + 1], width)] = color
+        else:
+            # 2x2 dots
+            xs = row_x[used]
+            for dx in (0, 1):
+                for dy in (0, 1):
+                    inside = (xs + dx < width) & (ys + dy >= 0) & (ys + dy < height)
+                    pixels[ys[inside] + dy, xs[inside] + dx] = color
+    data = bytearray(pixels.tobytes())
+    return cairo.ImageSurface.create_for_data(data, cairo.Format.ARGB32, width, height, stride)
+
+
+class SequenceIndex:
+    """
+    Sorted event positions and values of each sequencer track, so that
+    the events in view can be found by bisection.
+
+    A track is read from zzub when it is first needed, and then kept up
+    to date from set_sequence_event events. Anything which changes many
+    events at once resets the index.
+    """
+
+    def __init__(self):
+        self.tracks = {}
+
+    def reset(self, *args):
+        self.tracks = {}
+
+    def get_track(self, index, track):
+        """
+        Returns the events of a track.
+
+        @param index: Track index.
+        @type index: int
+        @param track: The track.
+        @type track: zzub.Sequence
+        @return: Lists of positions and values, sorted by position.
+        @rtype: ([int, ...], [int, ...])
+        """
+        events = self.tracks.get(index)
+        if events is None:
+            event_list = track.get_event_list()
+            events = ([pos for pos, value in event_list], [value for pos, value in event_list])
+            self.tracks[index] = events
+        return events
+
+    def set_event(self, index, track, pos):
+        """
+        Updates the event of a track at a position.
+        """
+        events = self.tracks.get(index)
+        if events is None:
+            return
+        positions, values = events
+        value = track.get_event_at(pos)
+        i = bisect.bisect_left(positions, pos)
+        found = i < len(positions) and positions[i] == pos
+        if value == -1:
+            if found:
+                del positions[i]
+                del values[i]
+        elif found:
+            values[i] = value
+        else:
+            positions.insert(i, pos)
+            values.insert(i, value)
+
+    def get_range(self, index, track, start, end):
+        """
+        Returns the indices of the events of a track which can be seen
+        between start and end. This includes the last event before start,
+        which may reach into view; all earlier events are cut off by it.
+
+        @return: First index and the index after the last one.
+        @rtype: (int, int)
+        """
+        positions, values = self.get_track(index, track)
+        first = max(bisect.bisect_right(positions, start) - 1, 0)
+        return first, bisect.bisect_left(positions, end)
+
+
+class ThumbnailCache:
+    """
+    Pattern thumbnails by content, shared by all patterns with the same
+    values and size, and rendered by a background thread.
+
+    Thumbnails are dropped least recently used first once they take
+    more than max_bytes.
+    """
+
+    def __init__(self, max_bytes=16 << 20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.thumbnails = collections.OrderedDict()
+        self.pending = set()
+        self.jobs = queue.Queue()
+        self.thread = None
+
+    def get(self, key):
+        """
+        Returns the thumbnail for a key, or None if it has not been
+        rendered yet.
+        """
+        thumbnail = self.thumbnails.get(key)
+        if thumbnail is not None:
+            self.thumbnails.move_to_end(key)
+        return thumbnail
+
+    def is_pending(self, key):
+        return key in self.pending
+
+    def request(self, key, columns, rows, width, height, bars, callback):
+        """
+        Queues a thumbnail for rendering. callback is called from the gui
+        thread once it is ready.
+        """
+        if key in self.pending:
+            return
+        self.pending.add(key)
+        if not self.thread:
+            self.thread = threading.Thread(target=self.run)
+            self.thread.daemon = True
+            self.thread.start()
+        self.jobs.put((key, columns, rows, width, height, bars, callback))
+
+    def run(self):
+        while True:
+            key, columns, rows, width, height, bars, callback = self.jobs.get()
+            thumbnail = render_thumbnail(columns, rows, width, height, bars)
+            GObject.idle_add(self.finish, key, thumbnail, callback)
+
+    def finish(self, key, thumbnail, callback):
+        self.pending.discard(key)
+        self.thumbnails[key] = thumbnail
+        self.size += thumbnail.get_stride() * thumbnail.get_height()
+        while self.size > self.max_bytes and len(self.thumbnails) > 1:
+            _, old = self.thumbnails.popitem(last=False)
+            self.size -= old.get_stride() * old.get_height()
+        callback()
+        return False
+
+
 class AddSequencerTrackDialog(Gtk.Dialog):
     """
     Sequencer Dialog Box.
@@ -506,10 +680,23 @@ class SequencerView(Gtk.DrawingArea):
         self.connect('scroll-event', self.on_mousewheel)
         self.hscroll.connect('change-value', self.on_hscroll_window)
         self.vscroll.connect('change-value', self.on_vscroll_window)
-        GObject.timeout_add(100, self.update_position)
+        self.playhead = PlayheadOverlay(self)
+        self.thumbnails = ThumbnailCache()
+        self.events = SequenceIndex()
         eventbus = com.get('neil.core.eventbus')
+        eventbus.play_position_changed += self.on_play_position_changed
+        eventbus.zzub_edit_pattern += self.on_pattern_content_changed
+        eventbus.zzub_pattern_changed += self.on_pattern_content_changed
+        eventbus.zzub_pattern_insert_rows += self.on_pattern_content_changed
+        eventbus.zzub_pattern_remove_rows += self.on_pattern_content_changed
+        eventbus.zzub_new_pattern += self.on_pattern_list_changed
+        eventbus.zzub_delete_pattern += self.on_pattern_list_changed
+        eventbus.zzub_sequencer_changed += self.events.reset
+        eventbus.zzub_set_sequence_tracks += self.events.reset
+        eventbus.zzub_sequencer_remove_track += self.events.reset
+        eventbus.document_loaded += self.events.reset
         eventbus.zzub_sequencer_changed += self.redraw
-        eventbus.zzub_set_sequence_event += self.redraw
+        eventbus.zzub_set_sequence_event += self.on_set_sequence_event
         eventbus.document_loaded += self.redraw
         set_clipboard_text("invalid_clipboard_data")
 
@@ -923,6 +1110,88 @@ class SequencerView(Gtk.DrawingArea):
         player.flush(None, None)
         player.history_flush_last()
 
+    def get_track_plugin(self):
+        """
+        Returns the plugin of the track at the cursor, or None.
+        """
+        player = com.get('neil.core.player')
+        seq = player.get_current_sequencer()
+        if self.track < 0 or self.track >= seq.get_sequence_track_count():
+            return None
+        return seq.get_track_list()[self.track].get_plugin()
+
+    def on_popup_freeze_track(self, widget):
+        """
+        Callback that renders the generator of the current track and its
+        effect chain into a wave, and plays the wave in their place.
+        """
+        player = com.get('neil.core.player')
+        plugin = self.get_track_plugin()
+        chain = freeze.find_chain(plugin)
+        driver = com.get('neil.core.driver.audio')
+        try:
+            process, wavepath = freeze.start_render(player, chain, driver.samplerate)
+        except IOError as e:
+            error(self, "<b><big>Could not freeze the track.</big></b>\n\n%s" % e)
+            return
+        dialog = Gtk.Dialog(
+            "Freezing",
+            buttons=(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL)
+            )
+        names = ', '.join([plugin.get_name() for plugin in chain])
+        dialog.vbox.add(Gtk.Label("Rendering %s..." % prepstr(names)))
+        progress = Gtk.ProgressBar()
+        dialog.vbox.add(progress)
+        dialog.show_all()
+
+        def on_timer():
+            if process.is_alive():
+                progress.pulse()
+                return True
+            dialog.response(Gtk.ResponseType.OK)
+            return False
+        timer = GObject.timeout_add(100, on_timer)
+        response = dialog.run()
+        if response != Gtk.ResponseType.OK:
+            GObject.source_remove(timer)
+        dialog.destroy()
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        try:
+            if response != Gtk.ResponseType.OK:
+                return
+            if process.exitcode != 0:
+                error(self, "<b><big>Could not freeze the track.</big></b>\n\nRendering failed.")
+                return
+            try:
+                frozen = freeze.finish_freeze(player, chain, wavepath)
+            except (IOError, RuntimeError) as e:
+                error(self, "<b><big>Could not freeze the track.</big></b>\n\n%s" % e)
+                return
+        finally:
+            freeze.remove_render(wavepath)
+        for plugin in chain:
+            info = common.get_plugin_infos().get(plugin)
+            info.frozen = frozen
+            info.reset_plugingfx()
+        self.redraw()
+
+    def on_popup_unfreeze_track(self, widget):
+        """
+        Callback that removes the wave of a frozen track and brings back
+        its generator and effects.
+        """
+        player = com.get('neil.core.player')
+        frozen = common.get_plugin_infos().get(self.get_track_plugin()).frozen
+        freeze.unfreeze(player, frozen)
+        for plugin in frozen.chain:
+            info = common.get_plugin_infos().get(plugin)
+            if info:
+                info.frozen = None
+                info.reset_plugingfx()
+        self.redraw()
+
     def on_context_menu(self, event):
         """
         Callback that constructs and displays the popup menu
@@ -957,6 +1226,13 @@ class SequencerView(Gtk.DrawingArea):
         menu.add_item("Set loop end", self.set_loop_end)
         menu.add_separator()
         menu.add_submenu("Record loop", wavemenu)
+        plugin = self.get_track_plugin()
+        info = plugin and common.get_plugin_infos().get(plugin)
+        if info and info.frozen:
+            menu.add_item("Unfreeze track", self.on_popup_unfreeze_track)
+        else:
+            menu.add_item("Freeze track", self.on_popup_freeze_track).set_sensitive(
+                bool(plugin) and is_generator(plugin))
         menu.add_separator()
         menu.add_item("Cut", self.on_popup_cut).set_sensitive(sel_sensitive)
         menu.add_item("Copy", self.on_popup_copy).set_sensitive(sel_sensitive)
@@ -1347,6 +1623,7 @@ class SequencerView(Gtk.DrawingArea):
 
     def redraw(self, *args):
         if self.get_parent_window() and self.get_parent_window().is_visible():
+            self.playhead.invalidate()
             rect = self.get_allocation()
             self.get_parent_window().invalidate_rect(rect, False)
 
@@ -1362,24 +1639,18 @@ class SequencerView(Gtk.DrawingArea):
                 self.dragging = False
                 self.grab_remove()
 
-    def update_position(self):
+    def on_play_position_changed(self, playpos):
         """
-        Updates the position.
+        Moves the play cursor, scrolling along if the song is followed.
+        Otherwise only the columns the cursor passes are repainted.
         """
-        #TODO: find a better way to find out whether we are visible
-        #if self.rootwindow.get_current_panel() != self.panel:
-        #       return True
-        player = com.get('neil.core.player')
-        playpos = player.get_position()
-        if self.playpos != playpos:
-            if self.panel.toolbar.followsong.get_active():
-                if playpos >= self.get_endrow() or playpos < self.startseqtime:
-                    self.startseqtime = playpos / self.step * self.step
-                    self.redraw()
-            #self.draw_cursors()
-            self.playpos = playpos
-            self.redraw()
-        return True
+        self.playpos = playpos
+        if self.panel.toolbar.followsong.get_active():
+            if playpos >= self.get_endrow() or playpos < self.startseqtime:
+                self.startseqtime = playpos // self.step * self.step
+                self.redraw()
+        if self.get_parent_window() and self.get_parent_window().is_visible():
+            self.playhead.move(self.get_playpos_rect())
 
     def on_vscroll_window(self, widget, scroll, value):
         """
@@ -1518,19 +1789,32 @@ class SequencerView(Gtk.DrawingArea):
                 ctx.set_source_rgba(1.0, 0.0, 0.0, 0.3)
                 ctx.fill()
 
+    def get_playpos_rect(self):
+        """
+        Returns the rectangle of the play cursor, or None if it is
+        scrolled out of view.
+
+        @rtype: (int, int, int, int)
+        """
+        if self.playpos < self.startseqtime:
+            return None
+        width, height = self.get_client_size()
+        x = self.seq_left_margin + int((float(self.playpos - self.startseqtime) / self.step) * self.seq_row_size) + 1
+        return (x, 1, 1, height - 1)
+
     def draw_playpos(self, ctx):
         if not self.get_parent_window():
             return
         # player = com.get('neil.core.player')
         white = (1, 1, 1)
-        width, height = self.get_client_size()
-        if self.playpos >= self.startseqtime:
+        rect = self.get_playpos_rect()
+        if rect:
             ctx.set_source_rgb(*white)
             ctx.set_operator(cairo.Operator.XOR)
-            x = self.seq_left_margin + int((float(self.playpos - self.startseqtime) / self.step) * self.seq_row_size) + 1
-            ctx.rectangle(x, 1, 1, height - 1)
+            ctx.rectangle(*rect)
             ctx.fill()
             ctx.set_operator(cairo.Operator.OVER)
+        return rect
 
     def update(self):
         """
@@ -1571,6 +1855,81 @@ class SequencerView(Gtk.DrawingArea):
         b = (int(random.random() * 105) + 150) / 255
         return (r, g, b)
 
+    def get_thumbnail_columns(self, plugin, pattern, index, bars):
+        """
+        Reads the values shown in the thumbnail of a pattern, with one
+        call into zzub per group.
+
+        @return: List of (value_min, value_max, value_none, values) tuples.
+        @rtype: list
+        """
+        rows = pattern.get_row_count()
+        if bars:
+            # controllers show their first global parameter
+            f = get_parameter_formatter(plugin, 1, 0, 0)
+            values = get_pattern_block(plugin, index, 1, 0, 1, 0, 1, 0, rows)
+            return [(f.value_min, f.value_max, f.value_none, values)]
+        columns = []
+        for group in range(pattern.get_group_count()):
+            track_count = pattern.get_track_count(group)
+            if not track_count:
+                continue
+            # connections may differ in their columns
+            blocks = group == 0 and [(t, 1) for t in range(track_count)] or [(0, track_count)]
+            for first, tracks in blocks:
+                count = pattern.get_column_count(group, first)
+                values = get_pattern_block(plugin, index, group, first, tracks, 0, count, 0, rows)
+                for t in range(tracks):
+                    for col in range(count):
+                        f = get_parameter_formatter(plugin, group, first + t, col)
+                        if f.type in [0, 2, 3]:
+                            offset = (t * count + col) * rows
+                            columns.append((f.value_min, f.value_max, f.value_none, values[offset:offset + rows]))
+        return columns
+
+    def get_thumbnail(self, plugin, plugin_info, pattern, value, length, width, height):
+        """
+        Returns the thumbnail of a pattern box, or None while it is
+        being rendered in the background.
+        """
+        bars = plugin.get_pluginloader().get_uri() == '@neil/lunar/controller/Control;1'
+        columns = None
+        # patterngfx holds a digest of the pattern values per sequence value
+        digest = plugin_info.patterngfx.get(value)
+        if digest is None:
+            columns = self.get_thumbnail_columns(plugin, pattern, value - 0x10, bars)
+            h = hashlib.sha1(repr([(bars, c[0], c[1], c[2]) for c in columns]).encode())
+            for c in columns:
+                h.update(c[3].tobytes())
+            digest = h.hexdigest()
+            plugin_info.patterngfx[value] = digest
+        key = (digest, length, width, height)
+        thumbnail = self.thumbnails.get(key)
+        if thumbnail is None and not self.thumbnails.is_pending(key):
+            if columns is None:
+                columns = self.get_thumbnail_columns(plugin, pattern, value - 0x10, bars)
+            self.thumbnails.request(key, columns, length, width, height, bars, self.redraw)
+        return thumbnail
+
+    def on_pattern_content_changed(self, plugin, index, *args):
+        """
+        Drops the digest of a changed pattern, so its thumbnail is looked
+        up again.
+        """
+        self.plugin_info.get(plugin).patterngfx.pop(index + 0x10, None)
+        self.redraw()
+
+    def on_pattern_list_changed(self, plugin, *args):
+        self.plugin_info.get(plugin).reset_patterngfx()
+        # sequence values past the pattern are renumbered without events
+        self.events.reset()
+        self.redraw()
+
+    def on_set_sequence_event(self, plugin, track, time):
+        player = com.get('neil.core.player')
+        self.events.set_event(track, player.get_sequence(track), time)
+        self.redraw()
+
     def draw_markers(self, ctx, colors):
         """
         Draw the vertical lines every few bars.
@@ -1625,91 +1984,48 @@ class SequencerView(Gtk.DrawingArea):
         # cfg = config.get_config()
         sequencer = player.get_current_sequencer()
         tracks = sequencer.get_track_list()
+        endseqtime = self.startseqtime + (width / self.seq_row_size) * self.step
         for track_index in range(self.starttrack, len(tracks)):
             track = tracks[track_index]
             plugin = track.get_plugin()
             plugin_info = self.plugin_info.get(plugin)
             # Draw the pattern boxes
-            event_list = list(track.get_event_list())
-            for (position, value), index in zip(event_list, range(len(event_list))):
+            positions, values = self.events.get_track(track_index, track)
+            first, last = self.events.get_range(track_index, track, self.startseqtime, endseqtime)
+            for index in range(first, last):
+                position, value = positions[index], values[index]
                 pattern = None
                 if value >= 0x10:
                     pattern = plugin.get_pattern(value - 0x10)
                     length = pattern.get_row_count()
-                    end = position + length
-                    width_in_bars = (width / self.seq_row_size) * self.step
-                    if ((end >= self.startseqtime) and
-                        (position < self.startseqtime + width_in_bars)):
-                        try:
-                            gfx = plugin_info.patterngfx[value]
-                        except KeyError:
-                            name = prepstr(pattern.get_name())
-                            # Handle the case where the pattern overlaps with the next one.
-                            # This is done by shortening the current pattern so they display nice.
-                            try:
-                                if position + length > event_list[index + 1][0]:
-                                    length -= position + length - event_list[index + 1][0]
-                            except IndexError:
-                                pass
-                            box_size = max(int(((self.seq_row_size * length) / self.step) + 0.5), 4)
-                            gfx_w, gfx_h = box_size - 3, self.seq_track_size - 3
-                            gfx = cairo.ImageSurface(cairo.Format.ARGB32, gfx_w, gfx_h)
-                            gctx = cairo.Context(gfx)
-
-                            x = self.seq_left_margin + ((position - self.startseqtime) * self.seq_row_size / self.step)
-                            pattern_color = self.get_random_color(plugin.get_name() + name)
-                            gctx.set_source_rgba(*pattern_color)
-                            gctx.rectangle(0, 0, gfx_w, gfx_h)
-                            gctx.fill()
-                            if plugin.get_pluginloader().get_uri() == '@neil/lunar/controller/Control;1':
-                                gctx.set_source_rgba(0.25, 0.25, 0.25)
-                                for row in range(length - 1):
-                                    val1 = pattern.get_value(row, 1, 0, 0)
-                                    val2 = pattern.get_value(row, 1, 0, 0)
-                                    param = plugin.get_parameter(1, 0, 0)
-                                    scale = 1.0 / (param.get_value_max() - param.get_value_min())
-                                    if val1 != param.get_value_none() and val2 != param.get_value_none:
-                                        scaled1 = (val1 - param.get_value_min()) * scale
-                                        scaled2 = (val2 - param.get_value_min()) * scale
-                                        gctx.move_to(
-                                                      int(1 + gfx_w * (row / float(length))),
-                                                      int(1 + (gfx_h - 2) * (1.0 - scaled1)))
-                                        gctx.line_to(
-                                                      int(1 + gfx_w * ((row + 1) / float(length))),
-                                                      int(1 + (gfx_h - 2) * (1.0 - scaled2)))
-                                        gctx.stroke()
-                            else:
-                                gctx.set_source_rgba(0.25, 0.25, 0.25)
-                                for row in range(length):
-                                    groups = pattern.get_group_count()
-                                    for group in range(groups):
-                                        tracks_ = pattern.get_track_count(group)
-                                        for track in range(tracks_):
-                                            cols = pattern.get_column_count(group, track)
-                                            for col in range(cols):
-                                                val = pattern.get_value(row, group, track, col)
-                                                param = plugin.get_parameter(group, track, col)
-                                                if param.get_type() in [0, 2, 3]:
-                                                    if val != param.get_value_none():
-                                                        scale = 1.0 / (param.get_value_max() - param.get_value_min())
-                                                        scaled = (val - param.get_value_min()) * scale
-                                                        gctx.rectangle(
-                                                                           int(1 + gfx_w * (row / float(length))),
-                                                                           int(1 + (gfx_h - 2) * (1.0 - scaled)), 2, 2)
-                                                        gctx.fill()
-                            gctx.set_source_rgba(*colors['Border'])
-                            gctx.rectangle(0, 0, gfx_w - 1, gfx_h - 1)
-                            gctx.stroke()
-                            layout.set_markup("<small>%s</small>" % name)
-                            px, py = layout.get_pixel_size()
-                            gctx.set_source_rgba(*colors['Text'])
-                            gctx.move_to(2, 2)
-                            PangoCairo.update_layout(gctx, layout)
-                            PangoCairo.show_layout(gctx, layout)
-                            plugin_info.patterngfx[value] = gfx
+                    if position + length >= self.startseqtime:
+                        name = prepstr(pattern.get_name())
+                        # Handle the case where the pattern overlaps with the next one.
+                        # This is done by shortening the current pattern so they display nice.
+                        if index + 1 < len(positions):
+                            length = min(length, positions[index + 1] - position)
+                        box_size = max(int(((self.seq_row_size * length) / self.step) + 0.5), 4)
+                        gfx_w, gfx_h = box_size - 3, self.seq_track_size - 3
                         x = self.seq_left_margin + ((position - self.startseqtime) * self.seq_row_size / self.step)
-                        ctx.set_source_surface(gfx, x+2, y+2)
+                        ctx.save()
+                        ctx.rectangle(x + 2, y + 2, gfx_w, gfx_h)
+                        ctx.clip()
+                        ctx.set_source_rgba(*self.get_random_color(plugin.get_name() + name))
                         ctx.paint()
+                        thumbnail = self.get_thumbnail(plugin, plugin_info, pattern, value, length, gfx_w, gfx_h)
+                        # nothing but the box until the thumbnail is ready
+                        if thumbnail:
+                            ctx.set_source_surface(thumbnail, x + 2, y + 2)
+                            ctx.paint()
+                        ctx.set_source_rgba(*colors['Border'])
+                        ctx.rectangle(x + 2, y + 2, gfx_w - 1, gfx_h - 1)
+                        ctx.stroke()
+                        layout.set_markup("<small>%s</small>" % name)
+                        ctx.set_source_rgba(*colors['Text'])
+                        ctx.move_to(x + 4, y + 4)
+                        PangoCairo.update_layout(ctx, layout)
+                        PangoCairo.show_layout(ctx, layout)
+                        ctx.restore()
                     if pattern != None:
                         pattern.destroy()
                 elif value == 0x00 or value == 0x01:
@@ -1826,6 +2142,12 @@ class SequencerView(Gtk.DrawingArea):
         Overriding a L{Canvas} method that paints onto an offscreen buffer.
         Draws the pattern view graphics.
         """
+        self.playhead.draw(ctx, self.draw_content, self.draw_playpos)
+
+    def draw_content(self, ctx):
+        """
+        Draws everything but the play cursor.
+        """
         width, height = self.get_client_size()
         cfg = config.get_config()
         colors = {
@@ -1855,7 +2177,6 @@ class SequencerView(Gtk.DrawingArea):
         self.draw_tracks(ctx, colors)
         self.draw_loop_points(ctx, colors)
         self.draw_cursors(ctx)
-        self.draw_playpos(ctx)
         # Draw the black border
         #ctx.set_foreground(colors['Border'])
         #drawable.draw_rectangle(ctx, False, 0, 0, width - 1, height - 1)
@@ -29,7 +29,9 @@ import zzub
 from gi.repository import Gtk
 import time
 import os
+import array
 from neil.utils import prepstr, new_listview, is_generator, message
+from neil.utils import get_pattern_block, set_pattern_block
 
 class TickDoublerDialog(Gtk.Dialog):
 	__neil__ = dict(
@@ -62,33 +64,51 @@ class TickDoublerDialog(Gtk.Dialog):
 		Callback that doubles the length of the current pattern while
 		keeping notes intact
 		"""
-		pattern_indices=[]
-		pattern_contents=[]
 		pl = plugin.get_pluginloader()
-		for r,g,t,i in self.pattern_range(plugin, pattern_index):
-			pattern_indices.append((r,g,t,i))
-			pattern_contents.append(plugin.get_pattern_value(pattern_index, g, t, i, r))
-			param = pl.get_parameter(g,i)
-			plugin.set_pattern_value(pattern_index, g, t, i, r, param.get_value_none())
-		item=0
-		plugin.set_pattern_length(pattern_index, plugin.get_pattern_length(pattern_index)*2)
-		for r,g,t,i in pattern_indices:
-			plugin.set_pattern_value(pattern_index, g, t, i, r*2, pattern_contents[item])	
-			item+=1
+		rows = plugin.get_pattern_length(pattern_index)
+		blocks = []
+		for g,tc,pc in self.pattern_groups(plugin):
+			blocks.append((g, tc, pc, get_pattern_block(plugin, pattern_index, g, 0, tc, 0, pc, 0, rows)))
+		plugin.set_pattern_length(pattern_index, rows*2)
+		for g,tc,pc,values in blocks:
+			doubled = array.array('i')
+			for t in range(tc):
+				for i in range(pc):
+					none = pl.get_parameter(g,i).get_value_none()
+					offset = (t*pc + i)*rows
+					for v in values[offset:offset + rows]:
+						doubled.append(v)
+						doubled.append(none)
+			set_pattern_block(plugin, pattern_index, g, 0, tc, 0, pc, 0, rows*2, doubled)
 		
 	def halve_pattern(self, plugin, pattern_index):
 		"""
 		Callback that halves the length of the current pattern while
 		keeping notes intact
 		"""
-		if  plugin.get_pattern_length(pattern_index)==1:
+		rows = plugin.get_pattern_length(pattern_index)
+		if rows==1:
 			return
-		for r,g,t,i in self.pattern_range(plugin, pattern_index):
-			if r%2:
-				continue
-			plugin.set_pattern_value(pattern_index, g, t, i, r/2, plugin.get_pattern_value(pattern_index, g, t, i, r))	
+		for g,tc,pc in self.pattern_groups(plugin):
+			values = get_pattern_block(plugin, pattern_index, g, 0, tc, 0, pc, 0, rows)
+			halved = array.array('i')
+			for offset in range(0, len(values), rows):
+				halved.extend(values[offset:offset + rows:2][:rows//2])
+			set_pattern_block(plugin, pattern_index, g, 0, tc, 0, pc, 0, rows//2, halved)
 			
-		plugin.set_pattern_length(pattern_index, plugin.get_pattern_length(pattern_index)/2)
+		plugin.set_pattern_length(pattern_index, rows//2)
+
+	def pattern_groups(self, plugin):
+		"""
+		Returns the non-empty parameter groups of a plugin.
+		
+		@return: List of (group, track count, parameter count)
+		@rtype: [(int, int, int), ...]
+		"""
+		group_track_count = [plugin.get_input_connection_count(),  1, plugin.get_track_count()]
+		parameter_count = [plugin.get_pluginloader().get_parameter_count(group) for group in range(3)]
+		return [(group, group_track_count[group], parameter_count[group]) for group in range(3)
+			if group_track_count[group] and parameter_count[group]]
 
 	def pattern_range(self, plugin, pattern_index):
 		"""
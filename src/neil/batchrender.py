@@ -0,0 +1,292 @@
+#encoding: latin-1
+
+# Neil
+# Modular Sequencer
+# Copyright (C) 2006,2007,2008 The Neil Development Team
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Renders many songs in parallel.
+
+Every worker process owns its own player and renders one job at a
+time. Jobs are handed out longest first, as estimated from the song
+transport, so a long song does not start last and hold up the batch.
+A worker which crashes or exceeds the job timeout is killed and
+replaced, and only its current job is reported as failed.
+
+A manifest is either a JSON list of jobs, or a text file naming one
+song per line. A JSON job is a dictionary with a 'song' path and
+optionally 'output', 'range' ([start, end] in ticks), 'tail', 'bits'
+and 'format'.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+import zipfile
+
+def estimate_length(path):
+        """
+        Estimates the length of a song in seconds from the transport
+        stored in a CCM file, without loading the song.
+
+        @return: Seconds, or 0 if the file could not be read.
+        @rtype: float
+        """
+        try:
+                archive = zipfile.ZipFile(path)
+                try:
+                        root = ElementTree.fromstring(archive.read('song.xmix'))
+                finally:
+                        archive.close()
+        except (IOError, KeyError, zipfile.BadZipfile, ElementTree.ParseError):
+                return 0.0
+        transport = root.find('transport')
+        if transport is None:
+                return 0.0
+        try:
+                bpm = float(transport.get('bpm'))
+                # start and end are stored in beats
+                beats = float(transport.get('end')) - float(transport.get('start'))
+        except (TypeError, ValueError):
+                return 0.0
+        if bpm <= 0:
+                return 0.0
+        return max(beats, 0.0) * 60.0 / bpm
+
+def read_manifest(path, outdir='.', fileformat=None):
+        """
+        Reads a manifest and returns a list of job dictionaries, each
+        with at least a 'song' and an 'output' path.
+        """
+        basedir = os.path.dirname(os.path.abspath(path))
+        f = open(path)
+        try:
+                text = f.read()
+        finally:
+                f.close()
+        if path.lower().endswith('.json'):
+                jobs = json.loads(text)
+        else:
+                jobs = []
+                for line in text.splitlines():
+                        line = line.strip()
+                        if line and not line.startswith('#'):
+                                jobs.append(dict(song=line))
+        for job in jobs:
+                job['song'] = os.path.join(basedir, job['song'])
+                if not job.get('output'):
+                        name = os.path.splitext(os.path.basename(job['song']))[0]
+                        job['output'] = os.path.join(outdir, name + '.' + (job.get('format') or fileformat or 'wav'))
+        return jobs
+
+def hash_file(path):
+        """
+        Returns the SHA-256 hex digest of a file.
+        """
+        h = hashlib.sha256()
+        f = open(path, 'rb')
+        try:
+                for block in iter(lambda: f.read(1 << 16), b''):
+                        h.update(block)
+        finally:
+                f.close()
+        return h.hexdigest()
+
+def worker_main(conn, samplerate, buffersize, defaults):
+        """
+        Entry point of a worker process. Receives jobs through conn
+        until None arrives, and sends back a result for each of them.
+        """
+        import neil.render
+        renderer = neil.render.Renderer(samplerate, buffersize)
+        try:
+                while True:
+                        job = conn.recv()
+                        if job is None:
+                                break
+                        result = {}
+                        try:
+                                renderer.load(job['song'])
+                                start, end = job.get('range') or (None, None)
+                                stats = renderer.render(job['output'], start, end,
+                                        job.get('tail', defaults['tail']),
+                                        job.get('bits', defaults['bits']),
+                                        job.get('format', defaults['format']))
+                                result.update(
+                                        status = 'ok',
+                                        duration = stats.get_duration(),
+                                        render_time = stats.elapsed,
+                                        realtime_factor = stats.get_realtime_factor(),
+                                        peak = stats.peak,
+                                        peak_db = stats.get_peak_db(),
+                                        sha256 = hash_file(job['output']),
+                                )
+                        except Exception as e:
+                                result.update(status='error', error=str(e))
+                        conn.send(result)
+        finally:
+                renderer.destroy()
+
+class Worker:
+        """
+        A render process and the job it is currently working on.
+        """
+
+        def __init__(self, context, index, args):
+                self.index = index
+                self.conn, child_conn = context.Pipe()
+                self.process = context.Process(target=worker_main, args=(child_conn,) + args)
+                self.process.daemon = True
+                self.process.start()
+                child_conn.close()
+                self.job = None
+                self.started = None
+
+        def submit(self, index, job):
+                # the index of the job, which the result is stored at
+                self.job = index
+                self.started = time.time()
+                try:
+                        self.conn.send(job)
+                except (IOError, OSError):
+                        # the process died, which is noticed by its sentinel
+                        pass
+
+        def kill(self):
+                self.process.terminate()
+                self.process.join()
+                self.conn.close()
+
+        def stop(self):
+                try:
+                        self.conn.send(None)
+                except (IOError, OSError):
+                        pass
+                self.process.join()
+                self.conn.close()
+
+def render_batch(jobs, workers=1, timeout=None, samplerate=44100, buffersize=512, defaults=None):
+        """
+        Renders a list of jobs as returned by read_manifest.
+
+        @param workers: Number of worker processes.
+        @type workers: int
+        @param timeout: Seconds a single job may take, or None.
+        @type timeout: float
+        @return: List of job results in the order of jobs.
+        @rtype: [dict, ...]
+        """
+        if defaults is None:
+                defaults = dict(tail=0.0, bits=16, format=None)
+        results = []
+        for job in jobs:
+                result = dict(song=job['song'], output=job['output'], estimate=estimate_length(job['song']))
+                results.append(result)
+        # longest processing time first
+        pending = sorted(range(len(jobs)), key=lambda i: -results[i]['estimate'])
+        context = multiprocessing.get_context('spawn')
+        args = (samplerate, buffersize, defaults)
+        count = max(1, min(workers, len(jobs)))
+        pool = [Worker(context, i, args) for i in range(count)]
+        active = []
+        try:
+                while pending or active:
+                        for worker in pool:
+                                if worker.job is None and pending:
+                                        index = pending.pop(0)
+                                        worker.submit(index, jobs[index])
+                                        active.append(worker)
+                        waitfor = [worker.conn for worker in active] + [worker.process.sentinel for worker in active]
+                        wait_timeout = None
+                        if timeout:
+                                wait_timeout = max(0.0, min([worker.started + timeout for worker in active]) - time.time())
+                        ready = multiprocessing.connection.wait(waitfor, wait_timeout)
+                        now = time.time()
+                        for worker in list(active):
+                                result = results[worker.job]
+                                failure = None
+                                if worker.conn in ready:
+                                        try:
+                                                result.update(worker.conn.recv())
+                                        except (EOFError, IOError, OSError):
+                                                failure = 'crashed'
+                                elif worker.process.sentinel in ready:
+                                        failure = 'crashed'
+                                elif timeout and (now - worker.started) > timeout:
+                                        failure = 'timeout'
+                                else:
+                                        continue
+                                result['worker'] = worker.index
+                                active.remove(worker)
+                                worker.job = None
+                                if failure:
+                                        worker.kill()
+                                        result.update(status=failure, render_time=now - worker.started,
+                                                exitcode=worker.process.exitcode)
+                                        # replace the worker, its player state is lost
+                                        if pending:
+                                                pool[pool.index(worker)] = Worker(context, worker.index, args)
+                                        else:
+                                                pool.remove(worker)
+        finally:
+                for worker in pool:
+                        if worker.job is None:
+                                worker.stop()
+                        else:
+                                worker.kill()
+        return results
+
+def run(manifest, options):
+        """
+        Runs a batch from neil-render command line options and writes
+        the JSON report.
+        """
+        jobs = read_manifest(manifest, options.outdir, options.format)
+        defaults = dict(tail=options.tail, bits=options.bits, format=options.format)
+        t1 = time.time()
+        results = render_batch(jobs, options.jobs, options.timeout, options.rate, options.buffersize, defaults)
+        report = dict(
+                manifest = manifest,
+                workers = options.jobs,
+                total_time = time.time() - t1,
+                jobs = results,
+        )
+        if options.report:
+                f = open(options.report, 'w')
+                try:
+                        json.dump(report, f, indent=2)
+                finally:
+                        f.close()
+        else:
+                json.dump(report, sys.stdout, indent=2)
+                print()
+        failed = [result for result in results if result.get('status') != 'ok']
+        if failed and not options.quiet:
+                print("%i of %i jobs failed" % (len(failed), len(results)), file=sys.stderr)
+        return failed and 1 or 0
+
+__all__ = [
+        'estimate_length',
+        'read_manifest',
+        'render_batch',
+        'run',
+]
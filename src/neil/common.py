@@ -45,6 +45,8 @@ class PluginInfo(object):
 		self.plugingfx = None
 		self.patterngfx = {}
 		self.amp = -9999.0
+		self.unreachable = False
+		self.frozen = None
 		self.octave = 3
 		
 	def reset_patterngfx(self):
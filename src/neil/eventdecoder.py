@@ -0,0 +1,219 @@
+#encoding: latin-1
+
+# Neil
+# Modular Sequencer
+# Copyright (C) 2006,2007,2008 The Neil Development Team
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Turns zzub event data into eventbus arguments.
+
+Instead of walking the event data union by name for every event, a
+decoder is built once per event type. It reads each argument straight
+from its precomputed offset in the zzub_event_data_t structure and
+wraps plugin, pattern and other handles into their zzub classes.
+"""
+
+from ctypes import addressof, cast, c_int, c_void_p, _Pointer, _SimpleCData
+import time
+import zzub
+
+def get_member_type(membername):
+        """
+        Returns the structure type of a member of the event data union.
+        """
+        return type(getattr(zzub.EventData(), membername))
+
+def make_reader(offset, argtype):
+        """
+        Returns a function reading a value of type argtype at the given
+        offset from the address of an event.
+        """
+        if issubclass(argtype, _Pointer):
+                wrapper = getattr(argtype._type_, '_wrapper_', None)
+                def read_pointer(address):
+                        handle = c_void_p.from_address(address + offset).value
+                        if not handle:
+                                return None
+                        # cast copies the address, so the result stays valid
+                        # after the event data has been recycled.
+                        if wrapper:
+                                return wrapper._new_from_handle(cast(handle, argtype))
+                        return cast(handle, argtype)
+                return read_pointer
+        if issubclass(argtype, _SimpleCData):
+                def read_value(address):
+                        return argtype.from_address(address + offset).value
+                return read_value
+        return None
+
+def make_decoder(membername):
+        """
+        Builds a decoder for events carrying their arguments in the given
+        member of the event data union.
+
+        @param membername: Name of the union member, or None.
+        @type membername: str
+        @return: Function taking the address of a zzub_event_data_t and
+        returning the list of event arguments.
+        @rtype: callable
+        """
+        if not membername:
+                return lambda address: []
+        datatype = get_member_type(membername)
+        base = getattr(zzub.EventData, membername).offset
+        readers = []
+        for argname, argtype in datatype._fields_:
+                reader = make_reader(base + getattr(datatype, argname).offset, argtype)
+                if not reader:
+                        # arrays and nested structures are rare, read them through ctypes
+                        def reader(address, argname=argname):
+                                return getattr(getattr(zzub.EventData.from_address(address), membername), argname)
+                readers.append(reader)
+        def decode(address):
+                return [reader(address) for reader in readers]
+        return decode
+
+def decode_generic(data, membername, argnames):
+        """
+        Decodes event arguments by name, the way it was done before
+        decoders were precompiled. Kept as a reference for tests and
+        benchmarks.
+        """
+        args = []
+        if membername:
+                specdata = getattr(data, membername)
+                for argname in argnames:
+                        value = getattr(specdata, argname)
+                        if hasattr(value, 'contents'):
+                                class_ = value.contents.__class__
+                                if hasattr(class_, '_wrapper_'):
+                                        value = class_._wrapper_._new_from_handle(value)
+                        elif 'contents' in dir(value):
+                                value = None
+                        args.append(value)
+        return args
+
+def build_decoders(event_types):
+        """
+        Builds decoders for a dictionary of event types as found in
+        NeilPlayer._event_types_.
+
+        @return: Dictionary mapping event type values to tuples of
+        (eventname, membername, argnames, decoder).
+        @rtype: dict
+        """
+        decoders = {}
+        for enumname, cfg in event_types.items():
+                val = getattr(zzub, enumname)
+                assert val not in decoders, "value %s already registered." % (val)
+                eventname = 'zzub_' + enumname[len('zzub_event_type_'):]
+                membername = cfg.get('args', None)
+                argnames = []
+                if membername:
+                        argnames = [argname for argname, argtype in get_member_type(membername)._fields_]
+                decoders[val] = (eventname, membername, argnames, make_decoder(membername))
+        return decoders
+
+def decode_event(decoders, data):
+        """
+        Decodes an event passed to the zzub callback.
+
+        @param data: Event data as passed to the callback.
+        @type data: POINTER(zzub_event_data_t)
+        @return: Tuple of event type, event name and argument list.
+        @rtype: (int, str, list)
+        """
+        address = addressof(data.contents)
+        eventtype = c_int.from_address(address).value
+        eventname, membername, argnames, decode = decoders[eventtype]
+        return eventtype, eventname, decode(address)
+
+def coalesce_events(events, keys):
+        """
+        Removes redundant events from a batch of decoded events. Of all
+        events of a coalesced type which share the same key arguments,
+        only the last one is kept, at its own position in the batch.
+
+        @param events: List of (eventtype, eventname, args) tuples.
+        @type events: list
+        @param keys: Maps event types to the indices of the arguments
+        identifying what an event refers to, e.g. (plugin, group, track,
+        param) for parameter changes. Types not in keys are never dropped.
+        @type keys: dict
+        @return: Coalesced list of events in the original order.
+        @rtype: list
+        """
+        eventkeys = []
+        latest = {}
+        for index, (eventtype, eventname, args) in enumerate(events):
+                indices = keys.get(eventtype)
+                key = None
+                if indices is not None:
+                        key = (eventtype,) + tuple([args[i] for i in indices])
+                        latest[key] = index
+                eventkeys.append(key)
+        if len(latest) == len([key for key in eventkeys if key is not None]):
+                return events
+        return [event for index, (event, key) in enumerate(zip(events, eventkeys))
+                if key is None or latest[key] == index]
+
+BENCHMARK_EVENT_TYPES = dict(
+        zzub_event_type_parameter_changed = dict(args='change_parameter'),
+)
+
+def benchmark(event_types=BENCHMARK_EVENT_TYPES, count=100000):
+        """
+        Compares events per second of generic and precompiled decoding
+        for a parameter change event, the most frequent event during
+        playback with automation.
+
+        @return: Tuple of (generic events/sec, precompiled events/sec).
+        @rtype: (float, float)
+        """
+        from ctypes import pointer
+        decoders = build_decoders(event_types)
+        plugin = zzub.zzub_plugin_t()
+        ed = zzub.EventData()
+        ed.type = zzub.zzub_event_type_parameter_changed
+        ed.change_parameter.plugin = pointer(plugin)
+        ed.change_parameter.group = 1
+        ed.change_parameter.param = 2
+        ed.change_parameter.value = 3
+        data = pointer(ed)
+        eventname, membername, argnames, decode = decoders[ed.type]
+        t1 = time.time()
+        for i in range(count):
+                decode_generic(data.contents, membername, argnames)
+        t2 = time.time()
+        for i in range(count):
+                decode_event(decoders, data)
+        t3 = time.time()
+        return count / (t2 - t1), count / (t3 - t2)
+
+__all__ = [
+        'make_decoder',
+        'decode_generic',
+        'build_decoders',
+        'decode_event',
+        'coalesce_events',
+        'benchmark',
+]
+
+if __name__ == '__main__':
+        generic, compiled = benchmark()
+        print("generic: %.0f events/sec" % generic)
+        print("precompiled: %.0f events/sec" % compiled)
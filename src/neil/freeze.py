@@ -0,0 +1,251 @@
+#encoding: latin-1
+
+# Neil
+# Modular Sequencer
+# Copyright (C) 2006,2007,2008 The Neil Development Team
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Freezes a generator and its effect chain into a wave.
+
+The chain is rendered offline in a separate process from a copy of the
+song, with every other plugin muted. The result is loaded into a free
+wavetable slot and played by a wavetable stream which follows the song
+position, while the original plugins stay in the song, muted, until
+the chain is unfrozen.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import zzub
+
+STREAM_URI = '@zzub.org/stream/wavetable;1'
+
+# connection amp at 0 dB and pan at center
+UNITY = 0x4000
+
+def get_audio_inputs(plugin):
+        """
+        Returns the plugins connected to the audio inputs of a plugin.
+        """
+        return [plugin.get_input_connection_plugin(i) for i in range(plugin.get_input_connection_count())
+                if plugin.get_input_connection_type(i) == zzub.zzub_connection_type_audio]
+
+def get_audio_outputs(plugin):
+        """
+        Returns the plugins an audio output of a plugin is connected to.
+        """
+        return [plugin.get_output_connection_plugin(i) for i in range(plugin.get_output_connection_count())
+                if plugin.get_output_connection_type(i) == zzub.zzub_connection_type_audio]
+
+def get_output_connections(plugin):
+        """
+        Returns the audio outputs of a plugin along with their amp and
+        pan values.
+
+        @return: List of (target, amp, pan) tuples.
+        @rtype: list
+        """
+        connections = []
+        for target in get_audio_outputs(plugin):
+                index = target.get_input_connection_by_type(plugin, zzub.zzub_connection_type_audio)
+                amp = target.get_parameter_value(zzub.zzub_parameter_group_connection, index, 0)
+                pan = target.get_parameter_value(zzub.zzub_parameter_group_connection, index, 1)
+                connections.append((target, amp, pan))
+        return connections
+
+def connect(target, plugin, amp=UNITY, pan=UNITY):
+        """
+        Connects the audio output of plugin to target.
+        """
+        target.add_input(plugin, zzub.zzub_connection_type_audio)
+        index = target.get_input_connection_by_type(plugin, zzub.zzub_connection_type_audio)
+        target.set_parameter_value(zzub.zzub_parameter_group_connection, index, 0, amp, False)
+        target.set_parameter_value(zzub.zzub_parameter_group_connection, index, 1, pan, False)
+
+def find_chain(plugin):
+        """
+        Returns a generator followed by the effects only it feeds. The
+        chain ends before the first plugin which mixes in other inputs,
+        and before the master.
+
+        @param plugin: The generator.
+        @type plugin: zzub.Plugin
+        @return: List of plugins, starting with the generator.
+        @rtype: [zzub.Plugin, ...]
+        """
+        chain = [plugin]
+        while True:
+                outputs = get_audio_outputs(chain[-1])
+                if len(outputs) != 1:
+                        break
+                target = outputs[0]
+                if target.get_flags() & zzub.zzub_plugin_flag_is_root:
+                        break
+                if target in chain or len(get_audio_inputs(target)) != 1:
+                        break
+                chain.append(target)
+        return chain
+
+def isolate_chain(player, names):
+        """
+        Prepares a player for rendering a chain alone: all other plugins
+        producing audio are muted, and the last plugin of the chain is
+        connected straight to the master at 0 dB.
+
+        @param names: Names of the plugins in the chain.
+        @type names: [str, ...]
+        """
+        plugins = dict([(plugin.get_name(), plugin) for plugin in player.get_plugin_list()])
+        chain = [plugins[name] for name in names]
+        master = player.get_plugin(0)
+        for plugin in plugins.values():
+                if plugin == master or plugin in chain:
+                        continue
+                if plugin.get_flags() & zzub.zzub_plugin_flag_has_audio_output:
+                        plugin.set_mute(True)
+        last = chain[-1]
+        for target, amp, pan in get_output_connections(last):
+                target.delete_input(last, zzub.zzub_connection_type_audio)
+        connect(master, last)
+        master.set_parameter_value(zzub.zzub_parameter_group_global, 0, 0, 0, False)
+        player.history_commit("isolate chain")
+
+def render_chain(songpath, names, wavepath, samplerate):
+        """
+        Renders a chain of a song from the first tick to the song end.
+        Runs in a worker process.
+        """
+        import neil.render
+        renderer = neil.render.Renderer(samplerate)
+        try:
+                renderer.load(songpath)
+                isolate_chain(renderer.player, names)
+                renderer.render(wavepath, 0, renderer.player.get_song_end())
+        finally:
+                renderer.destroy()
+
+def start_render(player, chain, samplerate):
+        """
+        Saves a copy of the song and starts rendering a chain in a worker
+        process.
+
+        @return: Tuple of the worker process and the path of the wave
+        being rendered.
+        @rtype: (multiprocessing.Process, str)
+        """
+        folder = tempfile.mkdtemp(prefix='neil-freeze-')
+        songpath = os.path.join(folder, 'song.ccm')
+        wavepath = os.path.join(folder, 'chain.wav')
+        player.flush(None, None)
+        player.history_flush_last()
+        # not through the neil player, which would change the document path
+        if zzub.Player.save_ccm(player, songpath):
+                raise IOError("unable to save %s" % songpath)
+        names = [plugin.get_name() for plugin in chain]
+        context = multiprocessing.get_context('spawn')
+        process = context.Process(target=render_chain, args=(songpath, names, wavepath, samplerate))
+        process.daemon = True
+        process.start()
+        return process, wavepath
+
+def remove_render(wavepath):
+        """
+        Removes the files start_render has created.
+        """
+        folder = os.path.dirname(wavepath)
+        for name in os.listdir(folder):
+                os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
+
+def find_free_wave(player):
+        """
+        Returns the first wave without levels, or None.
+        """
+        for i in range(player.get_wave_count()):
+                wave = player.get_wave(i)
+                if not wave.get_level_count():
+                        return wave
+        return None
+
+class FrozenTrack:
+        """
+        A chain replaced by a wavetable stream, and what is needed to
+        bring it back.
+        """
+
+        def __init__(self, chain, muted, stream, wave):
+                self.chain = chain
+                self.muted = muted
+                self.stream = stream
+                self.wave = wave
+
+def finish_freeze(player, chain, wavepath):
+        """
+        Replaces a chain with the wave rendered by start_render. The wave
+        is loaded into a free slot and played by a wavetable stream which
+        is connected where the chain was. The plugins of the chain are
+        muted and otherwise left untouched.
+
+        @return: The frozen track.
+        @rtype: FrozenTrack
+        """
+        wave = find_free_wave(player)
+        if not wave:
+                raise RuntimeError("no free wave slot")
+        if not player.load_wave(wave, wavepath):
+                raise IOError("unable to load %s" % wavepath)
+        generator = chain[0]
+        wave.set_name("Frozen " + generator.get_name())
+        loader = player.get_pluginloader_by_name(STREAM_URI)
+        if not loader:
+                raise RuntimeError("wavetable stream plugin not found")
+        stream = zzub.Player.create_plugin(player, None, 0, "Frozen " + generator.get_name(), loader)
+        stream.set_stream_source(str(wave.get_index() + 1))
+        # follow the song position, like the chain did
+        stream.set_attribute_value(0, 1)
+        x, y = generator.get_position()
+        stream.set_position(x, y + 0.1)
+        for target, amp, pan in get_output_connections(chain[-1]):
+                connect(target, stream, amp, pan)
+        muted = [plugin.get_mute() for plugin in chain]
+        for plugin in chain:
+                plugin.set_mute(True)
+        player.history_commit("freeze track")
+        return FrozenTrack(chain, muted, stream, wave)
+
+def unfreeze(player, frozen):
+        """
+        Removes the stream and wave of a frozen track and unmutes its
+        chain.
+        """
+        frozen.stream.destroy()
+        frozen.wave.clear()
+        for plugin, muted in zip(frozen.chain, frozen.muted):
+                plugin.set_mute(muted)
+        player.history_commit("unfreeze track")
+
+__all__ = [
+        'find_chain',
+        'isolate_chain',
+        'render_chain',
+        'start_render',
+        'remove_render',
+        'FrozenTrack',
+        'finish_freeze',
+        'unfreeze',
+]
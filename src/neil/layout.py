@@ -0,0 +1,416 @@
+#encoding: latin-1
+
+# Neil
+# Modular Sequencer
+# Copyright (C) 2006,2007,2008 The Neil Development Team
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Arranges the plugins of the router automatically.
+
+Plugins are put into columns by their distance to the master, which
+sits at the right, so that signals flow from left to right. Within a
+column, plugins are ordered next to the plugins they are connected to,
+and columns holding too many plugins are split. Columns which do not fit
+side by side are stacked. The result may then be loosened up by a
+force-directed pass.
+
+Positions are in router coordinates, between -1 and 1.
+"""
+
+import numpy as np
+import zzub
+
+# extent of the layout in router coordinates
+LIMIT_X = 0.85
+LIMIT_Y = 0.85
+
+# largest vertical distance between two plugins
+MAX_SPACING = 0.2
+
+# size of a plugin in router coordinates, for a router of 1000 x 800
+# pixels, if the actual size is not given
+BOX = (0.2, 0.0625)
+
+# space kept between plugins, relative to their size
+GAP = 0.2
+
+def get_edges(plugins):
+        """
+        Returns the connections between a list of plugins.
+
+        @param plugins: The plugins.
+        @type plugins: [zzub.Plugin, ...]
+        @return: Array of (source, target) indices into plugins, and the
+        index of the master, or None.
+        @rtype: (numpy.ndarray, int)
+        """
+        index = dict([(plugin, i) for i, plugin in enumerate(plugins)])
+        edges = []
+        root = None
+        for i, plugin in enumerate(plugins):
+                if root is None and plugin.get_flags() & zzub.zzub_plugin_flag_is_root:
+                        root = i
+                for j in range(plugin.get_input_connection_count()):
+                        source = index.get(plugin.get_input_connection_plugin(j))
+                        if source is not None and source != i:
+                                edges.append((source, i))
+        return np.array(edges, dtype=int).reshape(-1, 2), root
+
+def break_cycles(count, edges, root=None):
+        """
+        Returns a mask of the edges to keep so that the graph has no
+        cycles. The graph is searched depth first against the signal
+        flow, starting from the master, and the feedback connections
+        found are left out.
+        """
+        inputs = [[] for i in range(count)]
+        for e, (source, target) in enumerate(edges):
+                inputs[target].append((source, e))
+        keep = np.ones(len(edges), dtype=bool)
+        # 0 = unvisited, 1 = on the stack, 2 = done
+        state = [0] * count
+        starts = list(range(count))
+        if root is not None:
+                starts.insert(0, root)
+        for start in starts:
+                if state[start]:
+                        continue
+                state[start] = 1
+                stack = [(start, iter(inputs[start]))]
+                while stack:
+                        node, it = stack[-1]
+                        for source, e in it:
+                                if state[source] == 1:
+                                        keep[e] = False
+                                elif not state[source]:
+                                        state[source] = 1
+                                        stack.append((source, iter(inputs[source])))
+                                        break
+                        else:
+                                state[node] = 2
+                                stack.pop()
+        return keep
+
+def assign_layers(count, edges):
+        """
+        Returns the layer of each node: the length of the longest path
+        from the node to a node without outputs. The edges must not form
+        cycles. Nodes without any connections go into the last layer,
+        with the generators.
+
+        @rtype: numpy.ndarray
+        """
+        layers = np.zeros(count, dtype=int)
+        if not len(edges):
+                return layers
+        sources, targets = edges[:, 0], edges[:, 1]
+        for i in range(count):
+                new = layers.copy()
+                np.maximum.at(new, sources, layers[targets] + 1)
+                if (new == layers).all():
+                        break
+                layers = new
+        connected = np.zeros(count, dtype=bool)
+        connected[edges.ravel()] = True
+        layers[~connected] = max(layers.max(), 1)
+        return layers
+
+def order_layers(layers, edges, initial, sweeps=8):
+        """
+        Orders the nodes of each layer by the barycenters of their
+        neighbours, sweeping back and forth over the layers.
+
+        @param initial: Values giving the order to start from.
+        @type initial: numpy.ndarray
+        @return: Rank of each node within its layer.
+        @rtype: numpy.ndarray
+        """
+        count = len(layers)
+        rank = np.zeros(count, dtype=int)
+        size = np.bincount(layers, minlength=layers.max() + 1)
+        members = [np.nonzero(layers == k)[0] for k in range(len(size))]
+        for nodes in members:
+                rank[nodes[np.argsort(initial[nodes], kind='stable')]] = np.arange(len(nodes))
+        if not len(edges):
+                return rank
+        # both directions of each edge, from node to neighbour
+        nodes = np.concatenate([edges[:, 0], edges[:, 1]])
+        neighbours = np.concatenate([edges[:, 1], edges[:, 0]])
+        for sweep in range(sweeps):
+                # towards the generators, then back towards the master
+                if sweep % 2:
+                        order = range(len(size) - 2, -1, -1)
+                else:
+                        order = range(1, len(size))
+                for k in order:
+                        if size[k] < 2:
+                                continue
+                        pos = rank / np.maximum(size[layers] - 1, 1).astype(float)
+                        if sweep % 2:
+                                mask = (layers[nodes] == k) & (layers[neighbours] > k)
+                        else:
+                                mask = (layers[nodes] == k) & (layers[neighbours] < k)
+                        sums = np.bincount(nodes[mask], weights=pos[neighbours[mask]], minlength=count)
+                        counts = np.bincount(nodes[mask], minlength=count)
+                        layer = members[k]
+                        key = np.where(counts[layer] > 0, sums[layer] / np.maximum(counts[layer], 1), pos[layer])
+                        rank[layer[np.argsort(key, kind='stable')]] = np.arange(len(layer))
+        return rank
+
+def layered_layout(count, edges, root=None, initial=None, sweeps=8, max_rows=None, box=None):
+        """
+        Computes a layered layout with signals flowing from left to right.
+
+        @param count: Number of nodes.
+        @type count: int
+        @param edges: Array of (source, target) node indices.
+        @type edges: numpy.ndarray
+        @param root: Index of the master, or None.
+        @type root: int
+        @param initial: Values giving the order to start from within each
+        layer, such as the current vertical positions.
+        @type initial: numpy.ndarray
+        @param max_rows: Layers with more nodes are split into columns. By
+        default, as many as fit above each other.
+        @type max_rows: int
+        @param box: Width and height of a plugin in router coordinates.
+        @type box: (float, float)
+        @return: Array of (x, y) positions.
+        @rtype: numpy.ndarray
+        """
+        positions = np.zeros((count, 2))
+        if not count:
+                return positions
+        if initial is None:
+                initial = np.arange(count)
+        scale = np.array(box or BOX, dtype=float)
+        if max_rows is None:
+                max_rows = int(2 * LIMIT_Y / (scale[1] * (1 + GAP))) + 1
+        edges = np.asarray(edges, dtype=int).reshape(-1, 2)
+        edges = edges[break_cycles(count, edges, root)]
+        layers = assign_layers(count, edges)
+        rank = order_layers(layers, edges, np.asarray(initial), sweeps)
+        size = np.bincount(layers)
+        columns = np.maximum(-(-size // max_rows), 1)
+        rows = -(-size // columns)
+        # neighbouring ranks go to neighbouring columns of a layer
+        column = (np.cumsum(columns) - columns)[layers] + rank % columns[layers]
+        row = rank // columns[layers]
+        total = columns.sum()
+        # columns which do not fit side by side share a slot, above each other
+        slots = min(total, int(2 * LIMIT_X / (scale[0] * (1 + GAP))) + 1)
+        slot = np.arange(total) * slots // total
+        height = np.bincount(column, minlength=total)
+        offset = np.zeros(total, dtype=int)
+        for s in range(slots):
+                members = np.nonzero(slot == s)[0]
+                offset[members] = np.cumsum(height[members]) - height[members]
+        slotheight = np.bincount(slot, weights=height)
+        if slots > 1:
+                positions[:, 0] = LIMIT_X - slot[column] * (2 * LIMIT_X / (slots - 1))
+        spacing = min(MAX_SPACING, 2 * LIMIT_Y / max(slotheight.max() - 1, 1))
+        positions[:, 1] = (row + offset[column] - (slotheight[slot[column]] - 1) * 0.5) * spacing
+        if slotheight.max() > max_rows and slots < total:
+                # too many plugins to stack, move them apart as loosely
+                pos = positions / scale
+                remove_overlaps(pos, np.array([LIMIT_X, LIMIT_Y]) / scale, root is not None and [root] or [])
+                pos *= scale
+                if root is not None:
+                        pos[root] = positions[root]
+                positions = pos
+        return positions
+
+def get_overlaps(pos, gap=0.0):
+        """
+        Returns a matrix telling which boxes of size 1 x 1 overlap.
+
+        @param pos: Array of (x, y) box centers, in units of the box size.
+        @type pos: numpy.ndarray
+        """
+        dx = pos[:, 0, np.newaxis] - pos[:, 0]
+        dy = pos[:, 1, np.newaxis] - pos[:, 1]
+        overlap = (np.abs(dx) < 1 + gap) & (np.abs(dy) < 1 + gap)
+        np.fill_diagonal(overlap, False)
+        return overlap
+
+def snap_to_grid(pos, limit, fixed=(), gap=GAP):
+        """
+        Moves boxes of size 1 x 1 to the cells of a grid, each to the
+        nearest free cell, so that they do not overlap if there are
+        enough cells. Cells overlapping fixed nodes are not used. If there
+        are too few cells, the boxes are packed without the gap.
+
+        @param pos: Array of (x, y) box centers, in units of the box size.
+        It is modified in place.
+        @type pos: numpy.ndarray
+        @param limit: Largest x and y, in units of the box size.
+        @type limit: numpy.ndarray
+        """
+        movable = np.setdiff1d(np.arange(len(pos)), list(fixed))
+        # without the gap, boxes are kept a little apart against rounding
+        for step in (1 + gap, 1.01):
+                cols, rows = (np.floor(2 * limit / step) + 1).astype(int)
+                gx, gy = np.meshgrid((np.arange(cols) - (cols - 1) * 0.5) * step,
+                        (np.arange(rows) - (rows - 1) * 0.5) * step)
+                cells = np.stack([gx.ravel(), gy.ravel()], axis=1)
+                free = np.ones(len(cells), dtype=bool)
+                for i in fixed:
+                        d = np.abs(cells - pos[i])
+                        free &= ~((d[:, 0] < step) & (d[:, 1] < step))
+                if free.sum() >= len(movable):
+                        break
+        distance = ((pos[movable, np.newaxis] - cells) ** 2).sum(2)
+        # nodes close to a cell choose first
+        for n in np.argsort(distance.min(1), kind='stable'):
+                choice = np.where(free, distance[n], np.inf)
+                cell = choice.argmin()
+                if not free[cell]:
+                        # more nodes than cells
+                        cell = distance[n].argmin()
+                free[cell] = False
+                pos[movable[n]] = cells[cell]
+        return pos
+
+def remove_overlaps(pos, limit, fixed=(), gap=GAP, sweeps=50):
+        """
+        Pushes apart boxes of size 1 x 1 which overlap, each pair along
+        the axis on which they overlap least. If that does not resolve
+        all overlaps, as when the boxes are packed tightly, the boxes are
+        snapped to a grid instead.
+
+        @param pos: Array of (x, y) box centers, in units of the box size.
+        It is modified in place.
+        @type pos: numpy.ndarray
+        @param limit: Largest x and y, in units of the box size.
+        @type limit: numpy.ndarray
+        @param fixed: Indices of nodes which stay in place.
+        @type fixed: [int, ...]
+        @param gap: Space to keep between boxes.
+        @type gap: float
+        """
+        count = len(pos)
+        index = np.arange(count)
+        order = np.sign(index[:, np.newaxis] - index)
+        movable = np.ones(count, dtype=bool)
+        movable[list(fixed)] = False
+        # share of the push each node of a pair takes
+        share = np.where(movable[:, np.newaxis], np.where(movable, 0.5, 1.0), 0.0)
+        for sweep in range(sweeps):
+                overlap = get_overlaps(pos, gap)
+                if not overlap.any():
+                        return pos
+                dx = pos[:, 0, np.newaxis] - pos[:, 0]
+                dy = pos[:, 1, np.newaxis] - pos[:, 1]
+                px = 1 + gap - np.abs(dx)
+                py = 1 + gap - np.abs(dy)
+                along_x = overlap & (px <= py)
+                along_y = overlap & ~along_x
+                # coinciding nodes are told apart by their index
+                sx = np.where(dx == 0, order, np.sign(dx))
+                sy = np.where(dy == 0, order, np.sign(dy))
+                pos[:, 0] += (np.where(along_x, sx * px, 0) * share).sum(1)
+                pos[:, 1] += (np.where(along_y, sy * py, 0) * share).sum(1)
+                np.clip(pos, -limit, limit, out=pos)
+        if get_overlaps(pos).any():
+                snap_to_grid(pos, limit, fixed, gap)
+        return pos
+
+def refine_layout(positions, edges, fixed=(), iterations=60, box=None):
+        """
+        Loosens up a layout with a force-directed pass, in which all nodes
+        repel each other and connected nodes attract each other. Forces
+        are measured in units of the plugin box, and boxes which still
+        overlap afterwards are moved apart with remove_overlaps.
+
+        @param fixed: Indices of nodes which stay in place.
+        @type fixed: [int, ...]
+        @param box: Width and height of a plugin in router coordinates.
+        @type box: (float, float)
+        @return: Array of (x, y) positions.
+        @rtype: numpy.ndarray
+        """
+        if box is None:
+                box = BOX
+        scale = np.array(box, dtype=float)
+        positions = np.asarray(positions, dtype=float)
+        start = positions / scale
+        pos = start.copy()
+        count = len(pos)
+        if count < 2:
+                return positions.copy()
+        edges = np.asarray(edges, dtype=int).reshape(-1, 2)
+        fixed = list(fixed)
+        limit = np.array([LIMIT_X, LIMIT_Y]) / scale
+        # ideal distance, for nodes spread evenly over the area
+        k = (4 * limit[0] * limit[1] / count) ** 0.5
+        temperature = k * 0.5
+        sources, targets = edges[:, 0], edges[:, 1]
+        for i in range(iterations):
+                x, y = pos[:, 0], pos[:, 1]
+                dx = x[:, np.newaxis] - x
+                dy = y[:, np.newaxis] - y
+                # repulsion of k * k / distance, along the unit vector
+                f = dx * dx
+                f += dy * dy
+                np.maximum(f, 1e-4, out=f)
+                np.divide(k * k, f, out=f)
+                disp = np.stack([(dx * f).sum(1), (dy * f).sum(1)], axis=1)
+                if len(edges):
+                        # attraction of distance * distance / k
+                        d = pos[sources] - pos[targets]
+                        d *= (np.sqrt((d ** 2).sum(1)) / k)[:, np.newaxis]
+                        for axis in range(2):
+                                disp[:, axis] -= np.bincount(sources, weights=d[:, axis], minlength=count)
+                                disp[:, axis] += np.bincount(targets, weights=d[:, axis], minlength=count)
+                length = np.maximum(np.sqrt((disp ** 2).sum(1)), 1e-9)
+                pos += disp * (np.minimum(length, temperature) / length)[:, np.newaxis]
+                pos[fixed] = start[fixed]
+                np.clip(pos, -limit, limit, out=pos)
+                temperature *= 0.95
+        remove_overlaps(pos, limit, fixed)
+        pos *= scale
+        pos[fixed] = positions[fixed]
+        return pos
+
+def arrange(player, plugins, refine=False, box=None):
+        """
+        Arranges plugins in the router, as one undoable step.
+
+        @param plugins: The plugins to arrange.
+        @type plugins: [zzub.Plugin, ...]
+        @param refine: Loosen up the layout with a force-directed pass.
+        @type refine: bool
+        @param box: Width and height of a plugin in router coordinates.
+        @type box: (float, float)
+        """
+        edges, root = get_edges(plugins)
+        initial = np.array([plugin.get_position()[1] for plugin in plugins])
+        positions = layered_layout(len(plugins), edges, root, initial, box=box)
+        if refine:
+                positions = refine_layout(positions, edges, root is not None and [root] or [], box=box)
+        for plugin, (x, y) in zip(plugins, positions):
+                plugin.set_position(float(x), float(y))
+        player.history_commit("arrange plugins")
+
+__all__ = [
+        'get_edges',
+        'layered_layout',
+        'get_overlaps',
+        'remove_overlaps',
+        'refine_layout',
+        'arrange',
+]
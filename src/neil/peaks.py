@@ -0,0 +1,164 @@
+#encoding: latin-1
+
+# Neil
+# Modular Sequencer
+# Copyright (C) 2006,2007,2008 The Neil Development Team
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Keeps the peaks of a wavelevel for drawing it at any zoom level.
+"""
+
+import numpy as np
+
+class PeakPyramid:
+        """
+        Min, max and RMS peaks of a wavelevel at successively halved
+        resolutions, so that drawing the wave costs the same per pixel
+        column at any zoom level.
+
+        The finest level holds the peaks of BLOCK frames each. It is read
+        with get_samples_digest in chunks by calling scan from the main
+        loop, since zzub may not be called from other threads, and the
+        coarser levels are derived from it. Until then, get_digest reads
+        the samples directly.
+        """
+        BLOCK = 256
+        CHUNK = 4096  # blocks read per call to scan
+
+        def __init__(self, level, channels):
+                """
+                @param level: The wavelevel.
+                @type level: zzub.Wavelevel
+                @param channels: Number of channels of the wave.
+                @type channels: int
+                """
+                self.level = level
+                self.channels = channels
+                self.count = level.get_sample_count()
+                self.blocks = -(-self.count // self.BLOCK)
+                # one (mins, maxs, mean squares) tuple per resolution
+                self.levels = [self.new_level(self.blocks)]
+                self.read = 0
+                self.complete = False
+
+        def new_level(self, size):
+                shape = (self.channels, size)
+                return np.zeros(shape, np.float32), np.zeros(shape, np.float32), np.zeros(shape, np.float32)
+
+        def is_for(self, level):
+                """
+                Returns True if the pyramid holds the peaks of level at its
+                current length.
+                """
+                return level == self.level and level.get_sample_count() == self.count
+
+        def read_blocks(self, begin, end):
+                """
+                Reads the finest peaks of the blocks from begin to end.
+                """
+                mins, maxs, squares = self.levels[0]
+                # whole blocks in one call, the last partial block separately
+                parts = [(begin, min(end, self.count // self.BLOCK))]
+                if end > parts[0][1]:
+                        parts.append((max(parts[0][1], begin), end))
+                for first, last in parts:
+                        if first >= last:
+                                continue
+                        start, stop = first * self.BLOCK, min(last * self.BLOCK, self.count)
+                        for channel in range(self.channels):
+                                mn, mx, amp = self.level.get_samples_digest(channel, start, stop, last - first)
+                                mins[channel, first:last] = mn
+                                maxs[channel, first:last] = mx
+                                squares[channel, first:last] = np.square(amp)
+
+        def reduce(self, index, begin, end):
+                """
+                Derives the peaks of a level from the level below, from begin
+                to end in units of the level.
+                """
+                lower = self.levels[index - 1]
+                size = lower[0].shape[1]
+                pairs = np.arange(begin * 2, end * 2).reshape(-1, 2)
+                # an odd block at the end pairs with itself
+                pairs = np.minimum(pairs, size - 1)
+                mins, maxs, squares = self.levels[index]
+                mins[:, begin:end] = lower[0][:, pairs].min(2)
+                maxs[:, begin:end] = lower[1][:, pairs].max(2)
+                squares[:, begin:end] = lower[2][:, pairs].mean(2)
+
+        def scan(self):
+                """
+                Reads the next CHUNK blocks, and builds the coarser levels
+                after the last one.
+
+                @return: True if there is more to read.
+                @rtype: bool
+                """
+                end = min(self.read + self.CHUNK, self.blocks)
+                self.read_blocks(self.read, end)
+                self.read = end
+                if self.read < self.blocks:
+                        return True
+                size = self.blocks
+                while size > 1:
+                        size = -(-size // 2)
+                        self.levels.append(self.new_level(size))
+                        self.reduce(len(self.levels) - 1, 0, size)
+                self.complete = True
+                return False
+
+        def update(self, start, end):
+                """
+                Reads the peaks of the frames from start to end again, after
+                they have been edited.
+                """
+                begin, end = start // self.BLOCK, min(-(-end // self.BLOCK), self.blocks)
+                # blocks past the read position are read by scan anyway
+                if begin >= self.read:
+                        return
+                self.read_blocks(begin, min(end, self.read))
+                if not self.complete:
+                        return
+                for index in range(1, len(self.levels)):
+                        begin, end = begin // 2, -(-end // 2)
+                        self.reduce(index, begin, end)
+
+        def get_digest(self, channel, start, end, size):
+                """
+                Returns the min, max and RMS peaks of size columns between
+                start and end, like zzub.Wavelevel.get_samples_digest.
+                """
+                spp = (end - start) / float(size)
+                if not self.complete or spp < self.BLOCK:
+                        return self.level.get_samples_digest(channel, start, end, size)
+                # the coarsest level with at least one block per column
+                index = min(int(np.log2(spp / self.BLOCK)), len(self.levels) - 1)
+                blocksize = self.BLOCK << index
+                mins, maxs, squares = [a[channel] for a in self.levels[index]]
+                bounds = (start + np.arange(size) * spp) // blocksize
+                bounds = np.minimum(bounds.astype(int), len(mins) - 1)
+                last = min(-(-end // blocksize), len(mins))
+                first = bounds[0]
+                bounds -= first
+                counts = np.diff(np.append(bounds, last - first))
+                return (np.minimum.reduceat(mins[first:last], bounds),
+                        np.maximum.reduceat(maxs[first:last], bounds),
+                        np.sqrt(np.add.reduceat(squares[first:last], bounds) / np.maximum(counts, 1)))
+
+__all__ = [
+        'PeakPyramid',
+]
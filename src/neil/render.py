@@ -0,0 +1,383 @@
+#encoding: latin-1
+
+# Neil
+# Modular Sequencer
+# Copyright (C) 2006,2007,2008 The Neil Development Team
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Renders songs to audio files without a sound card.
+
+The player is driven by a silent audio driver, so songs are processed
+as fast as the CPU allows. Nothing in here imports GTK, which makes
+the module usable on build and render machines without a display.
+"""
+
+from ctypes import CDLL, Structure, POINTER, byref, c_int, c_int64, c_char_p, c_void_p, c_float
+from ctypes.util import find_library
+import numpy as np
+import math
+import optparse
+import os
+import sys
+import time
+import zzub
+
+SAMPLERATE = 44100
+BUFFERSIZE = 512
+# audiodriver::MAX_FRAMESIZE, the largest buffer work_stereo can fill
+MAX_BUFFERSIZE = 16384
+
+# libsndfile format constants
+SF_FORMAT_WAV = 0x010000
+SF_FORMAT_FLAC = 0x170000
+SF_FORMAT_PCM_16 = 0x0002
+SF_FORMAT_PCM_24 = 0x0003
+SF_FORMAT_FLOAT = 0x0006
+SFM_WRITE = 0x20
+SFC_SET_CLIPPING = 0x10C0
+
+FILE_FORMATS = {
+        'wav': SF_FORMAT_WAV,
+        'flac': SF_FORMAT_FLAC,
+}
+
+SAMPLE_FORMATS = {
+        16: SF_FORMAT_PCM_16,
+        24: SF_FORMAT_PCM_24,
+        32: SF_FORMAT_FLOAT,
+}
+
+class SF_INFO(Structure):
+        _fields_ = [
+                ('frames', c_int64),
+                ('samplerate', c_int),
+                ('channels', c_int),
+                ('format', c_int),
+                ('sections', c_int),
+                ('seekable', c_int),
+        ]
+
+_libsndfile = None
+
+def get_libsndfile():
+        """
+        Returns the libsndfile library, which libzzub links against
+        anyway, loading it on first use.
+        """
+        global _libsndfile
+        if not _libsndfile:
+                lib = CDLL(find_library('sndfile') or 'libsndfile.so.1')
+                lib.sf_open.restype = c_void_p
+                lib.sf_open.argtypes = [c_char_p, c_int, POINTER(SF_INFO)]
+                lib.sf_writef_float.restype = c_int64
+                lib.sf_writef_float.argtypes = [c_void_p, POINTER(c_float), c_int64]
+                lib.sf_command.restype = c_int
+                lib.sf_command.argtypes = [c_void_p, c_int, c_void_p, c_int]
+                lib.sf_strerror.restype = c_char_p
+                lib.sf_strerror.argtypes = [c_void_p]
+                lib.sf_close.argtypes = [c_void_p]
+                _libsndfile = lib
+        return _libsndfile
+
+class SoundFile:
+        """
+        Writes interleaved stereo float samples to a WAV or FLAC file.
+        """
+
+        def __init__(self, path, samplerate, bits=16, fileformat=None):
+                """
+                @param path: Path of the output file.
+                @type path: str
+                @param samplerate: Samples per second.
+                @type samplerate: int
+                @param bits: 16 or 24 bit integer, or 32 bit float samples.
+                @type bits: int
+                @param fileformat: 'wav' or 'flac', or None to guess from the
+                file extension.
+                @type fileformat: str
+                """
+                if not fileformat:
+                        fileformat = os.path.splitext(path)[1][1:].lower() or 'wav'
+                if not fileformat in FILE_FORMATS:
+                        raise ValueError("unsupported file format: %s" % fileformat)
+                if not bits in SAMPLE_FORMATS:
+                        raise ValueError("unsupported sample size: %s" % bits)
+                if fileformat == 'flac' and bits == 32:
+                        raise ValueError("FLAC does not support float samples")
+                self.lib = get_libsndfile()
+                self.info = SF_INFO()
+                self.info.samplerate = samplerate
+                self.info.channels = 2
+                self.info.format = FILE_FORMATS[fileformat] | SAMPLE_FORMATS[bits]
+                self.handle = self.lib.sf_open(path.encode(sys.getfilesystemencoding()), SFM_WRITE, byref(self.info))
+                if not self.handle:
+                        raise IOError("%s: %s" % (path, self.lib.sf_strerror(None).decode('utf-8')))
+                self.lib.sf_command(self.handle, SFC_SET_CLIPPING, None, 1)
+                self.buffer = np.zeros((MAX_BUFFERSIZE, 2), dtype=np.float32)
+
+        def write(self, left, right, frames):
+                """
+                Interleaves and writes frames samples from two channel buffers.
+
+                @param left: Left channel samples.
+                @type left: numpy.ndarray
+                @param right: Right channel samples.
+                @type right: numpy.ndarray
+                """
+                buf = self.buffer[:frames]
+                buf[:,0] = left[:frames]
+                buf[:,1] = right[:frames]
+                self.lib.sf_writef_float(self.handle, buf.ctypes.data_as(POINTER(c_float)), frames)
+
+        def close(self):
+                if self.handle:
+                        self.lib.sf_close(self.handle)
+                        self.handle = None
+
+def get_plugin_paths():
+        """
+        Returns the folders to load plugins from, in the same order as
+        the player component searches them.
+        """
+        pluginpath = os.environ.get('NEIL_PLUGIN_PATH', None)
+        if pluginpath:
+                return pluginpath.split(os.pathsep)
+        paths = os.environ.get('LD_LIBRARY_PATH', None)
+        if paths:
+                paths = paths.split(os.pathsep)
+        else:
+                paths = []
+        paths.extend([
+                '/usr/local/lib64',
+                '/usr/local/lib',
+                '/usr/lib64',
+                '/usr/lib',
+        ])
+        pluginpaths = []
+        for path in [os.path.join(path, 'zzub') for path in paths]:
+                if os.path.exists(path) and not path in pluginpaths:
+                        pluginpaths.append(path)
+        return pluginpaths
+
+class RenderStats:
+        """
+        Timing results of a render.
+
+        @ivar frames: Number of frames written.
+        @ivar samplerate: Samples per second.
+        @ivar elapsed: Wall clock seconds spent rendering.
+        @ivar worktimes: List of (plugin name, seconds) tuples, sampled
+        once per buffer from the plugins last work time, most expensive
+        plugin first.
+        @ivar peak: Largest absolute sample value of both channels.
+        """
+
+        def __init__(self, frames, samplerate, elapsed, worktimes, peak=0.0):
+                self.frames = frames
+                self.samplerate = samplerate
+                self.elapsed = elapsed
+                self.worktimes = worktimes
+                self.peak = peak
+
+        def get_duration(self):
+                """
+                Returns the length of the rendered audio in seconds.
+                """
+                return self.frames / float(self.samplerate)
+
+        def get_realtime_factor(self):
+                """
+                Returns how many times faster than realtime the song was rendered.
+                """
+                if not self.elapsed:
+                        return 0.0
+                return self.get_duration() / self.elapsed
+
+        def get_peak_db(self):
+                """
+                Returns the peak level in dBFS, or None for silence.
+                """
+                if not self.peak:
+                        return None
+                return 20.0 * math.log10(self.peak)
+
+        def print_report(self, f=None):
+                f = f or sys.stdout
+                print("rendered %.2fs in %.2fs (%.1fx realtime)" % (self.get_duration(), self.elapsed, self.get_realtime_factor()), file=f)
+                if self.peak:
+                        print("peak %.2f dBFS" % self.get_peak_db(), file=f)
+                for name, worktime in self.worktimes:
+                        print("  %-32s %8.3fs" % (name, worktime), file=f)
+
+class Renderer:
+        """
+        Owns a player connected to a silent audio driver and renders the
+        loaded song into audio files.
+        """
+
+        def __init__(self, samplerate=SAMPLERATE, buffersize=BUFFERSIZE, pluginpaths=None):
+                assert buffersize <= MAX_BUFFERSIZE
+                self.samplerate = samplerate
+                self.buffersize = buffersize
+                self.player = zzub.Player.create()
+                if pluginpaths is None:
+                        pluginpaths = get_plugin_paths()
+                for pluginpath in pluginpaths:
+                        self.player.add_plugin_path(pluginpath + os.sep)
+                self.player.initialize(samplerate)
+                self.driver = zzub.Audiodriver.create_silent(self.player, 'silent', 2, 0, [samplerate], 1)
+                self.driver.set_samplerate(samplerate)
+                self.driver.set_buffersize(buffersize)
+                if self.driver.create_device(-1, 0):
+                        raise RuntimeError("unable to create silent audio device")
+                self.driver.enable(True)
+
+        def load(self, filename):
+                """
+                Loads a song in CCM format, replacing the current one.
+                """
+                self.player.clear()
+                if self.player.load_ccm(filename):
+                        raise IOError("unable to load %s" % filename)
+
+        def drain_events(self):
+                # nobody listens, but the queues must not overflow
+                self.player.handle_events()
+                while self.player.get_next_event():
+                        pass
+
+        def render(self, path, start=None, end=None, tail=0.0, bits=16, fileformat=None):
+                """
+                Renders the loaded song into an audio file.
+
+                @param path: Path of the output file.
+                @type path: str
+                @param start: First tick to render, defaults to the song start.
+                @type start: int
+                @param end: Tick to stop at, defaults to the song end.
+                @type end: int
+                @param tail: Seconds to keep rendering after the end has been
+                reached, for reverb and delay tails.
+                @type tail: float
+                @return: Timing results.
+                @rtype: RenderStats
+                """
+                player = self.player
+                if start is None:
+                        start = player.get_song_start()
+                if end is None:
+                        end = player.get_song_end()
+                if end <= start:
+                        raise ValueError("empty range: %i-%i" % (start, end))
+                # the player stops by itself at the loop end if looping is off
+                player.set_loop_enabled(0)
+                player.set_loop(start, end)
+                player.set_position(start)
+                player.set_state(zzub.zzub_player_state_playing)
+                plugins = list(player.get_plugin_list())
+                worktimes = dict([(plugin, 0.0) for plugin in plugins])
+                tail_frames = int(tail * self.samplerate)
+                frames = 0
+                peak = 0.0
+                outfile = SoundFile(path, self.samplerate, bits, fileformat)
+                t1 = time.time()
+                try:
+                        while True:
+                                if player.get_state() != zzub.zzub_player_state_playing:
+                                        if tail_frames <= 0:
+                                                break
+                                        tail_frames -= self.buffersize
+                                buffers, count = player.work_stereo(self.buffersize)
+                                left = np.ctypeslib.as_array(buffers[0], shape=(count,))
+                                right = np.ctypeslib.as_array(buffers[1], shape=(count,))
+                                outfile.write(left, right, count)
+                                frames += count
+                                if count:
+                                        peak = max(peak, float(np.abs(left).max()), float(np.abs(right).max()))
+                                for plugin in plugins:
+                                        worktimes[plugin] += plugin.get_last_worktime()
+                                self.drain_events()
+                finally:
+                        outfile.close()
+                        player.set_state(zzub.zzub_player_state_stopped)
+                elapsed = time.time() - t1
+                worktimes = sorted([(plugin.get_name(), worktime) for plugin, worktime in worktimes.items()], key=lambda item: -item[1])
+                return RenderStats(frames, self.samplerate, elapsed, worktimes, peak)
+
+        def destroy(self):
+                self.driver.enable(False)
+                self.driver.destroy()
+                self.player.destroy()
+
+def parse_range(value):
+        """
+        Parses a tick range given as 'start-end'.
+        """
+        start, end = value.split('-')
+        return int(start), int(end)
+
+def main(argv=None):
+        parser = optparse.OptionParser(usage="%prog [options] song.ccm output.(wav|flac)\n       %prog --batch [options] manifest")
+        parser.add_option('-r', '--rate', type='int', default=SAMPLERATE, help="samples per second (default: %default)")
+        parser.add_option('-b', '--bits', type='int', default=16, help="16, 24 or 32 (float) bits per sample (default: %default)")
+        parser.add_option('-f', '--format', default=None, help="wav or flac (default: from file extension)")
+        parser.add_option('--buffersize', type='int', default=BUFFERSIZE, help="frames per work call (default: %default)")
+        parser.add_option('--range', default=None, help="ticks to render as start-end (default: song start to song end)")
+        parser.add_option('--loop', action='store_true', default=False, help="render the loop range instead of the whole song")
+        parser.add_option('--tail', type='float', default=0.0, help="seconds to render past the end (default: %default)")
+        parser.add_option('-q', '--quiet', action='store_true', default=False, help="do not print timing statistics")
+        group = optparse.OptionGroup(parser, "Batch Options")
+        group.add_option('--batch', action='store_true', default=False, help="render all songs listed in a manifest")
+        group.add_option('-j', '--jobs', type='int', default=os.cpu_count() or 1, help="number of worker processes (default: %default)")
+        group.add_option('--timeout', type='float', default=None, help="seconds after which a job is killed (default: none)")
+        group.add_option('--outdir', default='.', help="folder for songs without an output path (default: %default)")
+        group.add_option('--report', default=None, help="write a JSON report to this file (default: stdout)")
+        parser.add_option_group(group)
+        options, args = parser.parse_args(argv)
+        if options.batch:
+                if len(args) != 1:
+                        parser.error("expected a manifest")
+                import neil.batchrender
+                return neil.batchrender.run(args[0], options)
+        if len(args) != 2:
+                parser.error("expected a song and an output file")
+        songpath, outpath = args
+        renderer = Renderer(options.rate, options.buffersize)
+        try:
+                renderer.load(songpath)
+                start = end = None
+                if options.range:
+                        start, end = parse_range(options.range)
+                elif options.loop:
+                        start, end = renderer.player.get_loop()
+                stats = renderer.render(outpath, start, end, options.tail, options.bits, options.format)
+        finally:
+                renderer.destroy()
+        if not options.quiet:
+                stats.print_report()
+        return 0
+
+__all__ = [
+        'SoundFile',
+        'get_plugin_paths',
+        'RenderStats',
+        'Renderer',
+        'main',
+]
+
+if __name__ == '__main__':
+        sys.exit(main())
@@ -26,6 +26,7 @@ import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
 from gi.repository import GObject
+from gi.repository import GLib
 import config
 from config import get_plugin_aliases, get_plugin_blacklist
 import common
@@ -86,10 +87,14 @@ def get_player():
 	except:
 		import traceback
 		traceback.print_exc()
-	def handle_events(player):
+	def handle_events(*args):
 		player.handle_events()
 		return True
-	GObject.timeout_add(1000/25, handle_events, player)
+	fd = player.get_event_fd()
+	if fd != -1:
+		GLib.io_add_watch(fd, GLib.PRIORITY_DEFAULT, GLib.IO_IN, handle_events)
+	else:
+		GObject.timeout_add(1000/25, handle_events)
 	return player
 
 if __name__ == '__main__':
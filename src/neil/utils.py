@@ -26,10 +26,14 @@ which have no specific module or class they belong to.
 import time, sys, math, os, zzub
 from string import ascii_letters, digits
 import struct
+import array
+import ctypes
+import numpy as np
 from gi.repository import Gtk
 from gi.repository import Gdk
 from gi.repository import GdkPixbuf
 import weakref
+import cairo
 import neil.com as com
 
 def is_debug():
@@ -355,6 +359,111 @@ def word2str(p,v):
                 return '....'
         return "%04X" % v
 
+HEX2 = ["%02X" % v for v in range(256)]
+
+class ParameterFormatter:
+        """
+        Formats the values of a parameter the way note2str, switch2str,
+        byte2str and word2str do, from tables built once from the
+        parameter description.
+
+        For notes, switches and bytes every possible value is looked up
+        in a table, words are put together from two byte tables.
+        """
+
+        NONE = ['...', '.', '..', '....']
+        FORMATTERS = [note2str, switch2str, byte2str, word2str]
+
+        def __init__(self, p):
+                self.type = p.get_type()
+                self.value_min = p.get_value_min()
+                self.value_max = p.get_value_max()
+                self.value_none = p.get_value_none()
+                self.none = self.NONE[self.type]
+                self.table = None
+                if self.type != zzub.zzub_parameter_type_word:
+                        self.table = [self.make_string(p, v) for v in range(256)]
+
+        def make_string(self, p, v):
+                try:
+                        return self.FORMATTERS[self.type](p, v)
+                except IndexError:
+                        # not a valid note
+                        return '?' * len(self.none)
+
+        def format(self, v):
+                """
+                Returns the string of a single value.
+                """
+                if self.table and 0 <= v < 256:
+                        return self.table[v]
+                if v == self.value_none:
+                        return self.none
+                if self.type == zzub.zzub_parameter_type_word and 0 <= v < 0x10000:
+                        return HEX2[v >> 8] + HEX2[v & 0xff]
+                return "%X" % v
+
+        def format_values(self, values):
+                """
+                Returns the strings of a sequence of values, such as a
+                column returned by get_pattern_block.
+
+                @rtype: [str, ...]
+                """
+                if self.table and values and 0 <= min(values) and max(values) < 256:
+                        return list(map(self.table.__getitem__, values))
+                return list(map(self.format, values))
+
+        def scale_values(self, values):
+                """
+                Maps values to the range from 0 to 1, and values without
+                a value to None.
+
+                @rtype: [float, ...]
+                """
+                scale = 1.0 / max(self.value_max - self.value_min, 1)
+                none = self.value_none
+                value_min = self.value_min
+                return [None if v == none else (v - value_min) * scale for v in values]
+
+class PluginloaderFormatters:
+        """
+        Parameter formatters of the global and track parameters of a
+        plugin loader. Parameter descriptions do not change once a
+        plugin has been loaded, so the formatters are shared by every
+        view and plugin instance.
+        """
+
+        def __init__(self, loader):
+                self.groups = [None]
+                for g in (1, 2):
+                        self.groups.append([ParameterFormatter(loader.get_parameter(g, i))
+                                            for i in range(loader.get_parameter_count(g))])
+
+        def get(self, group, column):
+                return self.groups[group][column]
+
+loader_formatters = {}
+
+def get_parameter_formatter(plugin, group, track, column):
+        """
+        Returns the formatter of a parameter of a plugin. Global and
+        track parameters share the formatters of their plugin loader,
+        connection parameters depend on the connection, so their
+        formatters are built every time.
+
+        @rtype: ParameterFormatter
+        """
+        if group == 0:
+                return ParameterFormatter(plugin.get_parameter(group, track, column))
+        loader = plugin.get_pluginloader()
+        uri = loader.get_uri()
+        formatters = loader_formatters.get(uri)
+        if formatters is None:
+                formatters = PluginloaderFormatters(loader)
+                loader_formatters[uri] = formatters
+        return formatters.get(group, column)
+
 def roundint(v):
         """
         Rounds a float value to the next integer if its
@@ -933,6 +1042,107 @@ def get_new_pattern_name(plugin):
                         break
         return s
 
+def get_pattern_block(plugin, pattern, group, track, tracks, column, columns, row, rows):
+        """
+        Reads a rectangular block of pattern values with a single call
+        into zzub.
+
+        @param plugin: Plugin owning the pattern.
+        @type plugin: zzub.Plugin
+        @param pattern: Pattern index.
+        @type pattern: int
+        @return: Values laid out column by column, so that the value of
+        track t, column c and row r is at (t * columns + c) * rows + r.
+        @rtype: array.array
+        """
+        values = array.array('i', [0]) * (tracks * columns * rows)
+        if values:
+                plugin.get_pattern_values(pattern, group, track, tracks, column, columns, row, rows, values, len(values))
+        return values
+
+def set_pattern_block(plugin, pattern, group, track, tracks, column, columns, row, rows, values):
+        """
+        Writes a rectangular block of pattern values laid out as returned
+        by get_pattern_block() as a single operation.
+        """
+        if tracks * columns * rows:
+                plugin.set_pattern_values(pattern, group, track, tracks, column, columns, row, rows, values, len(values))
+
+def set_pattern_cells(plugin, pattern, cells):
+        """
+        Writes scattered pattern values with one bulk write per group.
+        The bounding block of the cells in each group is read, patched
+        and written back, so cells not mentioned keep their values.
+
+        @param cells: Maps (row, group, track, column) to a value.
+        @type cells: dict
+        """
+        groups = {}
+        for (r, g, t, i), v in cells.items():
+                groups.setdefault(g, []).append((r, t, i, v))
+        for g, entries in groups.items():
+                row = min(e[0] for e in entries)
+                track = min(e[1] for e in entries)
+                column = min(e[2] for e in entries)
+                rows = max(e[0] for e in entries) - row + 1
+                tracks = max(e[1] for e in entries) - track + 1
+                columns = max(e[2] for e in entries) - column + 1
+                values = get_pattern_block(plugin, pattern, g, track, tracks, column, columns, row, rows)
+                for r, t, i, v in entries:
+                        values[((t - track) * columns + (i - column)) * rows + (r - row)] = v
+                set_pattern_block(plugin, pattern, g, track, tracks, column, columns, row, rows, values)
+
+WAVE_BUFFER_DTYPES = {
+        zzub.zzub_wave_buffer_type_si16 : np.int16,
+        zzub.zzub_wave_buffer_type_f32 : np.float32,
+        zzub.zzub_wave_buffer_type_si32 : np.int32,
+}
+
+def lock_wavelevel_samples(level):
+        """
+        Locks the sample data of a wavelevel for editing and returns
+        a numpy array sharing its memory, so no samples are copied.
+
+        The array is shaped (frames, channels). Since numpy has no
+        24 bit integer type, si24 levels are returned as raw bytes
+        shaped (frames, channels, 3). Edits become audible and
+        undoable once commit_wavelevel_samples() is called, and the
+        array must not be used after that.
+
+        @param level: Wavelevel to edit.
+        @type level: zzub.Wavelevel
+        @return: Writable view on the sample data.
+        @rtype: numpy.ndarray
+        """
+        frames = level.get_sample_count()
+        channels = 2 if level.get_wave().get_flags() & zzub.zzub_wave_flag_stereo else 1
+        fmt = level.get_format()
+        ptr = level.lock_samples()
+        if fmt == zzub.zzub_wave_buffer_type_si24:
+                dtype, shape = np.uint8, (frames, channels, 3)
+        else:
+                dtype, shape = WAVE_BUFFER_DTYPES[fmt], (frames, channels)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if not ptr or not size:
+                return np.zeros(shape, dtype)
+        buf = (ctypes.c_char * size).from_address(ptr)
+        return np.frombuffer(buf, dtype).reshape(shape)
+
+def commit_wavelevel_samples(level, start=0, end=None, description=None):
+        """
+        Publishes the edits made through lock_wavelevel_samples() in
+        the frame range start to end as a single undoable operation.
+
+        @param description: If given, the history is committed with
+        this description.
+        @type description: str
+        """
+        if end is None:
+                end = level.get_sample_count()
+        level.commit_samples(start, end)
+        if description:
+                com.get('neil.core.player').history_commit(description)
+
 class CancelException(Exception):
         """
         Is being thrown when the user hits cancel in a sequence of
@@ -1260,6 +1470,94 @@ def synchronize_list(old_list, new_list, insert_entry_func=None, del_entry_func=
                 original_list.insert(j,a)
                 swap_entry_func(i,j)
 
+class PlayheadOverlay:
+        """
+        Keeps the content of a widget in a surface, so that moving the
+        play position only repaints the strips the marker leaves and
+        enters.
+
+        The widget calls draw() from its draw handler, and move() with
+        the new rectangle of the marker when the play position changes.
+        An expose which reaches beyond those strips, e.g. after
+        a redraw of the whole widget, renders the content again.
+        """
+
+        def __init__(self, widget):
+                self.widget = widget
+                self.surface = None
+                self.valid = False
+                self.rect = None
+                self.dirty = []
+
+        def invalidate(self):
+                """
+                Marks the cached content as outdated.
+                """
+                self.valid = False
+
+        def move(self, rect):
+                """
+                Moves the marker and asks for the strips it left and
+                entered to be repainted.
+
+                @param rect: (x, y, width, height) of the marker, or None
+                if it is not visible.
+                @type rect: (int, int, int, int)
+                """
+                if rect == self.rect:
+                        return
+                window = self.widget.get_parent_window()
+                for r in (self.rect, rect):
+                        if r and window:
+                                x, y, w, h = [int(v) for v in r]
+                                # one pixel around the marker for antialiasing
+                                strip = (x - 1, y - 1, w + 2, h + 2)
+                                self.dirty.append(strip)
+                                area = self.widget.get_allocation()
+                                area.x += strip[0]
+                                area.y += strip[1]
+                                area.width, area.height = strip[2], strip[3]
+                                window.invalidate_rect(area, False)
+                self.rect = rect
+
+        def is_dirty_only(self, ctx):
+                # True if every exposed rectangle lies within a marker strip
+                try:
+                        rects = ctx.copy_clip_rectangle_list()
+                except cairo.Error:
+                        return False
+                for r in rects:
+                        for x, y, w, h in self.dirty:
+                                if x <= r.x and y <= r.y and r.x + r.width <= x + w and r.y + r.height <= y + h:
+                                        break
+                        else:
+                                return False
+                return bool(rects)
+
+        def draw(self, ctx, draw_content, draw_marker):
+                """
+                Paints the widget from the cached content and puts the
+                marker on top.
+
+                @param draw_content: Called with a cairo context to render
+                everything but the marker.
+                @param draw_marker: Called with the widget context to
+                paint the marker. Returns the rectangle of the marker,
+                or None.
+                """
+                area = self.widget.get_allocation()
+                if (not self.surface or self.surface.get_width() != area.width or
+                    self.surface.get_height() != area.height):
+                        self.surface = cairo.ImageSurface(cairo.Format.RGB24, max(area.width, 1), max(area.height, 1))
+                        self.valid = False
+                if not self.valid or not self.is_dirty_only(ctx):
+                        draw_content(cairo.Context(self.surface))
+                        self.valid = True
+                self.dirty = []
+                ctx.set_source_surface(self.surface, 0, 0)
+                ctx.paint()
+                self.rect = draw_marker(ctx)
+
 class AcceleratorMap:
         def __init__(self):
                 self.__keymap = {}
@@ -1316,6 +1614,9 @@ __all__ = [
         'switch2str',
         'byte2str',
         'word2str',
+        'PlayheadOverlay',
+        'ParameterFormatter',
+        'get_parameter_formatter',
         'roundint',
         'buffersize_to_latency',
         'filenameify',
@@ -1347,6 +1648,11 @@ __all__ = [
         'is_root',
         'is_streamer',
         'get_new_pattern_name',
+        'get_pattern_block',
+        'set_pattern_block',
+        'set_pattern_cells',
+        'lock_wavelevel_samples',
+        'commit_wavelevel_samples',
         'new_theme_image',
         'add_accelerator',
         'camelcase_to_unixstyle',
@@ -26,16 +26,19 @@ from gi.repository import Gtk
 from gi.repository import Gdk
 from gi.repository import Pango
 from gi.repository import PangoCairo
+from gi.repository import GObject
 import os, sys
 from utils import prepstr, db2linear, linear2db, note2str, file_filter
 from utils import read_int, write_int, add_scrollbars, new_image_button,\
      filepath, add_hscrollbar, error, message, Menu, wave_names_generator
+from utils import lock_wavelevel_samples, commit_wavelevel_samples
 import zzub
 import config
 import common
 from common import MARGIN, MARGIN2, MARGIN3
 
 import neil.com as com
+from neil.peaks import PeakPyramid
 
 # size of border
 BORDER = 5
@@ -108,6 +111,11 @@ class WaveEditView(Gtk.DrawingArea):
         self.wavetable = wavetable
         self.wave = None
         self.level = None
+        self.pyramid = None
+        self.pyramid_source = None
+        # set while an edit of this view is committed, whose range the
+        # pyramid has already been updated for
+        self.committing = False
         self.offpeak = 0.4
         self.onpeak = 0.9
         self.dragging = False
@@ -141,6 +149,7 @@ class WaveEditView(Gtk.DrawingArea):
         self.context_menu.add_separator()
 
         self.menu_normalize = self.context_menu.add_item("Normalize", self.on_normalize)
+        self.menu_reverse = self.context_menu.add_item("Reverse", self.on_reverse)
            
         self.loop_start = 0
         self.loop_end = 150
@@ -172,8 +181,35 @@ class WaveEditView(Gtk.DrawingArea):
         if self.level == None:
             return
         w, h = self.get_client_size()
+        if self.pyramid:
+            digest = self.pyramid.get_digest
+        else:
+            digest = self.level.get_samples_digest
         self.minbuffer, self.maxbuffer, self.ampbuffer = \
-            self.level.get_samples_digest(channel, self.range[0], self.range[1],  w)
+            digest(channel, self.range[0], self.range[1],  w)
+
+    def update_pyramid(self):
+        """
+        Starts building the peak pyramid of the current level, unless it
+        is already up to date.
+        """
+        if self.committing and self.pyramid and self.pyramid.is_for(self.level):
+            return
+        if self.pyramid_source:
+            GObject.source_remove(self.pyramid_source)
+            self.pyramid_source = None
+        self.pyramid = None
+        if self.level:
+            channels = self.wave.get_flags() & zzub.zzub_wave_flag_stereo and 2 or 1
+            self.pyramid = PeakPyramid(self.level, channels)
+            self.pyramid_source = GObject.idle_add(self.on_pyramid_idle)
+
+    def on_pyramid_idle(self):
+        if self.pyramid.scan():
+            return True
+        self.pyramid_source = None
+        self.view_changed()
+        return False
 
     def fix_range(self):
         begin,end = self.range
@@ -431,7 +467,33 @@ class WaveEditView(Gtk.DrawingArea):
         self.level.normalize()
         self.sample_changed()
 
+    def on_reverse(self, widget):
+        if self.selection:
+            begin, end = self.selection
+        else:
+            begin, end = 0, self.level.get_sample_count()
+        samples = lock_wavelevel_samples(self.level)
+        samples[begin:end] = samples[begin:end][::-1].copy()
+        self.commit_samples(begin, end, "reverse sample range")
+
+    def commit_samples(self, begin, end, description):
+        """
+        Commits the edits made through lock_wavelevel_samples between
+        begin and end, reading only their peaks again.
+        """
+        if self.pyramid and self.pyramid.is_for(self.level):
+            # the edits are visible to get_samples_digest before the commit
+            self.pyramid.update(begin, end)
+        # the commit reports the changed wave right away, see update
+        self.committing = True
+        try:
+            commit_wavelevel_samples(self.level, begin, end, description)
+        finally:
+            self.committing = False
+        self.view_changed()
+
     def sample_changed(self):
+        self.update_pyramid()
         self.view_changed()
 
     def view_changed(self, *args):
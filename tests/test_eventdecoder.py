@@ -0,0 +1,80 @@
+import os, sys
+import unittest
+from ctypes import pointer
+import zzub
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import neil.eventdecoder as eventdecoder
+
+EVENT_TYPES = dict(
+    zzub_event_type_double_click = dict(args=None),
+    zzub_event_type_new_plugin = dict(args='new_plugin'),
+    zzub_event_type_parameter_changed = dict(args='change_parameter'),
+    zzub_event_type_osc_message = dict(args='osc_message'),
+)
+
+class TestEventDecoder(unittest.TestCase):
+    def setUp(self):
+        self.decoders = eventdecoder.build_decoders(EVENT_TYPES)
+        self.plugin = zzub.zzub_plugin_t()
+
+    def testNoArgs(self):
+        ed = zzub.EventData()
+        ed.type = zzub.zzub_event_type_double_click
+        self.assertEqual(eventdecoder.decode_event(self.decoders, pointer(ed)),
+                         (zzub.zzub_event_type_double_click, 'zzub_double_click', []))
+
+    def testMatchesGeneric(self):
+        """Precompiled decoders must return what the generic decoder returns.
+        """
+        ed = zzub.EventData()
+        ed.type = zzub.zzub_event_type_parameter_changed
+        ed.change_parameter.plugin = pointer(self.plugin)
+        ed.change_parameter.group = 2
+        ed.change_parameter.track = 1
+        ed.change_parameter.param = 5
+        ed.change_parameter.value = 0x80
+        eventname, membername, argnames, decode = self.decoders[ed.type]
+        eventtype, eventname, args = eventdecoder.decode_event(self.decoders, pointer(ed))
+        self.assertEqual(eventname, 'zzub_parameter_changed')
+        self.assertEqual(args, eventdecoder.decode_generic(ed, membername, argnames))
+        self.assertTrue(isinstance(args[0], zzub.Plugin))
+
+    def testNullHandle(self):
+        ed = zzub.EventData()
+        ed.type = zzub.zzub_event_type_new_plugin
+        eventtype, eventname, args = eventdecoder.decode_event(self.decoders, pointer(ed))
+        self.assertEqual(args, [None])
+
+    def testHandleOutlivesEvent(self):
+        """Decoded handles must not refer to the event memory.
+        """
+        ed = zzub.EventData()
+        ed.type = zzub.zzub_event_type_new_plugin
+        ed.new_plugin.plugin = pointer(self.plugin)
+        eventtype, eventname, args = eventdecoder.decode_event(self.decoders, pointer(ed))
+        handle = hash(args[0])
+        ed.new_plugin.plugin = None
+        self.assertEqual(hash(args[0]), handle)
+        self.assertTrue(args[0]._as_parameter_)
+
+    def testCoalesce(self):
+        """Only the latest change per parameter survives, in its own place.
+        """
+        changed = zzub.zzub_event_type_parameter_changed
+        clicked = zzub.zzub_event_type_double_click
+        events = [
+            (changed, 'zzub_parameter_changed', [1, 1, 0, 2, 10]),
+            (changed, 'zzub_parameter_changed', [1, 1, 0, 3, 20]),
+            (clicked, 'zzub_double_click', []),
+            (changed, 'zzub_parameter_changed', [1, 1, 0, 2, 30]),
+            (clicked, 'zzub_double_click', []),
+        ]
+        keys = {changed: (0, 1, 2, 3)}
+        self.assertEqual(eventdecoder.coalesce_events(events, keys),
+                         events[1:])
+        self.assertEqual(eventdecoder.coalesce_events(events[1:], keys),
+                         events[1:])
+
+if __name__ == '__main__':
+    unittest.main()
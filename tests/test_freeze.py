@@ -0,0 +1,113 @@
+import os, sys
+import multiprocessing
+import tempfile
+import unittest
+import wave
+import zzub
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import neil.freeze as freeze
+import neil.render as render
+
+class Plugin:
+    """Just enough of zzub.Plugin to walk connections."""
+    def __init__(self, name, flags=0):
+        self.name = name
+        self.flags = flags
+        self.inputs = []
+        self.outputs = []
+
+    def connect(self, target):
+        target.inputs.append(self)
+        self.outputs.append(target)
+
+    def get_flags(self):
+        return self.flags
+
+    def get_input_connection_count(self):
+        return len(self.inputs)
+
+    def get_input_connection_type(self, index):
+        return zzub.zzub_connection_type_audio
+
+    def get_input_connection_plugin(self, index):
+        return self.inputs[index]
+
+    def get_output_connection_count(self):
+        return len(self.outputs)
+
+    def get_output_connection_type(self, index):
+        return zzub.zzub_connection_type_audio
+
+    def get_output_connection_plugin(self, index):
+        return self.outputs[index]
+
+class TestFindChain(unittest.TestCase):
+    def setUp(self):
+        self.master = Plugin('Master', zzub.zzub_plugin_flag_is_root)
+        self.synth = Plugin('Synth')
+        self.drums = Plugin('Drums')
+        self.delay = Plugin('Delay')
+        self.reverb = Plugin('Reverb')
+
+    def testStopsAtMaster(self):
+        self.synth.connect(self.delay)
+        self.delay.connect(self.master)
+        self.assertEqual(freeze.find_chain(self.synth), [self.synth, self.delay])
+
+    def testStopsAtMixingPoint(self):
+        """An effect which also receives other plugins is not frozen.
+        """
+        self.synth.connect(self.delay)
+        self.delay.connect(self.reverb)
+        self.drums.connect(self.reverb)
+        self.reverb.connect(self.master)
+        self.assertEqual(freeze.find_chain(self.synth), [self.synth, self.delay])
+
+    def testStopsAtSplit(self):
+        self.synth.connect(self.delay)
+        self.synth.connect(self.reverb)
+        self.assertEqual(freeze.find_chain(self.synth), [self.synth])
+
+class TestRenderChain(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for filename in os.listdir(self.tempdir):
+            os.remove(os.path.join(self.tempdir, filename))
+        os.rmdir(self.tempdir)
+
+    def write_song(self, path):
+        renderer = render.Renderer(pluginpaths=[])
+        try:
+            player = renderer.player
+            loader = player.get_pluginloader_by_name(freeze.STREAM_URI)
+            stream = zzub.Player.create_plugin(player, None, 0, "Stream", loader)
+            freeze.connect(player.get_plugin(0), stream)
+            player.history_commit("add stream")
+            self.assertFalse(zzub.Player.save_ccm(player, path))
+        finally:
+            renderer.destroy()
+
+    def testRenderOutOfProcess(self):
+        """The chain is rendered in a worker process, like start_render does.
+        """
+        songpath = os.path.join(self.tempdir, 'song.ccm')
+        wavepath = os.path.join(self.tempdir, 'chain.wav')
+        self.write_song(songpath)
+        context = multiprocessing.get_context('spawn')
+        process = context.Process(target=freeze.render_chain,
+                                  args=(songpath, ['Stream'], wavepath, render.SAMPLERATE))
+        process.start()
+        process.join(60)
+        if process.is_alive():
+            process.terminate()
+        self.assertEqual(process.exitcode, 0)
+        f = wave.open(wavepath)
+        self.assertEqual(f.getnchannels(), 2)
+        self.assertEqual(f.getframerate(), render.SAMPLERATE)
+        f.close()
+
+if __name__ == '__main__':
+    unittest.main()
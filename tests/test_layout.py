@@ -0,0 +1,97 @@
+import os, sys
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import neil.layout as layout
+
+def get_box(width, height):
+    """Size of a 100 x 25 pixel plugin in a router of width x height."""
+    return 200.0 / width, 50.0 / height
+
+def count_overlaps(positions, box):
+    d = np.abs(positions[:, np.newaxis] - positions)
+    overlap = (d[..., 0] < box[0]) & (d[..., 1] < box[1])
+    return (overlap.sum() - len(positions)) // 2
+
+def make_patch():
+    """A master, 30 effects and 69 generators, in shuffled order."""
+    edges = [(1 + i, 0) for i in range(30)] + [(31 + i, 1 + i % 30) for i in range(69)]
+    order = np.r_[0, np.random.RandomState(1).permutation(99) + 1]
+    return 100, [(order[a], order[b]) for a, b in edges]
+
+def make_chains(count, length):
+    """count chains of length plugins each, into the master."""
+    edges = []
+    for chain in range(count):
+        target = 0
+        for i in range(length):
+            source = 1 + chain * length + i
+            edges.append((source, target))
+            target = source
+    return 1 + count * length, edges
+
+class TestLayeredLayout(unittest.TestCase):
+    def testSignalFlowsToMaster(self):
+        # generator -> effect -> master
+        positions = layout.layered_layout(3, [(1, 2), (2, 0)], 0)
+        self.assertTrue(positions[1][0] < positions[2][0] < positions[0][0])
+
+    def testFeedbackConnection(self):
+        """A feedback connection does not move the master away from the right.
+        """
+        positions = layout.layered_layout(3, [(1, 2), (2, 0), (0, 2)], 0)
+        self.assertEqual(positions[:, 0].argmax(), 0)
+        self.assertTrue(positions[1][0] < positions[2][0])
+
+    def testNoOverlaps(self):
+        for count, edges in [make_patch(), make_chains(6, 12), make_chains(3, 20)]:
+            for size in [(800, 600), (1000, 700), (1200, 800)]:
+                box = get_box(*size)
+                positions = layout.layered_layout(count, edges, 0, box=box)
+                self.assertEqual(count_overlaps(positions, box), 0)
+                self.assertTrue((np.abs(positions) <= 1).all())
+
+    def testStackedColumnsFlow(self):
+        """Columns which do not fit side by side keep signals flowing right.
+        """
+        count, edges = make_chains(3, 20)
+        positions = layout.layered_layout(count, edges, 0, box=get_box(1000, 800))
+        for source, target in edges:
+            self.assertTrue(positions[source][0] <= positions[target][0])
+
+    def testTooManyToStack(self):
+        count, edges = make_chains(12, 10)
+        box = get_box(800, 600)
+        positions = layout.layered_layout(count, edges, 0, box=box)
+        self.assertEqual(count_overlaps(positions, box), 0)
+        self.assertEqual(positions[0][0], layout.LIMIT_X)
+
+    def testRefineNoOverlaps(self):
+        for count, edges in [make_patch(), make_chains(6, 12)]:
+            for size in [(800, 600), (1000, 700), (1200, 800)]:
+                box = get_box(*size)
+                positions = layout.layered_layout(count, edges, 0, box=box)
+                refined = layout.refine_layout(positions, edges, [0], box=box)
+                self.assertEqual(count_overlaps(refined, box), 0)
+                self.assertTrue((np.abs(refined) <= 1).all())
+
+    def testRemoveOverlaps(self):
+        """Boxes piled up at one spot are spread out.
+        """
+        positions = np.zeros((40, 2))
+        limit = np.array([5.0, 10.0])
+        layout.remove_overlaps(positions, limit, [0])
+        self.assertFalse(layout.get_overlaps(positions).any())
+        self.assertEqual(tuple(positions[0]), (0, 0))
+        self.assertTrue((np.abs(positions) <= limit).all())
+
+    def testRefineKeepsFixedNodes(self):
+        edges = [(i, 0) for i in range(1, 20)]
+        positions = layout.layered_layout(20, edges, 0)
+        refined = layout.refine_layout(positions, edges, [0])
+        self.assertEqual(tuple(refined[0]), tuple(positions[0]))
+        self.assertTrue((np.abs(refined) <= 1).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os, sys
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from neil.peaks import PeakPyramid
+
+class Level:
+    """Just enough of zzub.Wavelevel to read peaks, on float samples."""
+    def __init__(self, samples):
+        self.samples = samples
+
+    def get_sample_count(self):
+        return self.samples.shape[1]
+
+    def get_samples_digest(self, channel, start, end, size):
+        # like zzub_wavelevel_get_samples_digest for more frames than columns
+        samples = self.samples[channel]
+        sps = (end - start) / float(size)
+        mins, maxs, amps = [], [], []
+        for i in range(size):
+            first = int(start + i * sps)
+            last = max(int(min(start + (i + 1) * sps, end)), first + 1)
+            block = samples[first:last].astype(float)
+            mins.append(block.min())
+            maxs.append(block.max())
+            amps.append(np.sqrt((block ** 2).mean()))
+        return mins, maxs, amps
+
+def build(level, channels):
+    pyramid = PeakPyramid(level, channels)
+    pyramid.CHUNK = 100
+    while pyramid.scan():
+        pass
+    return pyramid
+
+class TestPeakPyramid(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(1)
+        count = 300000 + 123
+        self.samples = (random.uniform(-1, 1, (2, count)) * np.linspace(0, 1, count)).astype(np.float32)
+        self.level = Level(self.samples)
+
+    def assertDigestsClose(self, pyramid, channel, start, end, size):
+        digest = pyramid.get_digest(channel, start, end, size)
+        expected = self.level.get_samples_digest(channel, start, end, size)
+        for values, reference in zip(digest, expected):
+            self.assertEqual(len(values), size)
+            # columns are rounded to whole blocks
+            self.assertTrue(np.abs(np.asarray(values) - reference).max() < 0.05)
+
+    def testDigest(self):
+        pyramid = build(self.level, 2)
+        self.assertTrue(pyramid.complete)
+        count = self.level.get_sample_count()
+        self.assertDigestsClose(pyramid, 0, 0, count, 800)
+        self.assertDigestsClose(pyramid, 1, 1000, 200000, 513)
+        self.assertDigestsClose(pyramid, 1, 5000, 5000 + 256 * 300, 300)
+
+    def testPeaksAreExact(self):
+        """The peaks of the whole wave do not depend on the block size.
+        """
+        pyramid = build(self.level, 2)
+        mins, maxs, amps = pyramid.get_digest(0, 0, self.level.get_sample_count(), 1)
+        self.assertEqual(mins[0], self.samples[0].min())
+        self.assertEqual(maxs[0], self.samples[0].max())
+
+    def testUpdate(self):
+        pyramid = build(self.level, 2)
+        self.samples[0, 100000:150000] *= -0.5
+        pyramid.update(100000, 150000)
+        expected = build(self.level, 2)
+        for arrays, reference in zip(pyramid.levels, expected.levels):
+            for values, expected_values in zip(arrays, reference):
+                self.assertTrue(np.array_equal(values, expected_values))
+
+    def testUpdateWhileScanning(self):
+        pyramid = PeakPyramid(self.level, 1)
+        pyramid.CHUNK = 100
+        pyramid.scan()
+        self.samples[0, :50000] = 0
+        pyramid.update(0, 50000)
+        while pyramid.scan():
+            pass
+        expected = build(self.level, 1)
+        for values, expected_values in zip(pyramid.levels[-1], expected.levels[-1]):
+            self.assertTrue(np.array_equal(values, expected_values))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os, sys
+import tempfile
+import unittest
+import wave
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import neil.batchrender as batchrender
+import neil.render as render
+
+class TestRenderStats(unittest.TestCase):
+    def testRealtimeFactor(self):
+        stats = render.RenderStats(44100 * 10, 44100, 2.0, [])
+        self.assertEqual(stats.get_duration(), 10.0)
+        self.assertEqual(stats.get_realtime_factor(), 5.0)
+
+class TestRenderer(unittest.TestCase):
+    def setUp(self):
+        self.renderer = render.Renderer(pluginpaths=[])
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.renderer.destroy()
+        for filename in os.listdir(self.tempdir):
+            os.remove(os.path.join(self.tempdir, filename))
+        os.rmdir(self.tempdir)
+
+    def testRenderEmptySong(self):
+        """Rendering stops at the song end and writes every frame.
+        """
+        path = os.path.join(self.tempdir, 'empty.wav')
+        stats = self.renderer.render(path, 0, 16)
+        self.assertGreater(stats.frames, 0)
+        self.assertEqual(stats.worktimes[0][0], 'Master')
+        f = wave.open(path)
+        self.assertEqual(f.getnchannels(), 2)
+        self.assertEqual(f.getframerate(), render.SAMPLERATE)
+        self.assertEqual(f.getnframes(), stats.frames)
+        f.close()
+
+    def testTail(self):
+        path = os.path.join(self.tempdir, 'tail.wav')
+        frames = self.renderer.render(path, 0, 16).frames
+        stats = self.renderer.render(path, 0, 16, tail=1.0)
+        self.assertGreaterEqual(stats.frames, frames + render.SAMPLERATE)
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for filename in os.listdir(self.tempdir):
+            os.remove(os.path.join(self.tempdir, filename))
+        os.rmdir(self.tempdir)
+
+    def write_song(self, name, bpm, end):
+        path = os.path.join(self.tempdir, name)
+        archive = zipfile.ZipFile(path, 'w')
+        archive.writestr('song.xmix', '<xmix xmlns:xmix="http://www.zzub.org/ccm/xmix">'
+                         '<transport bpm="%s" tpb="4" start="0" end="%s"/></xmix>' % (bpm, end))
+        archive.close()
+        return path
+
+    def testEstimateLength(self):
+        self.assertEqual(batchrender.estimate_length(self.write_song('a.ccm', 120, 64)), 32.0)
+        self.assertEqual(batchrender.estimate_length(os.path.join(self.tempdir, 'missing.ccm')), 0.0)
+
+    def testReadManifest(self):
+        path = os.path.join(self.tempdir, 'songs.txt')
+        f = open(path, 'w')
+        f.write('# demo songs\na.ccm\n\nb.ccm\n')
+        f.close()
+        jobs = batchrender.read_manifest(path, '/out', 'flac')
+        self.assertEqual([job['song'] for job in jobs],
+                         [os.path.join(self.tempdir, 'a.ccm'), os.path.join(self.tempdir, 'b.ccm')])
+        self.assertEqual(jobs[0]['output'], '/out/a.flac')
+
+if __name__ == '__main__':
+    unittest.main()